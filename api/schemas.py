@@ -1,13 +1,20 @@
 from pydantic import BaseModel
-from typing import Optional, List, Set
+from typing import Optional, List, Set, Dict
 
 
 class QueryRequest(BaseModel):
     question: str
     user: dict
+    session_id: Optional[str] = None
+    # Paging through a capped SQL result (question is ignored then)
+    continuation_token: Optional[str] = None
+    stream: bool = False
 
 
 class QueryResponse(BaseModel):
     question: str
     answer: str
     intents: Optional[Set[str]] = None
+    timings: Optional[List[Dict[str, float]]] = None
+    continuation_tokens: Optional[List[str]] = None
+    rows: Optional[List[Dict]] = None
@@ -1,11 +1,15 @@
 from fastapi import FastAPI, UploadFile, File
+from fastapi.responses import StreamingResponse
 from api.schemas import QueryRequest, QueryResponse
 
 from router.graph import router_app
 import os
-from memory.long_term import init_db
+from memory.long_term import init_db, write_metrics
 from rag_pipeline.config import DATA_DIR
 from rag_pipeline.ingest import ingest
+from sql_pipeline.database import reload_datasets, SUPPORTED_FILES
+from sql_pipeline.agent import fetch_result_page, stream_result_rows
+from sql_pipeline.pagination import CONTINUATION_PATTERN
 
 # Initialize DB at startup
 init_db()
@@ -21,6 +25,14 @@ def home():
     return {"message": "HR Compliance Assistant API Running"}
 
 
+@app.get("/metrics/memory")
+def memory_metrics():
+    """
+    LTM writer stats: batches, rows written, write latency, queue depth.
+    """
+    return write_metrics()
+
+
 from logger import get_logger
 
 logger = get_logger("API")
@@ -33,18 +45,47 @@ def ask_question(req: QueryRequest):
     """
     logger.info(f"📥 Received Question: '{req.question}' | User: {req.user}")
 
+    # ⏭️ Next page / stream of a capped SQL result
+    if req.continuation_token:
+        try:
+            if req.stream:
+                # stream_result_rows validates the token before returning
+                return StreamingResponse(
+                    stream_result_rows(req.continuation_token, req.user),
+                    media_type="application/x-ndjson"
+                )
+            page = fetch_result_page(req.continuation_token, req.user)
+            return {
+                "answer": page["answer"],
+                "intents": ["sql"],
+                "rows": page["rows"],
+                "continuation_tokens": [page["continuation_token"]] if page["continuation_token"] else []
+            }
+        except ValueError as e:
+            return {"answer": str(e), "intents": ["sql"], "continuation_tokens": []}
+
     try:
+        # Memory is scoped per session (falls back to the user's emp_id)
+        session_id = req.session_id or str(req.user.get("emp_id", "")) or None
+
         result = router_app.invoke({
             "question": req.question,
-            "user": req.user
+            "user": req.user,
+            "session_id": session_id
         })
 
         final_answer = result.get("final", "⚠️ No answer generated.")
         logger.info("✅ Response generated successfully")
-        
+
+        # Lift continuation markers out of the text into a structured field
+        continuation_tokens = CONTINUATION_PATTERN.findall(final_answer)
+        final_answer = CONTINUATION_PATTERN.sub("", final_answer)
+
         return {
             "answer": final_answer,
-            "intents": list(result.get("intents", []))
+            "intents": list(result.get("intents", [])),
+            "timings": result.get("timings", []),
+            "continuation_tokens": continuation_tokens
         }
 
     except Exception as e:
@@ -78,7 +119,11 @@ def upload_document(file: UploadFile = File(...)):
 
         # ✅ Run ingestion automatically in background
         import threading
-        threading.Thread(target=ingest).start()
+        if safe_name.lower().endswith(SUPPORTED_FILES):
+            # Tabular data → hot-reload only the affected DuckDB tables
+            threading.Thread(target=reload_datasets).start()
+        else:
+            threading.Thread(target=ingest).start()
 
         return {
             "status": "success",
@@ -1,11 +1,112 @@
+import atexit
 import sqlite3
 import os
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from memory.sqlite_store import ConnectionPool, BackgroundWriter
+from logger import get_logger
+logger = get_logger("MEMORY")
 
 DB_PATH = "memory/chat_memory.db"
 
+# Set by init_db(); LIKE scan is the fallback when SQLite lacks FTS5
+FTS_ENABLED = False
+
+# --------------------------------------------------
+# FTS5 mirror of `memory` (external content, kept in sync by triggers)
+# --------------------------------------------------
+FTS_SCHEMA = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(
+        question,
+        answer,
+        content='memory',
+        content_rowid='rowid',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memory_ai AFTER INSERT ON memory BEGIN
+        INSERT INTO memory_fts(rowid, question, answer)
+        VALUES (new.rowid, new.question, new.answer);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memory_ad AFTER DELETE ON memory BEGIN
+        INSERT INTO memory_fts(memory_fts, rowid, question, answer)
+        VALUES ('delete', old.rowid, old.question, old.answer);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS memory_au AFTER UPDATE ON memory BEGIN
+        INSERT INTO memory_fts(memory_fts, rowid, question, answer)
+        VALUES ('delete', old.rowid, old.question, old.answer);
+        INSERT INTO memory_fts(rowid, question, answer)
+        VALUES (new.rowid, new.question, new.answer);
+    END
+    """
+]
+
+
+# UPSERT (not INSERT OR REPLACE): REPLACE deletes silently and
+# would skip the FTS delete trigger
+UPSERT_SQL = """
+    INSERT INTO memory (id, question, answer, session_id, embedding) VALUES (?,?,?,?,?)
+    ON CONFLICT(id) DO UPDATE SET
+        question = excluded.question,
+        answer = excluded.answer,
+        session_id = excluded.session_id,
+        embedding = excluded.embedding
+"""
+
+
+# --------------------------------------------------
+# Pooled readers + one batched writer per database file
+# --------------------------------------------------
+_stores: Dict[str, Tuple[ConnectionPool, BackgroundWriter]] = {}
+_stores_lock = threading.Lock()
+
+
+def _store() -> Tuple[ConnectionPool, BackgroundWriter]:
+    with _stores_lock:
+        store = _stores.get(DB_PATH)
+        if store is None:
+            os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+            store = _stores[DB_PATH] = (ConnectionPool(DB_PATH), BackgroundWriter(DB_PATH))
+        return store
+
+
+def flush_writes():
+    """
+    Block until every queued LTM write is committed.
+    """
+    for _, writer in list(_stores.values()):
+        writer.flush()
+
+
+def write_metrics() -> Dict[str, float]:
+    """
+    Write latency / batch / queue-depth counters of the LTM writer.
+    """
+    return _store()[1].metrics()
+
+
+atexit.register(flush_writes)
+
+
 def init_db():
-    os.makedirs("memory", exist_ok=True)
-    con = sqlite3.connect(DB_PATH)
+    pool, _ = _store()
+    with pool.connection() as con:
+        _init_schema(con)
+
+
+def _init_schema(con):
+    global FTS_ENABLED
+
     cur = con.cursor()
     cur.execute("""
         CREATE TABLE IF NOT EXISTS memory (
@@ -14,37 +115,118 @@ def init_db():
             answer TEXT
         )
     """)
-    con.commit()
-    con.close()
 
+    # Semantic memory columns (older databases get them added in place)
+    existing = {row[1] for row in cur.execute("PRAGMA table_info(memory)")}
+    for column, kind in (("session_id", "TEXT"), ("embedding", "BLOB")):
+        if column not in existing:
+            cur.execute(f"ALTER TABLE memory ADD COLUMN {column} {kind}")
+    cur.execute("CREATE INDEX IF NOT EXISTS memory_session ON memory(session_id)")
 
-def save(entry):
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
-    cur.execute(
-        "INSERT OR REPLACE INTO memory VALUES (?,?,?)",
-        (entry["id"], entry["question"], entry["answer"])
-    )
-    con.commit()
-    con.close()
+    # Rows saved before session scoping have no owner. Handing them to any
+    # session would leak another user's answers, so they are kept on disk
+    # but never returned (delete them with: DELETE FROM memory WHERE session_id IS NULL)
+    orphaned = cur.execute("SELECT COUNT(*) FROM memory WHERE session_id IS NULL").fetchone()[0]
+    if orphaned:
+        logger.warning(f"⚠️ {orphaned} LTM row(s) predate session scoping and are no longer retrievable")
 
+    try:
+        existed = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'memory_fts'"
+        ).fetchone()
+        for statement in FTS_SCHEMA:
+            cur.execute(statement)
 
-# ✅ ADD THIS FUNCTION
-def search(query):
-    """Search similar past questions from SQLite"""
+        # Backfill rows written before the mirror existed
+        if not existed:
+            cur.execute("INSERT INTO memory_fts(memory_fts) VALUES ('rebuild')")
+            logger.info("🧠 LTM full-text index built")
 
-    con = sqlite3.connect(DB_PATH)
-    cur = con.cursor()
+        FTS_ENABLED = True
+    except sqlite3.OperationalError as e:
+        logger.warning(f"⚠️ SQLite FTS5 unavailable, LTM search falls back to LIKE: {e}")
+        FTS_ENABLED = False
 
-    cur.execute("""
-        SELECT question, answer
-        FROM memory
-        WHERE question LIKE ?
-        ORDER BY rowid DESC
-        LIMIT 3
-    """, (f"%{query}%",))
 
-    results = cur.fetchall()
-    con.close()
+def save(entry, session_id: Optional[str] = None, embedding: Optional[np.ndarray] = None):
+    save_many([entry], session_id, None if embedding is None else [embedding])
+
+
+def save_many(
+    entries: Sequence[dict],
+    session_id: Optional[str] = None,
+    embeddings: Optional[Sequence[np.ndarray]] = None,
+    on_commit: Optional[Callable[[], None]] = None
+):
+    """
+    Queue entries for the background writer (grouped into one
+    transaction with other pending writes). on_commit runs once
+    they are committed.
+    """
+    rows = [
+        (
+            entry["id"], entry["question"], entry["answer"], session_id,
+            None if embeddings is None else np.asarray(embeddings[i], dtype="float32").tobytes()
+        )
+        for i, entry in enumerate(entries)
+    ]
+    _store()[1].submit(UPSERT_SQL, rows, on_commit)
+
+
+def load_embeddings(session_id: str) -> List[Tuple[str, str, np.ndarray]]:
+    """
+    (question, answer, embedding) for every embedded entry of a session.
+    """
+    with _store()[0].connection() as con:
+        rows = con.execute(
+            """
+            SELECT question, answer, embedding
+            FROM memory
+            WHERE session_id = ? AND embedding IS NOT NULL
+            ORDER BY rowid
+            """,
+            (session_id,)
+        ).fetchall()
+
+    return [(q, a, np.frombuffer(blob, dtype="float32")) for q, a, blob in rows]
+
+
+def _fts_query(text: str) -> str:
+    """
+    Every word must appear in the stored question (any order); words are
+    quoted so user text can never be parsed as FTS syntax.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return ""
+    return "question : (" + " ".join(f'"{w}"' for w in words) + ")"
+
+
+def search(query, session_id: str, limit: int = 3):
+    """Search similar past questions of ONE session from SQLite (BM25-ranked)"""
+
+    if FTS_ENABLED:
+        match = _fts_query(query)
+        if not match:
+            return []
+        sql = """
+            SELECT m.question, m.answer
+            FROM memory_fts
+            JOIN memory AS m ON m.rowid = memory_fts.rowid
+            WHERE memory_fts MATCH ? AND m.session_id = ?
+            ORDER BY rank
+            LIMIT ?
+        """
+        params = (match, session_id, limit)
+    else:
+        sql = """
+            SELECT question, answer
+            FROM memory
+            WHERE question LIKE ? AND session_id = ?
+            ORDER BY rowid DESC
+            LIMIT ?
+        """
+        params = (f"%{query}%", session_id, limit)
 
-    return results
+    with _store()[0].connection() as con:
+        return con.execute(sql, params).fetchall()
@@ -1,5 +1,8 @@
+import threading
+
 from memory.short_term import ShortTermMemory
-from memory.long_term import save, search
+from memory.long_term import save_many, search
+from memory.semantic import semantic_index, embed
 from typing import Optional, Dict
 from logger import get_logger
 logger = get_logger("MEMORY")
@@ -12,10 +15,15 @@ class MemoryManager:
     - Adds Active Entity Context (employee)
     - Context is short-term only
     - Overwritten when a new entity is detected
+
+    One instance per session (see memory/retrieval.py); every
+    method holds the per-session lock.
     """
 
-    def __init__(self):
+    def __init__(self, session_id: str = "default"):
+        self.session_id = session_id
         self.stm = ShortTermMemory(limit=20)
+        self.lock = threading.RLock()
 
         # 🧠 Active Entity Context (SHORT-TERM ONLY)
         self._active_entity: Dict[str, Optional[str]] = {
@@ -31,24 +39,50 @@ class MemoryManager:
         Add chat into STM.
         If STM overflows → flush into SQLite.
         """
-        flushed_entry = self.stm.add(question, answer)
+        with self.lock:
+            flushed_entry = self.stm.add(question, answer)
 
         if flushed_entry:
             logger.info("STM limit reached → flushing entry to SQLite LTM")
             print("⚡ STM full → flushing oldest chat into SQLite...")
-            save(flushed_entry)
+            self._persist([flushed_entry])
+
+    def _persist(self, entries):
+        """
+        Queue entries (with embeddings) for the batched SQLite writer;
+        this session's semantic index is extended once they commit.
+        """
+        if not entries:
+            return
+
+        try:
+            vectors = embed(e["question"] for e in entries)
+        except Exception as e:
+            logger.warning(f"⚠️ Memory embedding failed, saving without vectors: {e}")
+            vectors = None
+
+        on_commit = None
+        if vectors is not None:
+            pairs = [(e["question"], e["answer"]) for e in entries]
+            on_commit = lambda: semantic_index.add(self.session_id, vectors, pairs)
+
+        save_many(entries, self.session_id, vectors, on_commit)
 
     def retrieve(self, question):
         """
         Retrieve memory:
         1. STM first
-        2. SQLite LTM second
+        2. SQLite LTM second (FTS5, BM25-ranked)
+        3. Semantic LTM third (nearest past Q&A of this session)
         """
 
         # -------------------
         # Search STM
         # -------------------
-        for chat in reversed(self.stm.all()):
+        with self.lock:
+            stm_entries = self.stm.all()
+
+        for chat in reversed(stm_entries):
             if question.lower() in chat["question"].lower():
                 logger.info("🧠 Memory Hit (STM)")
                 return f"""
@@ -60,7 +94,7 @@ A: {chat['answer']}
         # -------------------
         # Search LTM
         # -------------------
-        results = search(question)
+        results = search(question, self.session_id)
 
         if results:
             logger.info("🧠 Memory Hit (LTM)")
@@ -69,6 +103,24 @@ A: {chat['answer']}
 🧠 Found in SQLite LTM:
 Q: {q}
 A: {a}
+"""
+
+        # -------------------
+        # Search semantic LTM (paraphrased repeats)
+        # -------------------
+        try:
+            match = semantic_index.nearest(self.session_id, question)
+        except Exception as e:
+            logger.warning(f"⚠️ Semantic memory lookup failed: {e}")
+            match = None
+
+        if match:
+            q, a, score = match
+            logger.info(f"🧠 Memory Hit (semantic LTM, similarity {score:.2f})")
+            return f"""
+🧠 Found similar question in LTM:
+Q: {q}
+A: {a}
 """
 
         return None
@@ -84,26 +136,41 @@ A: {a}
         """
         Set / overwrite the active employee context.
         """
-        if employeeid is not None:
-            self._active_entity["employeeid"] = employeeid
+        with self.lock:
+            if employeeid is not None:
+                self._active_entity["employeeid"] = employeeid
+
+            if employeename is not None:
+                self._active_entity["employeename"] = employeename
 
-        if employeename is not None:
-            self._active_entity["employeename"] = employeename
+            snapshot = dict(self._active_entity)
         
-        logger.info(f"🧠 Active Entity Updated: {self._active_entity}")
+        logger.info(f"🧠 Active Entity Updated: {snapshot}")
 
     def get_active_entity(self) -> Dict[str, Optional[str]]:
         """
         Get current active employee context.
         """
-        return dict(self._active_entity)
+        with self.lock:
+            return dict(self._active_entity)
 
     def clear_active_entity(self):
         """
         Explicitly clear entity context (defensive hook).
         """
-        self._active_entity = {
-            "employeeid": None,
-            "employeename": None
-        }
+        with self.lock:
+            self._active_entity = {
+                "employeeid": None,
+                "employeename": None
+            }
         logger.info("🧠 Active Entity Cleared")
+
+    def flush(self):
+        """
+        Move every STM entry into SQLite LTM (session eviction).
+        """
+        with self.lock:
+            entries = self.stm.all()
+            self.stm.buffer.clear()
+
+        self._persist(entries)
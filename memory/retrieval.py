@@ -1,29 +1,86 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
 from memory.manager import MemoryManager
+from logger import get_logger
+logger = get_logger("MEMORY")
+
+DEFAULT_SESSION = "default"
+MAX_SESSIONS = 1000
+
+
+# --------------------------------------------------
+# Session-scoped memory shards
+# --------------------------------------------------
+class SessionMemoryStore:
+    """
+    session_id → MemoryManager shard.
+
+    - One shard per session: STM + active entity never leak across users
+    - Store lock is held only for the O(1) dict lookup / LRU update
+    - Least-recently-used sessions are evicted past max_sessions
+      (their STM is flushed to SQLite LTM first)
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS):
+        self.max_sessions = max_sessions
+        self._shards: "OrderedDict[str, MemoryManager]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: Optional[str] = None) -> MemoryManager:
+        key = str(session_id) if session_id is not None else DEFAULT_SESSION
+        evicted = None
+
+        with self._lock:
+            shard = self._shards.get(key)
+            if shard is None:
+                shard = MemoryManager(session_id=key)
+                self._shards[key] = shard
+                if len(self._shards) > self.max_sessions:
+                    evicted = self._shards.popitem(last=False)
+            else:
+                self._shards.move_to_end(key)
+
+        if evicted:
+            logger.info(f"🧠 Session evicted (LRU): {evicted[0]}")
+            evicted[1].flush()
+
+        return shard
+
+    def __len__(self):
+        with self._lock:
+            return len(self._shards)
+
+
+sessions = SessionMemoryStore()
+
 
-memory = MemoryManager()
+def get_session_memory(session_id: Optional[str] = None) -> MemoryManager:
+    return sessions.get(session_id)
 
 
-def get_memory_context(question):
-    return memory.retrieve(question)
+def get_memory_context(question, session_id: Optional[str] = None):
+    return sessions.get(session_id).retrieve(question)
 
 
-def store_memory(question, answer):
-    memory.add_chat(question, answer)
+def store_memory(question, answer, session_id: Optional[str] = None):
+    sessions.get(session_id).add_chat(question, answer)
 
 
 # --------------------------------------------------
 # 🧠 Active Entity Context (FIX 8 + FIX 13)
 # --------------------------------------------------
-def set_active_entity(employeeid=None, employeename=None):
-    memory.set_active_entity(
+def set_active_entity(employeeid=None, employeename=None, session_id: Optional[str] = None):
+    sessions.get(session_id).set_active_entity(
         employeeid=employeeid,
         employeename=employeename
     )
 
 
-def get_active_entity():
-    return memory.get_active_entity()
+def get_active_entity(session_id: Optional[str] = None):
+    return sessions.get(session_id).get_active_entity()
 
 
-def clear_active_entity():
-    memory.clear_active_entity()
+def clear_active_entity(session_id: Optional[str] = None):
+    sessions.get(session_id).clear_active_entity()
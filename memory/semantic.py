@@ -0,0 +1,163 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from memory.long_term import load_embeddings
+from sql_pipeline.entity_index import employee_index
+from logger import get_logger
+logger = get_logger("MEMORY")
+
+# Cosine similarity a past question needs to count as "the same question"
+SEMANTIC_MATCH_THRESHOLD = 0.85
+
+# Nearest neighbours checked before giving up (identifier mismatches skip)
+SEMANTIC_CANDIDATES = 5
+
+# Loaded per-session partitions kept in RAM (rest reload lazily from SQLite)
+MAX_LOADED_PARTITIONS = 1000
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def embed(texts: Iterable[str]) -> np.ndarray:
+    """
+    L2-normalised MiniLM embeddings (inner product == cosine similarity).
+    Shares the RAG pipeline's model instance.
+    """
+    from rag_pipeline.vectore_store import embedder
+
+    vectors = np.asarray(embedder.encode(list(texts)), dtype="float32")
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def identifiers(text: str) -> FrozenSet[str]:
+    """
+    Numbers and known employee names. Embeddings barely separate
+    "salary of employee 101" from "… 102", so these must match exactly.
+    """
+    found = set(_NUMBER.findall(text))
+    name = employee_index.find_name_in_text(text)
+    if name:
+        found.add(name.lower())
+    return frozenset(found)
+
+
+class _Partition:
+    """
+    One session's flushed Q&A: flat inner-product index + entries by position.
+    A session without stored vectors gets an empty partition (index None),
+    so it is not re-queried from SQLite on every retrieve.
+    """
+
+    __slots__ = ("index", "entries", "lock")
+
+    def __init__(self, dimension: Optional[int]):
+        self.index = None if dimension is None else faiss.IndexFlatIP(dimension)
+        self.entries: List[Tuple[str, str]] = []
+        self.lock = threading.Lock()
+
+    def add(self, vectors: np.ndarray, entries: List[Tuple[str, str]]):
+        with self.lock:
+            self.index.add(vectors)
+            self.entries.extend(entries)
+
+
+class SemanticMemoryIndex:
+    """
+    Long-term memory embeddings, partitioned per session.
+
+    - partitions load lazily from SQLite on first use (sessions without
+      vectors are cached as empty until their next save commits)
+    - save() paths append new vectors incrementally (no rebuilds)
+    - least-recently-used partitions are dropped from RAM
+    """
+
+    def __init__(self, max_partitions: int = MAX_LOADED_PARTITIONS):
+        self.max_partitions = max_partitions
+        self._partitions: "OrderedDict[str, _Partition]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, session_id: str) -> Optional[_Partition]:
+        with self._lock:
+            partition = self._partitions.get(session_id)
+            if partition is not None:
+                self._partitions.move_to_end(session_id)
+            return partition
+
+    def _load(self, session_id: str, refresh: bool = False) -> _Partition:
+        """
+        Cached partition, or load it from SQLite (refresh=True always
+        reloads and replaces the cached one).
+        """
+        partition = None if refresh else self._get(session_id)
+        if partition is not None:
+            return partition
+
+        rows = load_embeddings(session_id)
+        if rows:
+            partition = _Partition(len(rows[0][2]))
+            partition.add(np.vstack([r[2] for r in rows]), [(q, a) for q, a, _ in rows])
+        else:
+            partition = _Partition(None)
+
+        with self._lock:
+            if refresh:
+                self._partitions[session_id] = partition
+            else:
+                # Another thread may have loaded it meanwhile
+                partition = self._partitions.setdefault(session_id, partition)
+            self._partitions.move_to_end(session_id)
+            while len(self._partitions) > self.max_partitions:
+                self._partitions.popitem(last=False)
+
+        if partition.index is not None:
+            logger.info(f"🧠 Semantic LTM partition loaded: {session_id} ({partition.index.ntotal} entries)")
+        return partition
+
+    def add(self, session_id: str, vectors: np.ndarray, entries: List[Tuple[str, str]]):
+        """
+        Call AFTER the entries are persisted: a partition that is not in
+        RAM yet (or was cached as empty) reloads them from SQLite instead.
+        """
+        partition = self._get(session_id)
+        if partition is None or partition.index is None:
+            self._load(session_id, refresh=True)
+            return
+        partition.add(vectors, entries)
+
+    def nearest(
+        self,
+        session_id: str,
+        question: str,
+        threshold: float = SEMANTIC_MATCH_THRESHOLD
+    ) -> Optional[Tuple[str, str, float]]:
+        """
+        (question, answer, similarity) of the closest past Q&A with the
+        same identifiers (numbers, employee names), or None.
+        """
+        partition = self._load(session_id)
+        if partition.index is None:
+            return None
+
+        query = embed([question])
+        wanted = identifiers(question)
+        with partition.lock:
+            scores, positions = partition.index.search(query, SEMANTIC_CANDIDATES)
+            candidates = [
+                (float(score), partition.entries[pos])
+                for score, pos in zip(scores[0], positions[0])
+                if pos >= 0 and score >= threshold
+            ]
+
+        for score, (q, a) in candidates:
+            if identifiers(q) == wanted:
+                return q, a, score
+        return None
+
+
+semantic_index = SemanticMemoryIndex()
@@ -0,0 +1,203 @@
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from logger import get_logger
+logger = get_logger("MEMORY_STORE")
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+POOL_SIZE = 4
+
+# Applied to every connection. WAL lets readers run while the single
+# writer commits; NORMAL fsyncs only at checkpoints (safe under WAL).
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",          # 16 MB page cache
+    "PRAGMA mmap_size = 67108864",         # 64 MB memory-mapped reads
+    "PRAGMA busy_timeout = 5000",
+)
+
+# sqlite3 keeps this many compiled statements per connection; every
+# query here is a constant string, so each one is prepared only once
+STATEMENT_CACHE = 64
+
+# Background writer: one transaction per batch
+WRITE_BATCH_SIZE = 64
+WRITE_FLUSH_INTERVAL = 0.05              # seconds to wait for a batch to fill
+
+
+def connect(path: str) -> sqlite3.Connection:
+    con = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        cached_statements=STATEMENT_CACHE,
+        isolation_level=None               # explicit BEGIN / COMMIT
+    )
+    for pragma in PRAGMAS:
+        con.execute(pragma)
+    return con
+
+
+# --------------------------------------------------
+# Read connection pool
+# --------------------------------------------------
+class ConnectionPool:
+    """
+    Fixed set of tuned connections handed out one caller at a time.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(connect(path))
+
+    @contextmanager
+    def connection(self):
+        con = self._idle.get()
+        try:
+            yield con
+        finally:
+            self._idle.put(con)
+
+
+# --------------------------------------------------
+# Batched background writer
+# --------------------------------------------------
+class _Job:
+    __slots__ = ("sql", "rows", "on_commit", "enqueued")
+
+    def __init__(self, sql, rows, on_commit):
+        self.sql = sql
+        self.rows = rows
+        self.on_commit = on_commit
+        self.enqueued = time.perf_counter()
+
+
+class BackgroundWriter:
+    """
+    Single writer thread: drains queued jobs into grouped transactions
+    (up to WRITE_BATCH_SIZE jobs per COMMIT, one SAVEPOINT per job).
+    on_commit callbacks run after the rows are durable, so readers can
+    rely on them.
+    """
+
+    def __init__(self, path: str, batch_size: int = WRITE_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self._queue: "queue.Queue[_Job]" = queue.Queue()
+        self._con = connect(path)
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "batches": 0,
+            "rows_written": 0,
+            "failed_batches": 0,
+            "failed_jobs": 0,
+            "last_batch_ms": 0.0,
+            "total_batch_ms": 0.0,
+            "last_write_latency_ms": 0.0,
+            "max_write_latency_ms": 0.0,
+        }
+
+        self._thread = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql: str, rows: Sequence[Tuple], on_commit: Optional[Callable[[], None]] = None):
+        self._queue.put(_Job(sql, list(rows), on_commit))
+
+    def flush(self):
+        """
+        Block until everything queued so far is committed.
+        """
+        self._queue.join()
+
+    def _next_batch(self) -> List[_Job]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + WRITE_FLUSH_INTERVAL
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            start = time.perf_counter()
+            committed = []
+            try:
+                self._con.execute("BEGIN IMMEDIATE")
+                for job in batch:
+                    if self._write(job):
+                        committed.append(job)
+                self._con.execute("COMMIT")
+                if committed:
+                    self._record(committed, start)
+            except Exception as e:
+                if self._con.in_transaction:
+                    self._con.execute("ROLLBACK")
+                with self._metrics_lock:
+                    self._metrics["failed_batches"] += 1
+                logger.error(f"❌ Memory write batch failed ({len(batch)} jobs): {e}")
+                committed = []
+
+            for job in committed:
+                if job.on_commit:
+                    try:
+                        job.on_commit()
+                    except Exception as e:
+                        logger.warning(f"⚠️ Memory on_commit hook failed: {e}")
+
+            # One task_done per dequeued job, committed or not
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, job: _Job) -> bool:
+        """
+        One job inside its own SAVEPOINT: a failing job is rolled back
+        alone and the rest of the batch still commits.
+        """
+        self._con.execute("SAVEPOINT job")
+        try:
+            self._con.executemany(job.sql, job.rows)
+        except sqlite3.Error as e:
+            self._con.execute("ROLLBACK TO job")
+            self._con.execute("RELEASE job")
+            with self._metrics_lock:
+                self._metrics["failed_jobs"] += 1
+            statement = " ".join(job.sql.split())[:80]
+            logger.error(f"❌ Memory write job dropped ({len(job.rows)} rows, {statement}): {e}")
+            return False
+        self._con.execute("RELEASE job")
+        return True
+
+    def _record(self, batch: List[_Job], start: float):
+        now = time.perf_counter()
+        latency = max(now - job.enqueued for job in batch) * 1000
+        with self._metrics_lock:
+            m = self._metrics
+            m["batches"] += 1
+            m["rows_written"] += sum(len(job.rows) for job in batch)
+            m["last_batch_ms"] = (now - start) * 1000
+            m["total_batch_ms"] += m["last_batch_ms"]
+            m["last_write_latency_ms"] = latency
+            m["max_write_latency_ms"] = max(m["max_write_latency_ms"], latency)
+
+    def metrics(self) -> Dict[str, float]:
+        with self._metrics_lock:
+            m = dict(self._metrics)
+        m["queue_depth"] = self._queue.qsize()
+        m["avg_batch_ms"] = m.pop("total_batch_ms") / m["batches"] if m["batches"] else 0.0
+        return m
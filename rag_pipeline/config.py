@@ -8,11 +8,21 @@ CHUNK_SIZE = 800
 CHUNK_OVERLAP = 200
 TOP_K = 20
 FINAL_TOP_K = 5
-SIMILARITY_THRESHOLD = 2.5
+# Candidates need at least this cosine similarity to the query.
+# Embeddings are L2-normalised and doc_index is IndexFlatL2, whose
+# range_search radius is the SQUARED distance: ||a - b||² = 2 - 2·cos.
+# (The old radius 2.5 meant cos ≥ -0.25, i.e. nearly the whole corpus.)
+MIN_COSINE_SIMILARITY = 0.30
+SIMILARITY_THRESHOLD = 2 * (1 - MIN_COSINE_SIMILARITY)
 HALLUCINATION_THRESHOLD = 0.65
 MAX_RETRIES = 2
 MIN_TOKEN_OVERLAP = 0.15
 
+# Adaptive retrieval depth
+MIN_CANDIDATES = FINAL_TOP_K          # never hand the reranker fewer than this (if available)
+CANDIDATE_DISTANCE_RATIO = 1.5        # keep chunks within best_distance * ratio
+RERANK_SKIP_GAP_RATIO = 0.35          # (d2 - d1) / d2 above this → top hit is unambiguous
+
 # Ollama
 OLLAMA_URL = "http://localhost:11434/api/generate"
 RAG_MODEL = "llama3:latest"
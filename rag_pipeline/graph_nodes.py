@@ -31,12 +31,20 @@ def intent_node(state):
 
 
 def retrieve_node(state):
+    # Chunks prefetched speculatively by the hybrid executor
+    if state.get("retrieved"):
+        logger.info(f"Using {len(state['retrieved'])} prefetched chunks")
+        return state
+
     chunks = retrieve_chunks(state["question"])
     logger.info(f"Retrieved {len(chunks)} chunks")
     return {**state, "retrieved": chunks}
 
 
 def rerank_node(state):
+    if state.get("reranked"):
+        return state
+
     reranked = rerank_chunks(state["question"], state["retrieved"])
     return {**state, "reranked": reranked}
 
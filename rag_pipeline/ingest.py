@@ -1,4 +1,5 @@
 import os
+import faiss
 import numpy as np
 import hashlib
 
@@ -11,6 +12,11 @@ from langchain_community.document_loaders import (
 
 from rag_pipeline.vectore_store import load_store, save_store, embedder
 from rag_pipeline.config import DATA_DIR, CHUNK_SIZE, CHUNK_OVERLAP
+from rag_pipeline.policy_facts import (
+    extract_policy_facts,
+    save_policy_facts,
+    POLICY_FACTS_PATH
+)
 
 
 # ======================================================
@@ -41,6 +47,15 @@ def load_document(file_path):
     raise ValueError(f"Unsupported file type: {file_path}")
 
 
+# ======================================================
+# Policy Facts Table (extracted at ingest time)
+# ======================================================
+def update_policy_facts(texts, metadata):
+    facts = extract_policy_facts(texts, metadata)
+    save_policy_facts(facts)
+    print(f"📌 Extracted {len(facts)} policy facts → {POLICY_FACTS_PATH}")
+
+
 # ======================================================
 # Main Ingestion Function
 # ======================================================
@@ -62,6 +77,9 @@ def ingest():
     new_files = [f for f in doc_files if f not in indexed_files]
 
     if not new_files:
+        # Backfill policy facts for stores indexed before facts existed
+        if texts and not os.path.exists(POLICY_FACTS_PATH):
+            update_policy_facts(texts, metadata)
         print("✅ No new documents to process")
         return
 
@@ -94,10 +112,12 @@ def ingest():
 
         # Embeddings
         print("🔹 Generating embeddings...")
-        new_embeddings = embedder.encode(new_texts, show_progress_bar=True)
+        new_embeddings = np.array(embedder.encode(new_texts, show_progress_bar=True), dtype="float32")
+        # Unit length, so the L2 radius in config maps to cosine similarity
+        faiss.normalize_L2(new_embeddings)
 
         # Add to FAISS
-        doc_index.add(np.array(new_embeddings))
+        doc_index.add(new_embeddings)
 
         texts.extend(new_texts)
         metadata.extend(new_meta)
@@ -110,5 +130,8 @@ def ingest():
     # Save everything
     save_store(doc_index, texts, metadata, indexed_files)
 
+    # Structured numeric policy facts (leave limits, notice, probation)
+    update_policy_facts(texts, metadata)
+
     print("✅ Index updated successfully!")
     print("Total indexed chunks:", len(texts))
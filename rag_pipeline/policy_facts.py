@@ -0,0 +1,149 @@
+import os
+import re
+import json
+from collections import Counter
+from typing import Dict, List, Optional
+
+from rag_pipeline.config import VECTOR_DIR
+
+POLICY_FACTS_PATH = os.path.join(VECTOR_DIR, "policy_facts.json")
+
+LEAVE_TYPES = [
+    "sick leave", "casual leave", "privilege leave", "earned leave",
+    "maternity leave", "paternity leave", "annual leave"
+]
+
+_NUM = r"(\d{1,3})"
+_DAYS = r"(?:\(\s*\w+\s*\)\s*)?(?:working\s+|calendar\s+)?days?"
+
+
+# --------------------------------------------------
+# Extraction patterns (numeric facts only)
+# --------------------------------------------------
+def _leave_patterns(leave_type: str):
+    leave = leave_type.replace(" ", r"s?\s+") + "s?"
+    return [
+        # "12 days of sick leave" / "12 days sick leave"
+        re.compile(rf"{_NUM}\s*{_DAYS}\s+(?:of\s+)?(?:paid\s+)?{leave}", re.IGNORECASE),
+        # "sick leave ... 12 days" (same sentence)
+        re.compile(rf"{leave}[^.\n]{{0,80}}?{_NUM}\s*{_DAYS}", re.IGNORECASE),
+    ]
+
+
+PERIOD_PATTERNS = {
+    "notice_period": re.compile(
+        rf"notice\s+period[^.\n]{{0,60}}?{_NUM}\s*(days?|months?|weeks?)", re.IGNORECASE
+    ),
+    "probation_period": re.compile(
+        rf"probation(?:ary)?\s*(?:period)?[^.\n]{{0,60}}?{_NUM}\s*(days?|months?|weeks?)", re.IGNORECASE
+    ),
+}
+
+
+def _unit(raw: str) -> str:
+    raw = raw.lower()
+    if raw.startswith("month"):
+        return "months"
+    if raw.startswith("week"):
+        return "weeks"
+    return "days"
+
+
+def extract_policy_facts(texts: List[str], metadata: List[Dict]) -> List[Dict]:
+    """
+    Scan chunk text for structured numeric policy facts.
+    """
+    facts = []
+
+    for text, meta in zip(texts, metadata):
+        source = meta.get("source", "Unknown")
+        page = meta.get("page", "?")
+
+        for leave_type in LEAVE_TYPES:
+            for pattern in _leave_patterns(leave_type):
+                match = pattern.search(text)
+                if match:
+                    value = int(match.group(1))
+                    if 1 <= value <= 365:
+                        facts.append({
+                            "fact": leave_type,
+                            "kind": "annual_limit",
+                            "value": value,
+                            "unit": "days",
+                            "source": source,
+                            "page": page,
+                            "snippet": match.group(0).strip()
+                        })
+                    break
+
+        for kind, pattern in PERIOD_PATTERNS.items():
+            match = pattern.search(text)
+            if match:
+                facts.append({
+                    "fact": kind.replace("_", " "),
+                    "kind": kind,
+                    "value": int(match.group(1)),
+                    "unit": _unit(match.group(2)),
+                    "source": source,
+                    "page": page,
+                    "snippet": match.group(0).strip()
+                })
+
+    return facts
+
+
+# --------------------------------------------------
+# Persistence
+# --------------------------------------------------
+def save_policy_facts(facts: List[Dict]):
+    os.makedirs(VECTOR_DIR, exist_ok=True)
+    with open(POLICY_FACTS_PATH, "w") as f:
+        json.dump(facts, f, indent=2)
+
+
+_cache = {"mtime": None, "facts": []}
+
+
+def load_policy_facts() -> List[Dict]:
+    """
+    Cached read; reloads automatically after ingestion rewrites the file.
+    """
+    if not os.path.exists(POLICY_FACTS_PATH):
+        return []
+
+    mtime = os.path.getmtime(POLICY_FACTS_PATH)
+    if _cache["mtime"] != mtime:
+        with open(POLICY_FACTS_PATH, "r") as f:
+            _cache["facts"] = json.load(f)
+        _cache["mtime"] = mtime
+
+    return _cache["facts"]
+
+
+def get_policy_fact(fact: str, kind: str = "annual_limit") -> Optional[Dict]:
+    """
+    Most frequently stated value across documents wins;
+    returns the first fact carrying that value (with source + page).
+    """
+    matches = [
+        f for f in load_policy_facts()
+        if f["fact"] == fact and f["kind"] == kind
+    ]
+    if not matches:
+        return None
+
+    best_value, _ = Counter(f["value"] for f in matches).most_common(1)[0]
+    return next(f for f in matches if f["value"] == best_value)
+
+
+def format_policy_fact(fact: Dict) -> str:
+    label = fact["fact"].capitalize()
+    if fact["kind"] == "annual_limit":
+        headline = f"{label} limit: {fact['value']} {fact['unit']} per year"
+    else:
+        headline = f"{label}: {fact['value']} {fact['unit']}"
+
+    return (
+        f"{headline} (Source: {fact['source']}, Page {fact['page']})\n"
+        f"\"{fact['snippet']}\""
+    )
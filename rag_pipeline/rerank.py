@@ -1,9 +1,34 @@
 from sentence_transformers import CrossEncoder
-from rag_pipeline.config import FINAL_TOP_K
+from rag_pipeline.config import FINAL_TOP_K, RERANK_SKIP_GAP_RATIO
+
+from logger import get_logger
+logger = get_logger("RAG_PIPELINE")
 
 reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
 
+
+def _is_unambiguous(chunks) -> bool:
+    """
+    Top hit is clearly ahead of the runner-up (or there is nothing to rank),
+    so the cross-encoder cannot change the answer.
+    """
+    if len(chunks) <= 1:
+        return True
+
+    d1 = chunks[0].get("distance")
+    d2 = chunks[1].get("distance")
+    if d1 is None or d2 is None or d2 <= 0:
+        return False
+
+    return (d2 - d1) / d2 >= RERANK_SKIP_GAP_RATIO
+
+
 def rerank_chunks(query, chunks):
+    if _is_unambiguous(chunks):
+        logger.info(f"Rerank skipped: unambiguous top candidates ({len(chunks)} chunks)")
+        return sorted(chunks, key=lambda x: x.get("distance", 0.0))[:FINAL_TOP_K]
+
+    logger.info(f"Reranking {len(chunks)} chunks")
     pairs = [(query, c["text"]) for c in chunks]
     scores = reranker.predict(pairs)
     for i,s in enumerate(scores):
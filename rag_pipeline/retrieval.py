@@ -1,19 +1,66 @@
+import faiss
 import numpy as np
-from rag_pipeline.config import TOP_K, SIMILARITY_THRESHOLD
+from rag_pipeline.config import (
+    TOP_K,
+    SIMILARITY_THRESHOLD,
+    MIN_CANDIDATES,
+    CANDIDATE_DISTANCE_RATIO
+)
 from rag_pipeline.vectore_store import load_store, embedder
 
+from logger import get_logger
+logger = get_logger("RAG_PIPELINE")
+
 doc_index, texts, metadata, _ = load_store()
 
+
+def _adaptive_cutoff(distances) -> int:
+    """
+    Size the candidate list from the distance distribution.
+
+    Keeps every chunk within CANDIDATE_DISTANCE_RATIO of the nearest
+    neighbour, clamped to [MIN_CANDIDATES, TOP_K].
+    """
+    if len(distances) == 0:
+        return 0
+
+    best = max(float(distances[0]), 1e-6)
+    limit = best * CANDIDATE_DISTANCE_RATIO
+
+    k = int(np.searchsorted(distances, limit, side="right"))
+    k = max(k, MIN_CANDIDATES)
+    return min(k, TOP_K, len(distances))
+
+
 def retrieve_chunks(query):
-    q_emb = embedder.encode([query])
-    distances, indices = doc_index.search(np.array(q_emb), TOP_K)
+    q_emb = np.array(embedder.encode([query]), dtype="float32")
+    # SIMILARITY_THRESHOLD assumes unit vectors (see config)
+    faiss.normalize_L2(q_emb)
+
+    # --------------------------------------------------
+    # Threshold search: only chunks under SIMILARITY_THRESHOLD
+    # (cos ≥ MIN_COSINE_SIMILARITY), at most TOP_K kept below
+    # --------------------------------------------------
+    lims, distances, indices = doc_index.range_search(q_emb, SIMILARITY_THRESHOLD)
+    distances = distances[lims[0]:lims[1]]
+    indices = indices[lims[0]:lims[1]]
+
+    order = np.argsort(distances)
+    distances = distances[order]
+    indices = indices[order]
+
+    k = _adaptive_cutoff(distances)
+
+    logger.info(
+        f"Adaptive retrieval: {len(distances)} within threshold, "
+        f"kept {k} (best={distances[0] if len(distances) else None})"
+    )
 
     results = []
-    for idx, dist in zip(indices[0], distances[0]):
-        if dist < SIMILARITY_THRESHOLD:
-            results.append({
-                "text": texts[idx],
-                "metadata": metadata[idx],
-                "distance": float(dist)
-            })
+    for idx, dist in zip(indices[:k], distances[:k]):
+        results.append({
+            "text": texts[idx],
+            "metadata": metadata[idx],
+            "distance": float(dist)
+        })
     return results
@@ -1,90 +1,79 @@
 import requests
+from typing import Set, Tuple
+
+from router.keywords import match_keywords
+from router.intent_model import predict_intent, INTENT_CONFIDENCE_THRESHOLD
+
+from logger import get_logger
+logger = get_logger("ROUTER")
+
+
+# Who settled the intent (logged by the router; see TRAINABLE_SOURCES)
+INTENT_SOURCES = ("rules", "model", "llm", "fallback", "human")
 
-# FIX 32: Policy keywords (RAG-only, highest priority)
-POLICY_KEYWORDS = {
-    "policy", "posh", "dress code", "leave policy",
-    "procedure", "procedures", "compliance", "rules", "regulations",
-    "guidelines", "harassment", "maternity", "privilege leave",
-    "casual leave", "sick leave policy", "annual leave",
-    "probation", "termination", "resignation", "notice period",
-    "code of conduct", "ethics", "prevention", "workplace"
-}
-
-# FIX 29: Employee data attributes (SQL-only, never RAG)
-EMPLOYEE_DATA_ATTRIBUTES = {
-    "salary", "monthly salary", "annual salary",
-    "joining date", "date of joining",
-    "work hours", "overtime", "overtime hours",
-    "employee id", "employeeid", "employee name", "employeename",
-    "manager", "manager code",
-    "years at company", "years in role", "years in current role",
-    "leave balance", "sick leaves", "sick leave",
-    "performance rating", "compliance risk"
-}
-
-# FIX 33: Aggregate keywords (SQL-only)
-AGGREGATE_KEYWORDS = {
-    "how many", "total number", "count of", "total employees",
-    "number of employees", "all employees", "total", "sum of",
-    "average", "exceeded"
-}
-
-# FIX 36: Ranking keywords (SQL-only, no RAG needed)
-RANKING_KEYWORDS = {
-    "highest", "lowest", "most", "least", "top", "bottom",
-    "maximum", "minimum", "best", "worst", "greatest", "smallest"
-}
 
 def llm_intent_classifier(question: str):
+    return classify_intent(question)[0]
+
+
+def classify_intent(question: str) -> Tuple[Set[str], str]:
+    """
+    (intents, source) where source is one of INTENT_SOURCES.
+    """
     
-    q_lower = question.lower()
+    hits = match_keywords(question)
     
     # --------------------------------------------------
     # FIX 32: Policy questions → RAG only (HIGHEST PRIORITY)
     # --------------------------------------------------
-    if any(kw in q_lower for kw in POLICY_KEYWORDS):
-        return {"rag"}
+    if hits.has("policy"):
+        return {"rag"}, "rules"
     
     # --------------------------------------------------
     # FIX 36: Ranking queries → SQL only
     # --------------------------------------------------
-    if any(kw in q_lower for kw in RANKING_KEYWORDS):
+    if hits.has("ranking"):
         # Ranking queries are pure analytics, no policy needed
-        return {"sql"}
+        return {"sql"}, "rules"
     
     # --------------------------------------------------
     # NEW: Remaining/Left/Balance queries → needs BOTH
     # --------------------------------------------------
     # Pattern: "how many sick leaves left for employee X"
     # Needs: policy limit (RAG) + employee data (SQL)
-    remaining_keywords = ["left", "remaining", "available", "balance"]
-    has_remaining = any(kw in q_lower for kw in remaining_keywords)
-    
-    if has_remaining and any(leave in q_lower for leave in ["leave", "leaves", "sick", "casual", "privilege"]):
+    if hits.has("remaining") and hits.has("leave_word"):
         # This needs policy limit AND employee data
-        return {"sql"}  # Will be caught by dependency detector as sql_depends_on_rag
+        return {"sql"}, "rules"  # Will be caught by dependency detector as sql_depends_on_rag
     
     # --------------------------------------------------
     # FIX 33: Aggregate queries → SQL only
     # --------------------------------------------------
-    if any(kw in q_lower for kw in AGGREGATE_KEYWORDS):
+    if hits.has("aggregate"):
         # If also mentions policy/documents → needs both
-        if "policy" in q_lower or "according to" in q_lower or "as per" in q_lower:
-            return {"rag", "sql"}
-        return {"sql"}
+        if hits.has("policy_reference"):
+            return {"rag", "sql"}, "rules"
+        return {"sql"}, "rules"
     
     # --------------------------------------------------
     # FIX 29: Employee data + entity → SQL only
     # --------------------------------------------------
-    has_employee_data = any(attr in q_lower for attr in EMPLOYEE_DATA_ATTRIBUTES)
-    has_entity_reference = any(
-        keyword in q_lower 
-        for keyword in ["priya", "rakesh", "shweta", "employee id", "id is", "whose id", "with id"]
-    )
+    has_employee_data = hits.has("employee_attribute")
+    has_entity_reference = hits.has("entity_reference")
     
     # Pure employee data lookup → SQL only
     if has_employee_data and has_entity_reference:
-        return {"sql"}
+        return {"sql"}, "rules"
+
+    # --------------------------------------------------
+    # Local trained classifier (LLM only on low confidence)
+    # --------------------------------------------------
+    prediction = predict_intent(question)
+    if prediction is not None:
+        label, confidence = prediction
+        if confidence >= INTENT_CONFIDENCE_THRESHOLD:
+            logger.info(f"Local intent model → {label} ({confidence:.2f})")
+            return ({"rag", "sql"} if label == "both" else {label}), "model"
+        logger.info(f"Local intent model low confidence ({label}, {confidence:.2f}) → LLM fallback")
 
     # --------------------------------------------------
     # LLM classification fallback
@@ -135,9 +124,9 @@ Label:
 
     if label not in {"greet", "rag", "sql", "both"}:
         # Defensive fallback
-        return {"sql"}
+        return {"sql"}, "fallback"
 
     if label == "both":
-        return {"rag", "sql"}
+        return {"rag", "sql"}, "llm"
 
-    return {label}
+    return {label}, "llm"
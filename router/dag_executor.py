@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+from logger import get_logger
+logger = get_logger("ROUTER")
+
+
+# name → (fn, dependency names); fn receives {dep_name: dep_result}
+Tasks = Dict[str, Tuple[Callable[[Dict[str, Any]], Any], Iterable[str]]]
+
+
+def _timed(fn, inputs):
+    start = time.perf_counter()
+    result = fn(inputs)
+    return result, time.perf_counter() - start
+
+
+def run_dag(tasks: Tasks, max_workers: int = 4) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Minimal DAG executor for the hybrid pipelines.
+
+    - Tasks without a data dependency run in parallel
+    - A task starts as soon as all of its dependencies are done
+    - Returns (results, timings in seconds), both keyed by task name
+    - The first task error is re-raised
+    """
+    deps = {name: set(d) for name, (_, d) in tasks.items()}
+    for name, d in deps.items():
+        unknown = d - tasks.keys()
+        if unknown:
+            raise ValueError(f"❌ Task '{name}' depends on unknown task(s): {unknown}")
+
+    results: Dict[str, Any] = {}
+    timings: Dict[str, float] = {}
+    pending = dict(deps)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            ready = [n for n, d in pending.items() if d <= results.keys()]
+            for name in ready:
+                fn, _ = tasks[name]
+                inputs = {d: results[d] for d in pending.pop(name)}
+                running[pool.submit(_timed, fn, inputs)] = name
+
+            if not running:
+                raise ValueError(f"❌ Dependency cycle between tasks: {list(pending)}")
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name], timings[name] = future.result()
+                logger.info(f"⏱️ Branch '{name}' finished in {timings[name]:.3f}s")
+
+    return results, timings
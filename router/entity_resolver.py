@@ -2,6 +2,7 @@ import re
 from typing import Dict, Optional, Tuple
 
 from memory.retrieval import set_active_entity, get_active_entity
+from sql_pipeline.entity_index import employee_index
 
 
 # --------------------------------------------------
@@ -91,10 +92,61 @@ def _is_valid_employee_name(name: str) -> bool:
     return True
 
 
+# --------------------------------------------------
+# Pure extraction (no memory side effects)
+# --------------------------------------------------
+def extract_entity(question: str) -> Dict[str, Optional[str]]:
+    """
+    Extract employeeid / employeename from the question text only.
+    Does NOT touch the Active Entity Context.
+    """
+    extracted: Dict[str, Optional[str]] = {
+        "employeeid": None,
+        "employeename": None
+    }
+
+    id_match = EMP_ID_PATTERN.search(question)
+    if id_match:
+        extracted["employeeid"] = id_match.group(1)
+
+    # FIX 20: with validation
+    candidate_name = None
+    name_match = EMP_NAME_PATTERN.search(question)
+    if name_match:
+        candidate_name = f"{name_match.group(1)} {name_match.group(2)}"
+        if not _is_valid_employee_name(candidate_name):
+            candidate_name = None
+
+    if not employee_index.loaded:
+        # No employee data loaded → heuristics only
+        extracted["employeename"] = candidate_name
+        return extracted
+
+    # --------------------------------------------------
+    # Validate against the real employee table
+    # --------------------------------------------------
+    if candidate_name:
+        canonical = employee_index.canonical_name(candidate_name)
+        if canonical is None:
+            fuzzy = employee_index.fuzzy_candidates(candidate_name, limit=1)
+            canonical = employee_index.canonical_name(fuzzy[0]) if fuzzy else None
+        # Unknown but explicit name stays on the question: dropping it
+        # would let route_node inherit the PREVIOUS employee instead
+        extracted["employeename"] = canonical or candidate_name
+    else:
+        # Lower-case / unusual casing names the regex cannot see
+        extracted["employeename"] = employee_index.find_name_in_text(question)
+
+    return extracted
+
+
 # --------------------------------------------------
 # Main Resolver
 # --------------------------------------------------
-def resolve_entity(question: str) -> Tuple[Dict[str, Optional[str]], str]:
+def resolve_entity(
+    question: str,
+    session_id: Optional[str] = None
+) -> Tuple[Dict[str, Optional[str]], str]:
     """
     FIX 9 + FIX 10 + FIX 14
 
@@ -103,12 +155,9 @@ def resolve_entity(question: str) -> Tuple[Dict[str, Optional[str]], str]:
     - Update Active Entity Context
     - Resolve pronouns deterministically
     - BLOCK underspecified questions early
-    """
 
-    resolved: Dict[str, Optional[str]] = {
-        "employeeid": None,
-        "employeename": None
-    }
+    Active entity context is scoped to session_id.
+    """
 
     sanitized_question = question.strip()
 
@@ -116,7 +165,7 @@ def resolve_entity(question: str) -> Tuple[Dict[str, Optional[str]], str]:
     # 🛑 FIX 14 — Underspecified question guard
     # --------------------------------------------------
     if EMPTY_ENTITY_PATTERN.match(sanitized_question):
-        active_entity = get_active_entity()
+        active_entity = get_active_entity(session_id)
         if not active_entity or (
             not active_entity.get("employeeid")
             and not active_entity.get("employeename")
@@ -127,26 +176,9 @@ def resolve_entity(question: str) -> Tuple[Dict[str, Optional[str]], str]:
             )
 
     # --------------------------------------------------
-    # 1️⃣ Extract employee ID
-    # --------------------------------------------------
-    id_match = EMP_ID_PATTERN.search(sanitized_question)
-    if id_match:
-        resolved["employeeid"] = id_match.group(1)
-
-    # --------------------------------------------------
-    # 2️⃣ Extract employee NAME (FIX 20: with validation)
+    # 1️⃣ + 2️⃣ Extract employee ID / NAME (FIX 20: with validation)
     # --------------------------------------------------
-    name_match = EMP_NAME_PATTERN.search(sanitized_question)
-    if name_match:
-        candidate_name = f"{name_match.group(1)} {name_match.group(2)}"
-        
-        # FIX 20: Validate before accepting
-        if _is_valid_employee_name(candidate_name):
-            resolved["employeename"] = candidate_name
-        else:
-            # Reject company names silently
-            pass
-
+    resolved = extract_entity(sanitized_question)
 
     # --------------------------------------------------
     # 3️⃣ Update Active Entity Context
@@ -154,7 +186,8 @@ def resolve_entity(question: str) -> Tuple[Dict[str, Optional[str]], str]:
     if resolved["employeeid"] or resolved["employeename"]:
         set_active_entity(
             employeeid=resolved["employeeid"],
-            employeename=resolved["employeename"]
+            employeename=resolved["employeename"],
+            session_id=session_id
         )
 
     # --------------------------------------------------
@@ -162,7 +195,7 @@ def resolve_entity(question: str) -> Tuple[Dict[str, Optional[str]], str]:
     # --------------------------------------------------
     pronoun_match = PRONOUN_PATTERN.search(sanitized_question)
     if pronoun_match:
-        active_entity = get_active_entity()
+        active_entity = get_active_entity(session_id)
 
         if not active_entity or (
             not active_entity.get("employeeid")
@@ -1,16 +1,17 @@
-from typing import TypedDict, Set, Optional, Dict, List, Any
+from typing import TypedDict, Set, Optional, Dict, List, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
 from langgraph.graph import StateGraph, END
 
-from router.rules import rule_based_intent
-from router.classifier import llm_intent_classifier
-from router.dependency import detect_dependency
+from router.classifier import classify_intent
 from router.question_splitter import split_multi_part_question
 from router.entity_resolver import resolve_entity
+from router.query_plan import analyze_question, QueryPlan
 
 from memory.retrieval import (
     get_memory_context,
     store_memory,
-    get_active_entity
+    get_active_entity,
+    set_active_entity
 )
 
 from router.hybrid_executor import (
@@ -22,6 +23,9 @@ from router.hybrid_executor import (
 from logger import get_logger
 logger = get_logger("ROUTER")
 
+# Upper bound on sub-questions executed at the same time
+MAX_SUBQUESTION_WORKERS = 4
+
 
 # -----------------------------
 # Router State
@@ -31,6 +35,8 @@ class RouterState(TypedDict):
     intents: Set[str]
     user: Optional[Dict]
     final: str
+    timings: List[Dict[str, float]]
+    session_id: Optional[str]
 
 
 # -----------------------------
@@ -39,19 +45,21 @@ class RouterState(TypedDict):
 def detect_intent_node(state):
     question = state["question"]
 
-    # Step 1: Rule-based intent detection
-    intents = rule_based_intent(question)
+    # Step 1: Rule-based intent detection (single analysis, cached for route_node)
+    intents = set(analyze_question(question).rule_intents)
+    source = "rules"
 
     if intents != {"unknown"}:
         print(f"\n🟢 Intent decided by RULES → {intents}")
 
-    # Step 2: If unclear, fallback to LLM classifier
+    # Step 2: If unclear, fallback to classifier (keywords → local model → LLM)
     if intents == {"unknown"}:
-        intents = llm_intent_classifier(question)
-        print(f"\n🔵 Intent decided by LLM → {intents}")
+        intents, source = classify_intent(question)
+        print(f"\n🔵 Intent decided by {source.upper()} → {intents}")
     
     logger.info(f"Detecting intent for: {question}")
-    logger.info(f"Intent decided: {intents}")
+    # source= lets the intent model train only on LLM / human labels
+    logger.info(f"Intent decided: {intents} source={source}")
     
     return {
         **state,
@@ -60,28 +68,65 @@ def detect_intent_node(state):
     }
 
 
+# -----------------------------
+# Sub-question scheduler
+# -----------------------------
+def _execute_plan(enriched_q: str, plan: QueryPlan, intents: Set[str], user):
+    """
+    Returns (answer, per-branch timings in seconds).
+    """
+    timings: Dict[str, float] = {}
+    if plan.dependency == "sql_depends_on_rag":
+        answer = sql_depends_on_rag(enriched_q, user, timings=timings, plan=plan)
+    elif plan.dependency == "rag_depends_on_sql":
+        answer = rag_depends_on_sql(enriched_q, user, timings=timings, plan=plan)
+    else:
+        answer = independent_run(enriched_q, intents, user, timings=timings, plan=plan)
+    return answer, timings
+
+
+def _run_planned_questions(plans: List[Tuple[str, QueryPlan, Set[str]]], user) -> List[Tuple[str, Dict[str, float]]]:
+    """
+    Runs independent sub-questions on a bounded pool.
+    Results come back in planning order, so output order never
+    depends on which pipeline finishes first.
+    """
+    if len(plans) <= 1:
+        return [_execute_plan(q, plan, intents, user) for q, plan, intents in plans]
+
+    workers = min(MAX_SUBQUESTION_WORKERS, len(plans))
+    logger.info(f"Running {len(plans)} sub-questions on {workers} workers")
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_execute_plan, q, plan, intents, user)
+            for q, plan, intents in plans
+        ]
+        return [f.result() for f in futures]
+
+
 # -----------------------------
 # Routing Node (FIX 15 ACTIVE)
 # -----------------------------
 def route_node(state):
 
     user = state.get("user")
+    session_id = state.get("session_id")
 
     # --------------------------------------------------
     # 🧠 Entity resolution FIRST
     # --------------------------------------------------
     try:
-        resolved_entity, sanitized_question = resolve_entity(state["question"])
+        resolved_entity, sanitized_question = resolve_entity(state["question"], session_id)
     except ValueError as e:
         return {**state, "final": str(e)}
 
-    active_entity = get_active_entity()
+    active_entity = get_active_entity(session_id)
     if resolved_entity["employeeid"] or resolved_entity["employeename"]:
         print(f"🧠 Active Entity → {active_entity}")
 
     # 👋 Greeting shortcut (safe, entity-agnostic)
-    rule_intents = rule_based_intent(sanitized_question)
-    if "greet" in rule_intents:
+    if "greet" in analyze_question(sanitized_question).rule_intents:
         return {**state, "final": "Hello! How can I help you today?"}
 
     # --------------------------------------------------
@@ -89,82 +134,36 @@ def route_node(state):
     # --------------------------------------------------
     planned_questions: List[str] = split_multi_part_question(sanitized_question)
 
-    outputs: List[str] = []
+    # --------------------------------------------------
+    # 2️⃣ Plan every sub-question IN ORDER (entity context is
+    #    resolved deterministically before anything runs)
+    # --------------------------------------------------
+    plans: List[Tuple[str, QueryPlan, Set[str]]] = []
 
     for idx, sub_q in enumerate(planned_questions, start=1):
 
-        print(f"\n🔹 Processing planned question {idx}: {sub_q}")
-
-        # --------------------------------------------------
-        # 🧠 FIX 19 + FIX 25 — Global Query Detection (CRITICAL)
-        # --------------------------------------------------
-        def _is_global_query(q: str) -> bool:
-            """
-            Detect if question requires GLOBAL dataset (no entity scoping).
-            
-            FIX 19: Aggregates (how many, count, total)
-            FIX 25: Rankings (highest, lowest, most, top)
-            FIX 32: Policy questions (policy, posh, dress code)
-            NEW FIX: "Remaining/Left" calculations for specific employees are NOT global
-            
-            These should NEVER inherit entity context.
-            """
-            q_lower = q.lower()
-            
-            # NEW: Detect "remaining/left" calculation queries (NOT global)
-            # These ask "how many X left for [employee]" - specific, not global
-            remaining_patterns = [
-                "left for", "remaining for", "available for",
-                "how many" and ("left" in q_lower or "remaining" in q_lower)
-            ]
-            
-            # Check if this is a remaining/left calculation for a specific employee
-            has_remaining_pattern = any(pattern in q_lower for pattern in ["left", "remaining", "available"])
-            has_specific_entity = any(pattern in q_lower for pattern in ["for", "whose", "with id"])
-            
-            # If asking about remaining/left for a specific employee → NOT global
-            if has_remaining_pattern and has_specific_entity:
-                return False
-            
-            # FIX 19: Aggregate keywords
-            aggregate_keywords = [
-                "how many", "total number", "count", "all employees",
-                "total employees", "number of employees", "sum of",
-                "average", "total", "exceeded", "who all"
-            ]
-            
-            # FIX 25: Ranking keywords
-            ranking_keywords = [
-                "highest", "lowest", "most", "least", "top", "bottom",
-                "maximum", "minimum", "max", "min", "best", "worst",
-                "largest", "smallest", "greatest"
-            ]
-            
-            # FIX 32: Policy keywords
-            policy_keywords = [
-                "policy", "posh", "dress code", "procedure", "rules",
-                "regulations", "guidelines", "harassment", "code of conduct"
-            ]
-            
-            is_aggregate = any(kw in q_lower for kw in aggregate_keywords)
-            is_ranking = any(kw in q_lower for kw in ranking_keywords)
-            is_policy = any(kw in q_lower for kw in policy_keywords)
-            
-            return is_aggregate or is_ranking or is_policy
+        print(f"\n🔹 Planning question {idx}: {sub_q}")
 
         # --------------------------------------------------
         # 🧠 FIX 13 — Entity inheritance (with FIX 19 + FIX 25 guards)
         # --------------------------------------------------
-        sub_entity, _ = resolve_entity(sub_q)
-        active_entity = get_active_entity()
+        sub_plan = analyze_question(sub_q)
+
+        # Sub-questions naming an employee move the context, in order
+        if sub_plan.has_entity:
+            set_active_entity(
+                employeeid=sub_plan.employeeid,
+                employeename=sub_plan.employeename,
+                session_id=session_id
+            )
+        active_entity = get_active_entity(session_id)
 
         # FIX 19 + FIX 25: NEVER inherit entity for global queries
-        is_global = _is_global_query(sub_q)
+        is_global = sub_plan.is_global
         
         if (
             not is_global
-            and not sub_entity["employeeid"]
-            and not sub_entity["employeename"]
+            and not sub_plan.has_entity
             and active_entity
         ):
             if active_entity.get("employeeid"):
@@ -187,7 +186,7 @@ def route_node(state):
         # --------------------------------------------------
         enriched_q = sub_q
         if intents == {"rag"}:
-            memory_context = get_memory_context(sub_q)
+            memory_context = get_memory_context(sub_q, session_id)
             if memory_context:
                 enriched_q = f"""
 Previous Conversation Memory:
@@ -198,30 +197,27 @@ Now answer:
 """
 
         # --------------------------------------------------
-        # Dependency detection
+        # Dependency detection (plan of the entity-scoped question)
         # --------------------------------------------------
-        dependency = detect_dependency(sub_q)
-        print(f"⚡ Dependency detected → {dependency}")
+        exec_plan = analyze_question(sub_q)
+        print(f"⚡ Dependency detected → {exec_plan.dependency}")
 
-        # --------------------------------------------------
-        # Execute pipeline
-        # --------------------------------------------------
-        if dependency == "sql_depends_on_rag":
-            answer = sql_depends_on_rag(enriched_q, user)
-        elif dependency == "rag_depends_on_sql":
-            answer = rag_depends_on_sql(enriched_q, user)
-        else:
-            answer = independent_run(enriched_q, intents, user)
+        plans.append((enriched_q, exec_plan, intents))
 
-        outputs.append(answer)
+    # --------------------------------------------------
+    # 3️⃣ Execute sub-questions concurrently (order preserved)
+    # --------------------------------------------------
+    results = _run_planned_questions(plans, user)
+    outputs = [answer for answer, _ in results]
+    timings = [branch_timings for _, branch_timings in results]
 
     final_answer = "\n\n".join(outputs)
 
     # Store memory only if meaningful
     if final_answer and "❌" not in final_answer and "Hello" not in final_answer:
-        store_memory(state["question"], final_answer)
+        store_memory(state["question"], final_answer, session_id)
 
-    return {**state, "final": final_answer}
+    return {**state, "final": final_answer, "timings": timings}
 
 
 # -----------------------------
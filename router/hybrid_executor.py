@@ -1,17 +1,28 @@
 from rag_pipeline.app import app as rag_app
+from rag_pipeline.retrieval import retrieve_chunks
+from rag_pipeline.rerank import rerank_chunks
 from sql_pipeline.agent import analytical_agent
+from sql_pipeline.entity_index import employee_index
+from rag_pipeline.policy_facts import get_policy_fact, format_policy_fact
+from router.query_plan import analyze_question, QueryPlan
+from router.dag_executor import run_dag
 import re
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List
 
 
 # -----------------------------
 # Run RAG Pipeline
 # -----------------------------
-def run_rag(question: str) -> str:
+def run_rag(question: str, prefetched: Optional[List[Dict]] = None) -> str:
+    """
+    prefetched: already retrieved + reranked chunks (speculative
+    retrieval). When given, the RAG graph skips retrieve/rerank.
+    """
     rag_state = rag_app.invoke({
         "question": question,
-        "retrieved": [],
-        "reranked": [],
+        "retrieved": prefetched or [],
+        "reranked": prefetched or [],
         "categories": {
             "mandatory": [],
             "restriction": [],
@@ -29,19 +40,28 @@ def run_rag(question: str) -> str:
     return rag_state.get("final", rag_state.get("answer", "No response"))
 
 
+def prefetch_rag_context(question: str) -> List[Dict]:
+    """
+    Retrieval + rerank only — safe to start before upstream steps finish.
+    """
+    return rerank_chunks(question, retrieve_chunks(question))
+
+
 # -----------------------------
 # Run SQL Pipeline (RBAC enforced)
 # -----------------------------
 def run_sql(
     question: str,
     user: dict,
-    policy_constraints: Optional[Dict[str, Any]] = None
+    policy_constraints: Optional[Dict[str, Any]] = None,
+    plan: Optional[QueryPlan] = None
 ):
     """
     NOTE:
     - policy_constraints are OPTIONAL
     - Fix 1 only transports them safely
     - Fix 5 will enforce them
+    - plan: QueryPlan from the router (avoids re-analysing the question)
     """
 
     if user is None:
@@ -50,14 +70,20 @@ def run_sql(
     return analytical_agent(
         question=question,
         user=user,
-        policy_constraints=policy_constraints
+        policy_constraints=policy_constraints,
+        plan=plan
     )
 
 
 # -----------------------------
 # Dependency Execution
 # -----------------------------
-def sql_depends_on_rag(question: str, user: dict):
+def sql_depends_on_rag(
+    question: str,
+    user: dict,
+    timings: Optional[Dict[str, float]] = None,
+    plan: Optional[QueryPlan] = None
+):
     """
     FIX 1 + FIX 23 + NEW: Remaining Leaves Calculation
     
@@ -72,39 +98,47 @@ def sql_depends_on_rag(question: str, user: dict):
     - SQL never invents thresholds
     """
     
-    q_lower = question.lower()
+    plan = plan or analyze_question(question)
     
     # ========================================
     # NEW: Detect "remaining/left" calculation pattern
     # ========================================
-    is_remaining_query = any(kw in q_lower for kw in ["left", "remaining", "available", "balance"])
-    is_exceeded_query = any(kw in q_lower for kw in ["exceeded", "more than allowed", "above allowed"])
+    is_remaining_query = plan.is_remaining
+    is_exceeded_query = plan.is_exceeded
     
     # ========================================
-    # Enhanced RAG query for better retrieval
+    # 0️⃣ Precomputed policy facts (no LLM on the hot path)
     # ========================================
-    enhanced_question = question
+    fact = get_policy_fact(plan.leave_type or "sick leave")
     
-    if any(kw in q_lower for kw in ["sick leave", "sick days", "casual leave", "privilege leave", "leave"]):
-        leave_type = None
-        if "sick" in q_lower:
-            leave_type = "sick leave"
-        elif "casual" in q_lower:
-            leave_type = "casual leave"
-        elif "privilege" in q_lower:
-            leave_type = "privilege leave"
+    if fact is not None:
+        rag_answer = format_policy_fact(fact)
+        policy_value = fact["value"]
+        if timings is not None:
+            timings["rag"] = 0.0
+    else:
+        # ========================================
+        # Enhanced RAG query for better retrieval
+        # ========================================
+        enhanced_question = question
         
-        enhanced_question = (
-            f"{question}\n\n"
-            f"Context: Looking for {leave_type or 'leave'} policy, maximum allowed {leave_type or 'leave'} days, "
-            f"or {leave_type or 'leave'} limit per year."
-        )
-    
-    # 1️⃣ Run RAG to get policy limit
-    rag_answer = run_rag(enhanced_question)
-    
-    # 2️⃣ Extract numeric policy value
-    policy_value = extract_numeric_policy_value(rag_answer)
+        if plan.keywords.has("leave_mention"):
+            leave_type = plan.leave_type
+            
+            enhanced_question = (
+                f"{question}\n\n"
+                f"Context: Looking for {leave_type or 'leave'} policy, maximum allowed {leave_type or 'leave'} days, "
+                f"or {leave_type or 'leave'} limit per year."
+            )
+        
+        # 1️⃣ Run RAG to get policy limit
+        start = time.perf_counter()
+        rag_answer = run_rag(enhanced_question)
+        if timings is not None:
+            timings["rag"] = time.perf_counter() - start
+        
+        # 2️⃣ Extract numeric policy value
+        policy_value = extract_numeric_policy_value(rag_answer)
     
     if policy_value is None:
         return (
@@ -120,33 +154,25 @@ def sql_depends_on_rag(question: str, user: dict):
         # This needs: policy_limit - employee_used = remaining
         # Example: "how many sick leaves left for Ashish Das whose id is 2002?"
         
-        # Extract employee info from question
-        import re
-        emp_id_match = re.search(r'\b(?:id|employee\s*id)\s*(?:is|=)?\s*(\d+)', q_lower)
-        emp_name_match = re.search(r'\b([A-Z][a-z]+\s+[A-Z][a-z]+)\b', question)
-        
-        if not emp_id_match and not emp_name_match:
+        # Employee info comes from the QueryPlan
+        if not plan.has_entity:
             return "❌ Please specify which employee you're asking about."
         
-        # Build SQL to get employee's used leaves
-        from sql_pipeline.database import con
-        
-        if emp_id_match:
-            emp_id = emp_id_match.group(1)
-            sql = f"SELECT employeeid, employeename, sickleaveslastyear FROM employee WHERE employeeid = {emp_id}"
-        else:
-            emp_name = emp_name_match.group(1)
-            sql = f"SELECT employeeid, employeename, sickleaveslastyear FROM employee WHERE employeename = '{emp_name}'"
+        # Single-employee fetch from the in-memory entity index
+        columns = ["employeeid", "employeename", "sickleaveslastyear"]
         
         try:
-            df = con.execute(sql).fetchdf()
+            if plan.employeeid:
+                row = employee_index.get_by_id(plan.employeeid, columns)
+            else:
+                row = employee_index.get_by_name(plan.employeename, columns)
             
-            if df.empty:
+            if row is None:
                 return "❌ Employee not found in database."
             
-            emp_id = df.iloc[0]['employeeid']
-            emp_name = df.iloc[0]['employeename']
-            used_leaves = int(df.iloc[0]['sickleaveslastyear'])
+            emp_id = row['employeeid']
+            emp_name = row['employeename']
+            used_leaves = int(row['sickleaveslastyear'])
             remaining_leaves = policy_value - used_leaves
             
             return (
@@ -175,11 +201,15 @@ def sql_depends_on_rag(question: str, user: dict):
     }
     
     # 4️⃣ Execute SQL with structured constraints
+    start = time.perf_counter()
     sql_answer = run_sql(
         question=question,
         user=user,
-        policy_constraints=policy_constraints
+        policy_constraints=policy_constraints,
+        plan=plan
     )
+    if timings is not None:
+        timings["sql"] = time.perf_counter() - start
     
     # 5️⃣ Strict separation of responsibility
     return (
@@ -190,39 +220,75 @@ def sql_depends_on_rag(question: str, user: dict):
     )
 
 
-def rag_depends_on_sql(question: str, user: dict):
+def rag_depends_on_sql(
+    question: str,
+    user: dict,
+    timings: Optional[Dict[str, float]] = None,
+    plan: Optional[QueryPlan] = None
+):
     """
     SQL → RAG
-    (unchanged in Fix 1)
-    """
 
-    sql_answer = run_sql(question, user)
+    Retrieval + rerank only need the question, so they start
+    speculatively while SQL runs; generation waits for both.
+    """
 
-    combined_question = f"""
+    def _generate(inputs):
+        combined_question = f"""
 Employee Data Result:
-{sql_answer}
+{inputs["sql"]}
 
 Now answer using policy documents:
 {question}
 """
+        return run_rag(combined_question, prefetched=inputs["retrieve"])
 
-    rag_answer = run_rag(combined_question)
+    results, branch_timings = run_dag({
+        "sql": (lambda _: run_sql(question, user, plan=plan), []),
+        "retrieve": (lambda _: prefetch_rag_context(question), []),
+        "rag": (_generate, ["sql", "retrieve"]),
+    })
 
-    return f"{sql_answer}\n\n📘 Policy Explanation:\n{rag_answer}"
+    if timings is not None:
+        timings.update(branch_timings)
+
+    return f"{results['sql']}\n\n📘 Policy Explanation:\n{results['rag']}"
 
 
 # -----------------------------
 # Independent Execution
 # -----------------------------
-def independent_run(question: str, intents: set, user: dict):
+def independent_run(
+    question: str,
+    intents: set,
+    user: dict,
+    timings: Optional[Dict[str, float]] = None,
+    plan: Optional[QueryPlan] = None
+):
+    """
+    RAG and SQL share no data → both branches run in parallel.
+    """
 
-    outputs = []
+    tasks = {}
 
     if "rag" in intents:
-        outputs.append("📘 Policy Answer:\n" + run_rag(question))
+        tasks["rag"] = (lambda _: run_rag(question), [])
 
     if "sql" in intents:
-        outputs.append("📊 Data Answer:\n" + run_sql(question, user))
+        tasks["sql"] = (lambda _: run_sql(question, user, plan=plan), [])
+
+    results, branch_timings = run_dag(tasks)
+
+    if timings is not None:
+        timings.update(branch_timings)
+
+    outputs = []
+
+    if "rag" in results:
+        outputs.append("📘 Policy Answer:\n" + results["rag"])
+
+    if "sql" in results:
+        outputs.append("📊 Data Answer:\n" + results["sql"])
 
     return "\n\n".join(outputs)
 
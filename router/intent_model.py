@@ -0,0 +1,231 @@
+import os
+import re
+import ast
+import time
+import argparse
+from typing import List, Optional, Tuple
+
+import joblib
+
+from logger import get_logger, APP_LOG_PATH
+logger = get_logger("ROUTER")
+
+
+# --------------------------------------------------
+# Local intent classifier (replaces the qwen fallback)
+# --------------------------------------------------
+INTENT_MODEL_PATH = "./model/intent_clf.pkl"
+INTENT_CONFIDENCE_THRESHOLD = 0.70
+
+LABELS = ("greet", "rag", "sql", "both")
+
+# Hand-labelled seed examples (same spirit as the LLM prompt examples)
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("hi", "greet"),
+    ("hello", "greet"),
+    ("hey there", "greet"),
+    ("good morning", "greet"),
+    ("good evening", "greet"),
+    ("thanks", "greet"),
+    ("thank you for the help", "greet"),
+    ("What is posh policy?", "rag"),
+    ("What is dress code?", "rag"),
+    ("What is leave policy?", "rag"),
+    ("What is the notice period for resignation?", "rag"),
+    ("Explain the code of conduct", "rag"),
+    ("What are the rules for gifts from vendors?", "rag"),
+    ("Can I work from home on Fridays?", "rag"),
+    ("What happens if someone violates the harassment guidelines?", "rag"),
+    ("What is the process to report misconduct?", "rag"),
+    ("How is remuneration decided for senior management?", "rag"),
+    ("What are the ethics requirements for directors?", "rag"),
+    ("Is moonlighting allowed?", "rag"),
+    ("What is Priya's salary?", "sql"),
+    ("How many employees?", "sql"),
+    ("How many employees are there in the company?", "sql"),
+    ("Show the joining date of Shweta Kulkarni", "sql"),
+    ("Give me the manager code of employee id 82410", "sql"),
+    ("List employees with compliance risk high", "sql"),
+    ("Who has the highest salary?", "sql"),
+    ("Which employee has the most overtime hours?", "sql"),
+    ("What is the average salary?", "sql"),
+    ("Show employees who joined after 2015", "sql"),
+    ("What is the performance rating of Rakesh Sharma?", "sql"),
+    ("How many exceeded as per policy?", "both"),
+    ("How many employees exceeded the sick leave limit according to policy?", "both"),
+    ("Which employees violate the overtime rule in the policy?", "both"),
+    ("Is employee id 2002 within the allowed leaves as per the policy?", "both"),
+    ("Count employees above the policy limit of sick leaves", "both"),
+]
+
+
+# --------------------------------------------------
+# Training data mined from router decisions in app.log
+# --------------------------------------------------
+_QUESTION_LINE = re.compile(r"\| ROUTER \| Detecting intent for: (.+)$")
+_DECISION_LINE = re.compile(r"\| ROUTER \| Intent decided: (\{.*\})(?: source=(\w+))?\s*$")
+
+# Decisions made by the rules or by this model itself would only teach
+# it what it already does; lines without a source predate the field
+TRAINABLE_SOURCES = frozenset({"llm", "human"})
+
+
+def _intents_to_label(intents) -> Optional[str]:
+    intents = set(intents)
+    if intents == {"rag", "sql"}:
+        return "both"
+    if len(intents) == 1:
+        label = next(iter(intents))
+        if label in LABELS:
+            return label
+    return None
+
+
+def mine_log_examples(log_path: str = APP_LOG_PATH) -> List[Tuple[str, str]]:
+    """
+    Pair each 'Detecting intent for' line with the next
+    'Intent decided' line logged by the router, keeping only
+    decisions whose source is in TRAINABLE_SOURCES.
+    """
+    if not os.path.exists(log_path):
+        return []
+
+    examples = []
+    pending_question = None
+
+    with open(log_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            q_match = _QUESTION_LINE.search(line)
+            if q_match:
+                pending_question = q_match.group(1).strip()
+                continue
+
+            d_match = _DECISION_LINE.search(line)
+            if not (d_match and pending_question):
+                continue
+
+            question, pending_question = pending_question, None
+            if d_match.group(2) not in TRAINABLE_SOURCES:
+                continue
+            try:
+                label = _intents_to_label(ast.literal_eval(d_match.group(1)))
+            except (ValueError, SyntaxError):
+                label = None
+            if label:
+                examples.append((question, label))
+
+    return examples
+
+
+def build_dataset(log_path: str = APP_LOG_PATH) -> Tuple[List[str], List[str]]:
+    seen = {}
+    for question, label in SEED_EXAMPLES + mine_log_examples(log_path):
+        # Latest decision wins for duplicate questions
+        seen[question.strip().lower()] = label
+    return list(seen.keys()), list(seen.values())
+
+
+def _new_pipeline():
+    from sklearn.pipeline import make_pipeline
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+
+    return make_pipeline(
+        TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, lowercase=True),
+        LogisticRegression(max_iter=1000, class_weight="balanced")
+    )
+
+
+# --------------------------------------------------
+# Runtime prediction
+# --------------------------------------------------
+def load_intent_model(path: str = INTENT_MODEL_PATH):
+    """
+    The trained pipeline, or None (logged once) → every question that the
+    keyword rules do not settle goes to the LLM.
+    """
+    if not os.path.exists(path):
+        logger.warning(
+            f"⚠️ Intent model not found at {path}: routing falls back to the LLM. "
+            f"Train it with `python -m router.intent_model train`"
+        )
+        return None
+    try:
+        return joblib.load(path)
+    except Exception as e:
+        logger.warning(f"⚠️ Intent model at {path} could not be loaded ({e}): routing falls back to the LLM")
+        return None
+
+
+intent_model = load_intent_model()
+
+
+def predict_intent(question: str) -> Optional[Tuple[str, float]]:
+    """
+    Returns (label, confidence) or None when no trained model exists.
+    """
+    if intent_model is None:
+        return None
+
+    probs = intent_model.predict_proba([question.lower()])[0]
+    best = int(probs.argmax())
+    return intent_model.classes_[best], float(probs[best])
+
+
+# --------------------------------------------------
+# CLI: train / evaluate
+# --------------------------------------------------
+def _latency_ms(model, questions: List[str]) -> Tuple[float, float]:
+    timings = []
+    for q in questions:
+        start = time.perf_counter()
+        model.predict_proba([q])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    return sum(timings) / len(timings), p95
+
+
+def evaluate(log_path: str = APP_LOG_PATH):
+    from sklearn.model_selection import cross_val_predict, StratifiedKFold
+    from sklearn.metrics import accuracy_score, classification_report
+
+    X, y = build_dataset(log_path)
+    min_class = min(y.count(label) for label in set(y))
+    n_splits = min(5, min_class)
+
+    if n_splits >= 2:
+        cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+        preds = cross_val_predict(_new_pipeline(), X, y, cv=cv)
+        print(f"📊 {n_splits}-fold cross-validated accuracy: {accuracy_score(y, preds):.2%}")
+        print(classification_report(y, preds, zero_division=0))
+    else:
+        print("⚠️ Not enough examples per label for cross-validation")
+
+    model = _new_pipeline().fit(X, y)
+    mean_ms, p95_ms = _latency_ms(model, X)
+    print(f"⏱️ Prediction latency: mean {mean_ms:.3f} ms | p95 {p95_ms:.3f} ms ({len(X)} questions)")
+
+
+def train(log_path: str = APP_LOG_PATH, output_path: str = INTENT_MODEL_PATH):
+    X, y = build_dataset(log_path)
+    print(f"📄 Training on {len(X)} examples ({len(SEED_EXAMPLES)} seed + mined from {log_path})")
+
+    model = _new_pipeline().fit(X, y)
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    joblib.dump(model, output_path)
+    print(f"✅ Intent model saved to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train / evaluate the local intent classifier")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--log", default=APP_LOG_PATH, help="Router log to mine labelled decisions from")
+    parser.add_argument("--output", default=INTENT_MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        train(args.log, args.output)
+    else:
+        evaluate(args.log)
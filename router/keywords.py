@@ -0,0 +1,316 @@
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+
+# ==================================================
+# Keyword vocabularies (single source of truth)
+# ==================================================
+# Every router heuristic reads from these sets. Matching is plain
+# substring matching on the lower-cased question, exactly like the
+# original `any(kw in q_lower for kw in ...)` scans.
+
+# FIX 32: Policy keywords (RAG-only, highest priority)
+POLICY_KEYWORDS = frozenset({
+    "policy", "posh", "dress code", "leave policy",
+    "procedure", "procedures", "compliance", "rules", "regulations",
+    "guidelines", "harassment", "maternity", "privilege leave",
+    "casual leave", "sick leave policy", "annual leave",
+    "probation", "termination", "resignation", "notice period",
+    "code of conduct", "ethics", "prevention", "workplace"
+})
+
+# FIX 29: Employee data attributes (SQL-only, never RAG)
+EMPLOYEE_DATA_ATTRIBUTES = frozenset({
+    "salary", "monthly salary", "annual salary",
+    "joining date", "date of joining",
+    "work hours", "overtime", "overtime hours",
+    "employee id", "employeeid", "employee name", "employeename",
+    "manager", "manager code",
+    "years at company", "years in role", "years in current role",
+    "leave balance", "sick leaves", "sick leave",
+    "performance rating", "compliance risk"
+})
+
+# FIX 33: Aggregate keywords (SQL-only)
+AGGREGATE_KEYWORDS = frozenset({
+    "how many", "total number", "count of", "total employees",
+    "number of employees", "all employees", "total", "sum of",
+    "average", "exceeded"
+})
+
+# FIX 36: Ranking keywords (SQL-only, no RAG needed)
+RANKING_KEYWORDS = frozenset({
+    "highest", "lowest", "most", "least", "top", "bottom",
+    "maximum", "minimum", "best", "worst", "greatest", "smallest"
+})
+
+# FIX 17: Ranking keywords as seen by the SQL generator
+SQL_RANKING_KEYWORDS = frozenset({
+    "highest", "lowest", "most", "least", "top", "bottom",
+    "maximum", "minimum", "max", "min", "best", "worst",
+    "largest", "smallest", "greatest"
+})
+
+REMAINING_KEYWORDS = frozenset({"left", "remaining", "available", "balance"})
+
+LEAVE_WORDS = frozenset({"leave", "leaves", "sick", "casual", "privilege"})
+
+LEAVE_TYPES = frozenset({"sick", "casual", "privilege"})
+
+LEAVE_MENTIONS = frozenset({
+    "sick leave", "sick days", "casual leave", "privilege leave", "leave"
+})
+
+EXCEEDED_KEYWORDS = frozenset({"exceeded", "more than allowed", "above allowed"})
+
+POLICY_REFERENCE_KEYWORDS = frozenset({"policy", "according to", "as per"})
+
+ENTITY_REFERENCE_KEYWORDS = frozenset({
+    "priya", "rakesh", "shweta", "employee id", "id is", "whose id", "with id"
+})
+
+# Rule-based strong SQL triggers
+SQL_TRIGGER_KEYWORDS = frozenset({"count", "average", "total employees"})
+
+# --------------------------------------------------
+# Dependency detection vocabularies
+# --------------------------------------------------
+POLICY_LOOKUP_TRIGGERS = frozenset({
+    "what is the policy", "according to the policy", "policy says",
+    "what is the maximum", "what is the allowed",
+    "maximum allowed sick leaves", "allowed sick leaves",
+    "allowed limit", "policy limit"
+})
+
+DATA_ACTION_WORDS = frozenset({
+    "how many", "count", "number of", "employees", "who", "list", "exceeded"
+})
+
+POLICY_APPLICATION_TRIGGERS = frozenset({
+    "as per policy", "according to policy", "based on policy",
+    "maximum allowed", "allowed limit", "policy limit",
+    "exceeded allowed", "exceeded maximum", "more than allowed",
+    "above allowed"
+})
+
+ANALYTICS_TRIGGERS = frozenset({
+    "how many", "count", "number of employees", "employees exceeded",
+    "who exceeded", "list employees"
+})
+
+LEAVE_RESOURCE_TYPES = frozenset({
+    "sick leave", "casual leave", "privilege leave",
+    "leave", "leaves", "days off"
+})
+
+EXPLANATION_TRIGGERS = frozenset({
+    "based on employee data", "according to dataset", "explain this",
+    "what does this mean", "policy implication", "interpret this",
+    "is this allowed"
+})
+
+DATA_ONLY_TRIGGERS = frozenset({
+    "how many employees", "count", "list", "show", "who has",
+    "highest", "lowest", "average", "maximum", "minimum",
+    "joining date", "manager code", "years at company",
+    "years in current role"
+})
+
+# --------------------------------------------------
+# Global query detection (FIX 19 + FIX 25 + FIX 32)
+# --------------------------------------------------
+GLOBAL_REMAINING_KEYWORDS = frozenset({"left", "remaining", "available"})
+
+ENTITY_SCOPE_KEYWORDS = frozenset({"for", "whose", "with id"})
+
+GLOBAL_AGGREGATE_KEYWORDS = frozenset({
+    "how many", "total number", "count", "all employees",
+    "total employees", "number of employees", "sum of",
+    "average", "total", "exceeded", "who all"
+})
+
+GLOBAL_POLICY_KEYWORDS = frozenset({
+    "policy", "posh", "dress code", "procedure", "rules",
+    "regulations", "guidelines", "harassment", "code of conduct"
+})
+
+# --------------------------------------------------
+# Question planner vocabularies (FIX 22)
+# --------------------------------------------------
+ATTRIBUTE_KEYWORDS = frozenset({
+    "name", "id", "employee id", "employeeid",
+    "joining date", "date of joining",
+    "salary", "monthly salary",
+    "manager", "manager code",
+    "years at company", "years in current role",
+    "sick leaves", "leave balance"
+})
+
+DISTINCT_METRICS = frozenset({
+    "highest years at company", "highest years in current role",
+    "highest years in role", "highest sick leaves", "most sick leaves",
+    "maximum salary", "highest salary"
+})
+
+# --------------------------------------------------
+# NL → SQL vocabularies
+# --------------------------------------------------
+ATTRIBUTE_MAP = {
+    "name": "employeename",
+    "employee name": "employeename",
+    "id": "employeeid",
+    "employee id": "employeeid",
+    "joining date": "dateofjoining",
+    "date of joining": "dateofjoining",
+    "salary": "salary",
+    "manager": "managercode",
+    "manager code": "managercode",
+    "years at company": "yearsatcompany",
+    "years in current role": "yearsinrole"
+}
+
+RANKING_METRIC_MAP = {
+    "years at company": "yearsatcompany",
+    "years in current role": "yearsincurrentrole",
+    "years in role": "yearsincurrentrole",
+    "salary": "salary",
+    "sick leaves": "sickleaveslastyear",
+    "sick leave": "sickleaveslastyear",
+    "leave": "sickleaveslastyear",
+    "taken the highest sick leaves": "sickleaveslastyear",
+    "taken sick leaves": "sickleaveslastyear",
+    "has taken the highest sick": "sickleaveslastyear"
+}
+
+COUNT_KEYWORDS = frozenset({"how many", "count", "total number", "number of"})
+
+IDENTITY_KEYWORDS = frozenset({"employee", "id", "name"})
+
+CONJUNCTION_KEYWORDS = frozenset({"whose", "with id", "id is", "id ="})
+
+
+# Category name → vocabulary
+VOCABULARIES: Dict[str, FrozenSet[str]] = {
+    "policy": POLICY_KEYWORDS,
+    "employee_attribute": EMPLOYEE_DATA_ATTRIBUTES,
+    "aggregate": AGGREGATE_KEYWORDS,
+    "ranking": RANKING_KEYWORDS,
+    "sql_ranking": SQL_RANKING_KEYWORDS,
+    "remaining": REMAINING_KEYWORDS,
+    "leave_word": LEAVE_WORDS,
+    "leave_type": LEAVE_TYPES,
+    "leave_mention": LEAVE_MENTIONS,
+    "exceeded": EXCEEDED_KEYWORDS,
+    "policy_reference": POLICY_REFERENCE_KEYWORDS,
+    "entity_reference": ENTITY_REFERENCE_KEYWORDS,
+    "sql_trigger": SQL_TRIGGER_KEYWORDS,
+    "policy_lookup": POLICY_LOOKUP_TRIGGERS,
+    "data_action": DATA_ACTION_WORDS,
+    "policy_application": POLICY_APPLICATION_TRIGGERS,
+    "analytics": ANALYTICS_TRIGGERS,
+    "leave_resource": LEAVE_RESOURCE_TYPES,
+    "explanation": EXPLANATION_TRIGGERS,
+    "data_only": DATA_ONLY_TRIGGERS,
+    "global_remaining": GLOBAL_REMAINING_KEYWORDS,
+    "entity_scope": ENTITY_SCOPE_KEYWORDS,
+    "global_aggregate": GLOBAL_AGGREGATE_KEYWORDS,
+    "global_ranking": SQL_RANKING_KEYWORDS,
+    "global_policy": GLOBAL_POLICY_KEYWORDS,
+    "attribute": ATTRIBUTE_KEYWORDS,
+    "distinct_metric": DISTINCT_METRICS,
+    "attribute_phrase": frozenset(ATTRIBUTE_MAP),
+    "ranking_metric": frozenset(RANKING_METRIC_MAP),
+    "count": COUNT_KEYWORDS,
+    "identity": IDENTITY_KEYWORDS,
+    "conjunction": CONJUNCTION_KEYWORDS,
+}
+
+
+# ==================================================
+# Aho-Corasick automaton (built once at import)
+# ==================================================
+def _build_automaton(keywords: Iterable[str]):
+    goto: List[Dict[str, int]] = [{}]
+    fail: List[int] = [0]
+    out: List[Tuple[str, ...]] = [()]
+
+    for kw in keywords:
+        node = 0
+        for ch in kw:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto.append({})
+                fail.append(0)
+                out.append(())
+                goto[node][ch] = nxt
+            node = nxt
+        out[node] = out[node] + (kw,)
+
+    # Breadth-first failure links
+    queue = deque(goto[0].values())
+    while queue:
+        node = queue.popleft()
+        for ch, nxt in goto[node].items():
+            queue.append(nxt)
+            f = fail[node]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0)
+            out[nxt] = out[nxt] + out[fail[nxt]]
+
+    return goto, fail, out
+
+
+_KEYWORD_CATEGORIES: Dict[str, Tuple[str, ...]] = {}
+for _category, _vocab in VOCABULARIES.items():
+    for _kw in _vocab:
+        _KEYWORD_CATEGORIES[_kw] = _KEYWORD_CATEGORIES.get(_kw, ()) + (_category,)
+
+_GOTO, _FAIL, _OUT = _build_automaton(_KEYWORD_CATEGORIES)
+
+
+class KeywordHits:
+    """
+    Immutable result of one scan: category → matched keywords.
+    """
+
+    __slots__ = ("_hits",)
+
+    def __init__(self, hits: Dict[str, FrozenSet[str]]):
+        self._hits = hits
+
+    def has(self, category: str) -> bool:
+        return category in self._hits
+
+    def get(self, category: str) -> FrozenSet[str]:
+        return self._hits.get(category, frozenset())
+
+    def __repr__(self):
+        return f"KeywordHits({ {k: sorted(v) for k, v in self._hits.items()} })"
+
+
+@lru_cache(maxsize=2048)
+def match_keywords(question: str) -> KeywordHits:
+    """
+    Single pass over the lower-cased question returning every
+    keyword category hit. Cached, so every router module asking
+    about the same text shares one scan.
+    """
+    node = 0
+    found = set()
+
+    for ch in question.lower():
+        while node and ch not in _GOTO[node]:
+            node = _FAIL[node]
+        node = _GOTO[node].get(ch, 0)
+        if _OUT[node]:
+            found.update(_OUT[node])
+
+    hits: Dict[str, set] = {}
+    for kw in found:
+        for category in _KEYWORD_CATEGORIES[kw]:
+            hits.setdefault(category, set()).add(kw)
+
+    return KeywordHits({k: frozenset(v) for k, v in hits.items()})
@@ -0,0 +1,230 @@
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, Optional, Tuple
+
+from router.keywords import (
+    match_keywords,
+    KeywordHits,
+    ATTRIBUTE_MAP,
+    RANKING_METRIC_MAP,
+    VOCABULARIES
+)
+from router.rules import rule_based_intent
+from router.dependency import detect_dependency
+from router.entity_resolver import extract_entity
+from sql_pipeline.entity_index import employee_index
+
+
+# ==================================================
+# QueryPlan — ONE analysis per question text
+# ==================================================
+@dataclass(frozen=True)
+class QueryPlan:
+    """
+    Immutable result of analysing a question once.
+
+    Every router / SQL stage reads from this instead of
+    re-lowercasing and re-scanning the same text.
+    """
+    question: str
+    keywords: KeywordHits
+    rule_intents: FrozenSet[str]
+    employeeid: Optional[str]
+    employeename: Optional[str]
+    is_global: bool
+    dependency: str
+    is_count: bool
+    is_ranking: bool
+    ranking_metric: Optional[str]
+    requested_columns: Tuple[str, ...]
+    has_multiple_entity_conditions: bool
+    leave_type: Optional[str]
+    is_remaining: bool
+    is_exceeded: bool
+
+    @property
+    def has_entity(self) -> bool:
+        return bool(self.employeeid or self.employeename)
+
+
+# --------------------------------------------------
+# 🧠 FIX 19 + FIX 25 — Global Query Detection (CRITICAL)
+# --------------------------------------------------
+def _is_global_query(hits: KeywordHits) -> bool:
+    """
+    Detect if question requires GLOBAL dataset (no entity scoping).
+
+    FIX 19: Aggregates (how many, count, total)
+    FIX 25: Rankings (highest, lowest, most, top)
+    FIX 32: Policy questions (policy, posh, dress code)
+    NEW FIX: "Remaining/Left" calculations for specific employees are NOT global
+
+    These should NEVER inherit entity context.
+    """
+    # NEW: Detect "remaining/left" calculation queries (NOT global)
+    # These ask "how many X left for [employee]" - specific, not global
+    if hits.has("global_remaining") and hits.has("entity_scope"):
+        return False
+
+    is_aggregate = hits.has("global_aggregate")
+    is_ranking = hits.has("global_ranking")
+    is_policy = hits.has("global_policy")
+
+    return is_aggregate or is_ranking or is_policy
+
+
+def _requested_columns(hits: KeywordHits) -> Tuple[str, ...]:
+    """
+    FIX 12 — Deterministic attribute extraction (schema-agnostic;
+    nl_to_sql filters against the live columns)
+    """
+    cols = {ATTRIBUTE_MAP[phrase] for phrase in hits.get("attribute_phrase")}
+
+    # Always include identity if employee is involved
+    if hits.has("identity"):
+        cols.update({"employeeid", "employeename"})
+
+    return tuple(sorted(cols))
+
+
+def _ranking_metric(hits: KeywordHits) -> Optional[str]:
+    """
+    FIX 27: Longest matched phrase wins (most specific)
+    """
+    phrases = hits.get("ranking_metric")
+    if not phrases:
+        return None
+    return RANKING_METRIC_MAP[max(phrases, key=lambda p: (len(p), p))]
+
+
+def _leave_type(hits: KeywordHits) -> Optional[str]:
+    leave_types = hits.get("leave_type")
+    if "sick" in leave_types:
+        return "sick leave"
+    if "casual" in leave_types:
+        return "casual leave"
+    if "privilege" in leave_types:
+        return "privilege leave"
+    return None
+
+
+@lru_cache(maxsize=2048)
+def analyze_question(question: str) -> QueryPlan:
+    """
+    Single analysis stage. Pure (never touches memory), so results
+    are cached per question text.
+    """
+    hits = match_keywords(question)
+    entity = extract_entity(question)
+
+    return QueryPlan(
+        question=question,
+        keywords=hits,
+        rule_intents=frozenset(rule_based_intent(question)),
+        employeeid=entity["employeeid"],
+        employeename=entity["employeename"],
+        is_global=_is_global_query(hits),
+        dependency=detect_dependency(question),
+        is_count=hits.has("count"),
+        is_ranking=hits.has("sql_ranking"),
+        ranking_metric=_ranking_metric(hits),
+        requested_columns=_requested_columns(hits),
+        # FIX 21: same employee named by id AND name → AND, not OR
+        has_multiple_entity_conditions=bool(
+            entity["employeeid"] and entity["employeename"] and hits.has("conjunction")
+        ),
+        leave_type=_leave_type(hits),
+        is_remaining=hits.has("remaining"),
+        is_exceeded=hits.has("exceeded"),
+    )
+
+
+# Entity extraction reads the employee index → replan after data reloads
+employee_index.on_refresh(analyze_question.cache_clear)
+
+
+# --------------------------------------------------
+# Microbenchmark: repeated per-stage analysis vs one QueryPlan
+# --------------------------------------------------
+# Vocabularies each stage scanned on its own before the shared matcher
+# (route twice, classifier, dependency, global check, nl_to_sql,
+# sql_depends_on_rag)
+LEGACY_STAGE_SCANS: Tuple[Tuple[str, ...], ...] = (
+    ("sql_trigger",),
+    ("sql_trigger",),
+    ("policy", "ranking", "remaining", "leave_word", "aggregate",
+     "policy_reference", "employee_attribute", "entity_reference"),
+    ("policy_lookup", "data_action", "policy_application", "analytics",
+     "remaining", "leave_resource", "explanation", "data_only"),
+    ("global_remaining", "entity_scope", "global_aggregate", "global_ranking", "global_policy"),
+    ("attribute_phrase", "identity", "sql_ranking", "ranking_metric", "conjunction", "count"),
+    ("remaining", "leave_mention", "leave_type", "exceeded", "policy_reference"),
+)
+
+
+def _substring_scan(question: str, categories: Tuple[str, ...]) -> KeywordHits:
+    """
+    The old per-stage check: lower-case, then `k in q` for every keyword.
+    """
+    q = question.lower()
+    hits = {}
+    for category in categories:
+        found = frozenset(k for k in VOCABULARIES[category] if k in q)
+        if found:
+            hits[category] = found
+    return KeywordHits(hits)
+
+
+def _legacy_analysis(question: str):
+    """
+    What a single question used to cost: every stage re-lowercased and
+    substring-scanned the text for its own vocabularies, and entity
+    extraction ran on the full question and again on the sub-question.
+    """
+    stage_hits = [_substring_scan(question, categories) for categories in LEGACY_STAGE_SCANS]
+    for _ in range(2):
+        extract_entity(question)
+
+    global_hits, nl_hits = stage_hits[4], stage_hits[5]
+    _is_global_query(global_hits)
+    _requested_columns(nl_hits)
+    _ranking_metric(nl_hits)
+    _leave_type(stage_hits[6])
+
+
+def _benchmark(iterations: int = 2000):
+    questions = [
+        "How many employees have exceeded the allowed sick leaves as per policy?",
+        "What is the salary and joining date of Priya Patel whose id is 82410?",
+        "Who has the highest years at company also give me highest salary",
+        "how many sick leaves left for employee id 2002",
+        "What is posh policy?",
+    ]
+
+    # Baseline must see exactly what the shared matcher sees
+    for q in questions:
+        for categories in LEGACY_STAGE_SCANS:
+            legacy_hits = _substring_scan(q, categories)
+            assert all(legacy_hits.get(c) == match_keywords(q).get(c) for c in categories), q
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        _legacy_analysis(questions[i % len(questions)])
+    legacy = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for i in range(iterations):
+        match_keywords.cache_clear()
+        analyze_question.cache_clear()
+        plan = analyze_question(questions[i % len(questions)])
+        # Downstream stages only read fields
+        plan.rule_intents, plan.dependency, plan.is_global, plan.requested_columns
+    single = (time.perf_counter() - start) / iterations * 1e6
+
+    print(f"Per-stage substring scans   : {legacy:8.1f} µs / question")
+    print(f"Single QueryPlan            : {single:8.1f} µs / question")
+
+
+if __name__ == "__main__":
+    _benchmark()
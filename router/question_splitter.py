@@ -1,26 +1,8 @@
 import re
 from typing import List
 
-
-# --------------------------------------------------
-# Attribute vocabulary (planner-level, NOT SQL)
-# --------------------------------------------------
-ATTRIBUTE_KEYWORDS = {
-    "name",
-    "id",
-    "employee id",
-    "employeeid",
-    "joining date",
-    "date of joining",
-    "salary",
-    "monthly salary",
-    "manager",
-    "manager code",
-    "years at company",
-    "years in current role",
-    "sick leaves",
-    "leave balance"
-}
+# Attribute / metric vocabularies live in router/keywords.py
+from router.keywords import match_keywords, ATTRIBUTE_KEYWORDS
 
 
 def split_multi_part_question(question: str) -> List[str]:
@@ -43,10 +25,8 @@ def split_multi_part_question(question: str) -> List[str]:
     # --------------------------------------------------
     # 1️⃣ Detect attribute-style conjunctions (same entity)
     # --------------------------------------------------
-    attribute_hits = [
-        attr for attr in ATTRIBUTE_KEYWORDS
-        if attr in lowered
-    ]
+    hits = match_keywords(q)
+    attribute_hits = hits.get("attribute")
 
     # If multiple attributes but SAME entity → DO NOT SPLIT
     if len(attribute_hits) >= 2 and "also" not in lowered:
@@ -55,17 +35,7 @@ def split_multi_part_question(question: str) -> List[str]:
     # --------------------------------------------------
     # FIX 22: Detect multiple DIFFERENT metrics/intents
     # --------------------------------------------------
-    different_metrics = [
-        "highest years at company",
-        "highest years in current role",
-        "highest years in role",
-        "highest sick leaves",
-        "most sick leaves",
-        "maximum salary",
-        "highest salary"
-    ]
-    
-    metric_hits = [m for m in different_metrics if m in lowered]
+    metric_hits = hits.get("distinct_metric")
     
     # If multiple different metrics → MUST split
     if len(metric_hits) >= 2:
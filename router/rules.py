@@ -1,3 +1,6 @@
+from router.keywords import match_keywords
+
+
 def rule_based_intent(question: str):
     q = question.lower()
 
@@ -6,7 +9,7 @@ def rule_based_intent(question: str):
         return {"greet"}
 
     # Strong SQL triggers
-    if any(k in q for k in ["count", "average", "total employees"]):
+    if match_keywords(q).has("sql_trigger"):
         return {"sql"}
 
     return {"unknown"}
@@ -1,4 +1,7 @@
 import re
+from typing import Dict, List, Optional, Tuple
+
+from sqlglot import exp
 
 AGGREGATE_KEYWORDS = ["count(", "max(", "min(", "avg(", "sum("]
 RANKING_KEYWORDS = ["order by", "limit"]
@@ -138,3 +141,127 @@ def enforce_rbac(sql: str, user: dict, has_policy_constraint: bool = False) -> s
         base_sql = base_sql.strip() + f" WHERE {condition}"
 
     return f"{base_sql} {tail_sql}".strip()
+
+
+# ==================================================
+# AST variant (single-parse SQL pipeline)
+# ==================================================
+AGGREGATE_NODES = (exp.Count, exp.Max, exp.Min, exp.Avg, exp.Sum)
+MUTATION_NODES = (exp.Delete, exp.Update, exp.Insert, exp.Drop, exp.Alter, exp.TruncateTable)
+SET_OPERATION_NODES = (exp.Union, exp.Intersect, exp.Except)
+
+
+def index_nodes(tree: exp.Expression) -> Dict[type, List[exp.Expression]]:
+    """
+    One walk over the AST: node type → nodes (shared by every check).
+    """
+    nodes: Dict[type, List[exp.Expression]] = {}
+    for node in tree.walk():
+        nodes.setdefault(type(node), []).append(node)
+    return nodes
+
+
+def _any(nodes, types) -> bool:
+    return any(t in nodes for t in types)
+
+
+def _top_level_conjuncts(select: exp.Select):
+    """
+    Predicates only ANDed into this SELECT's own WHERE: they hold for
+    every row it returns (`a OR employeeid = 1` scopes nothing).
+    """
+    where = select.args.get("where")
+    stack = [where.this] if where else []
+    while stack:
+        node = stack.pop()
+        if isinstance(node, exp.Paren):
+            stack.append(node.this)
+        elif isinstance(node, exp.And):
+            stack.extend((node.this, node.expression))
+        else:
+            yield node
+
+
+def _already_scoped(select: exp.Select) -> bool:
+    for eq in _top_level_conjuncts(select):
+        if not isinstance(eq, exp.EQ):
+            continue
+        col, value = eq.this, eq.expression
+        if not isinstance(col, exp.Column) or not isinstance(value, exp.Literal):
+            continue
+        if col.name.lower() == "employeeid" and not value.is_string:
+            return True
+        if col.name.lower() == "employeename" and value.is_string:
+            return True
+    return False
+
+
+def rbac_conditions(
+    tree: exp.Expression,
+    user: dict,
+    has_policy_constraint: bool = False,
+    nodes: Optional[Dict[type, List[exp.Expression]]] = None
+) -> List[Tuple[exp.Select, exp.Expression]]:
+    """
+    Same decisions as enforce_rbac (FIX 16 + FIX 18), read from the AST.
+    Returns (SELECT, predicate) pairs: the predicate is ANDed into the
+    WHERE of EVERY select reading `employee` directly (outer query,
+    CTE bodies, subqueries). Empty list → leave SQL untouched.
+    """
+    role = user.get("role")
+    emp_id = user.get("emp_id")
+
+    if role is None or emp_id is None:
+        raise ValueError("❌ Invalid user context for RBAC.")
+
+    # 🛡️ FIX 18 — policy constraints already define scope
+    if has_policy_constraint:
+        print("🛡️ Policy-constrained query → RBAC bypassed")
+        return []
+
+    nodes = nodes if nodes is not None else index_nodes(tree)
+
+    # 🚫 Block mutations (ALWAYS)
+    if _any(nodes, MUTATION_NODES):
+        raise ValueError("❌ You are not allowed to modify employee data.")
+
+    # ✅ Admin → full access
+    if role == "admin":
+        return []
+
+    # 🚫 One aggregate branch would mark the whole UNION as "global"
+    if _any(nodes, SET_OPERATION_NODES):
+        raise ValueError("❌ UNION / INTERSECT / EXCEPT queries are not allowed for your role.")
+
+    # ✅ Global analytics → DO NOT TOUCH
+    if _any(nodes, AGGREGATE_NODES) or _any(nodes, (exp.Order, exp.Limit)):
+        return []
+
+    # 🧠 FIX 16 — NO ENTITY → NO RBAC MUTATION
+    if not any(
+        c.name.lower() in {"employeeid", "employeename"}
+        for c in nodes.get(exp.Column, [])
+    ):
+        return []
+
+    # 🔐 Apply RBAC ONLY for explicit personal lookups
+    employee_tables = [t for t in nodes.get(exp.Table, []) if t.name.lower() == "employee"]
+    if not employee_tables:
+        return []
+
+    # emp_id becomes a SQL literal → must be a plain integer
+    if not str(emp_id).strip().isdigit():
+        raise ValueError("❌ Invalid user context for RBAC.")
+
+    conditions = []
+    for table in employee_tables:
+        select = table.parent_select
+        if select is None or _already_scoped(select):
+            continue
+
+        qualifier = table.alias or (table.name if select.args.get("joins") else None)
+        conditions.append((select, exp.EQ(
+            this=exp.column("employeeid", table=qualifier),
+            expression=exp.Literal.number(int(emp_id))
+        )))
+    return conditions
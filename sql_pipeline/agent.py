@@ -1,56 +1,55 @@
-from typing import Optional, Dict, Any, List
-import re
-from datetime import datetime
+from typing import Optional, Dict, Any, List, Iterator
+import json
 
 from sql_pipeline.nl_to_sql import nl_to_sql
-from sql_pipeline.database import con
-from sql_pipeline.llm import qwen
-from security.rbac import enforce_rbac
-from sql_pipeline.sql_utils import (
-    clean_sql,
-    fix_table_names,
-    fix_columns,
-    validate_sql
+from sql_pipeline.sql_templates import template_cache
+from router.query_plan import analyze_question
+from sql_pipeline.database import get_data_version
+from sql_pipeline.pagination import (
+    fetch_capped,
+    iter_record_batches,
+    make_token,
+    read_token,
+    continuation_marker,
+    RESULT_ROW_CAP
 )
+from sql_pipeline.result_cache import result_cache, cache_key
+from sql_pipeline.materialized import employee_materialization
+from sql_pipeline.formatting import format_date_columns
+from sql_pipeline.narration import render_result, needs_llm_narration, narrate_batch
+from sql_pipeline.sql_utils import clean_sql
+from sql_pipeline.sql_ast import process_sql
 from logger import get_logger
 
 logger = get_logger("SQL_AGENT")
 
 
 # --------------------------------------------------
-# FIX 28: Date Formatting Helper
+# Helper: execute with the Arrow result cache
 # --------------------------------------------------
-def _format_date(date_value) -> str:
+def _execute_cached(sql: str, user: dict, offset: int = 0):
     """
-    Convert date to human-readable format.
-    Input: "11/13/2000" or datetime object
-    Output: "13th November 2000"
+    Returns (df, has_more). Only one capped page is ever materialised.
     """
-    try:
-        # If it's a string, parse it
-        if isinstance(date_value, str):
-            # Try multiple date formats
-            for fmt in ["%m/%d/%Y", "%Y-%m-%d", "%d/%m/%Y"]:
-                try:
-                    dt = datetime.strptime(date_value, fmt)
-                    break
-                except:
-                    continue
-            else:
-                return date_value  # Return original if parsing fails
-        else:
-            dt = date_value
-        
-        # Add ordinal suffix (st, nd, rd, th)
-        day = dt.day
-        if 4 <= day <= 20 or 24 <= day <= 30:
-            suffix = "th"
-        else:
-            suffix = ["st", "nd", "rd"][day % 10 - 1]
-        
-        return f"{day}{suffix} {dt.strftime('%B %Y')}"
-    except:
-        return str(date_value)  # Fallback to original
+    if not offset:
+        table = employee_materialization.answer(sql)
+        if table is not None:
+            logger.info("⚡ Answered from employee materialisation (execution skipped)")
+            return table.to_pandas(), False
+
+    key = cache_key(f"{sql} /* offset {offset} */", user, get_data_version())
+
+    table = result_cache.get(key)
+    if table is not None:
+        logger.info("⚡ Result cache hit (execution skipped)")
+    else:
+        table, has_more = fetch_capped(sql, offset)
+        table = table.replace_schema_metadata({"has_more": "1" if has_more else "0"})
+        result_cache.put(key, table)
+
+    has_more = (table.schema.metadata or {}).get(b"has_more") == b"1"
+    return table.to_pandas(), has_more
+
 
 # --------------------------------------------------
 # Helper: split multiple SQL statements safely
@@ -63,31 +62,14 @@ def _split_sql_statements(sql: str) -> List[str]:
     ]
 
 
-# --------------------------------------------------
-# Helper: analyze SQL semantics (AUTHORITATIVE)
-# --------------------------------------------------
-def analyze_sql_semantics(sql: str) -> Dict[str, bool]:
-    s = sql.lower()
-    return {
-        "has_where": " where " in s,
-        "has_gt": ">" in s,
-        "has_count": "count(" in s,
-        "has_max": "max(" in s,
-        "has_min": "min(" in s,
-        "has_avg": "avg(" in s,
-        "has_sum": "sum(" in s,
-        "has_order": "order by" in s,
-        "has_limit": "limit" in s
-    }
-
-
 # --------------------------------------------------
 # MAIN AGENT — FIXED CORRECTLY
 # --------------------------------------------------
 def analytical_agent(
     question: str,
     user: dict,
-    policy_constraints: Optional[Dict[str, Any]] = None
+    policy_constraints: Optional[Dict[str, Any]] = None,
+    plan=None
 ):
     """
     FINAL SQL ANALYTICAL AGENT
@@ -105,7 +87,8 @@ def analytical_agent(
     # --------------------------------------------------
     raw_sql = nl_to_sql(
         question=question,
-        policy_constraints=policy_constraints
+        policy_constraints=policy_constraints,
+        plan=plan
     )
 
     if not raw_sql or not raw_sql.strip():
@@ -122,30 +105,37 @@ def analytical_agent(
         return "❌ No valid SELECT query generated."
 
     outputs: List[str] = []
+    pending_narration = []
+    # Result index → "more rows" note; kept apart so narration can't drop it
+    continuations: Dict[int, str] = {}
 
     # --------------------------------------------------
     # 2️⃣ Execute EACH SQL independently
     # --------------------------------------------------
     for idx, sql in enumerate(sql_statements, start=1):
 
-        sql = fix_table_names(sql)
-        sql = fix_columns(sql)
-        semantics = analyze_sql_semantics(sql)
-
         try:
-            validate_sql(sql)
+            # One parse: table/column fixes, safety, semantics, RBAC
             # FIX 18: Pass policy constraint flag to RBAC
-            sql = enforce_rbac(
+            processed = process_sql(
                 sql,
                 user,
                 has_policy_constraint=bool(policy_constraints)
             )
+            sql = processed.sql
+            validated_sql = processed.validated_sql
+            semantics = processed.semantics
             logger.info(f"🚀 Executing Enforced SQL: {sql}")
-            df = con.execute(sql).fetchdf()
+            df, has_more = _execute_cached(sql, user)
         except Exception as e:
             logger.error(f"❌ SQL Execution Error: {str(e)}", exc_info=True)
             return f"❌ SQL execution error in Result {idx}: {e}"
 
+        # 🧩 Single validated statement → reusable skeleton (pre-RBAC,
+        # so no user scope leaks into the template)
+        if len(sql_statements) == 1 and not policy_constraints:
+            template_cache.remember(question, plan or analyze_question(question), validated_sql)
+
         if df.empty:
             outputs.append(f"Result {idx}: No data found.")
             continue
@@ -153,74 +143,83 @@ def analytical_agent(
         # --------------------------------------------------
         # FIX 34: Universal date formatting (apply to ALL queries)
         # --------------------------------------------------
-        for col in df.columns:
-            if 'date' in col.lower() or 'joining' in col.lower():
-                df[col] = df[col].apply(_format_date)
+        # (vectorised: one pd.to_datetime per column, format cached)
+        df = format_date_columns(df, sql)
 
         # --------------------------------------------------
-        # 3️⃣ Deterministic result formatting
+        # 3️⃣ Deterministic narration (templates from AST semantics)
         # --------------------------------------------------
+        text = render_result(idx, df, semantics)
+
+        # ⏭️ Row cap hit → signed continuation token for the next page
+        if has_more:
+            token = make_token(sql, user, offset=RESULT_ROW_CAP)
+            continuations[idx] = (
+                f"\n⏭️ Showing the first {RESULT_ROW_CAP} rows; more are available. "
+                f"{continuation_marker(token)}"
+            )
 
-        # ✅ COUNT(*) queries
-        if semantics["has_count"]:
-            value = int(df.iloc[0, 0])
-            if semantics["has_where"]:
-                outputs.append(
-                    f"Result {idx}: There are {value} records matching the condition."
-                )
-            else:
-                outputs.append(
-                    f"Result {idx}: There are {value} total records in the table."
-                )
-            continue
+        outputs.append(text + continuations.get(idx, ""))
 
-        # ✅ MAX() queries
-        if semantics["has_max"]:
-            col = df.columns[0]
-            value = df.iloc[0, 0]
-            outputs.append(
-                f"Result {idx}: The maximum value of {col} is {value}."
-            )
-            continue
+        # 4️⃣ LLM narration ONLY above the complexity threshold
+        if needs_llm_narration(semantics, df):
+            pending_narration.append((idx, sql, df))
 
-        # ✅ Ranking / TOP employee queries
-        if semantics["has_order"] and semantics["has_limit"]:
-            rows = []
-            for _, row in df.iterrows():
-                # FIX 34: Date formatting now applied universally above
-                row_desc = ", ".join(f"{col} = {row[col]}" for col in df.columns)
-                rows.append(row_desc)
-            outputs.append(
-                f"Result {idx}: " + " | ".join(rows)
-            )
-            continue
+    # --------------------------------------------------
+    # 4️⃣ One batched LLM call for every complex result
+    # --------------------------------------------------
+    if pending_narration:
+        for idx, narration in narrate_batch(pending_narration).items():
+            if 1 <= idx <= len(outputs):
+                outputs[idx - 1] = narration + continuations.get(idx, "")
 
-        # --------------------------------------------------
-        # 4️⃣ LLM fallback ONLY for complex tables
-        # --------------------------------------------------
-        explanation_prompt = f"""
-You are a SQL result narrator.
+    # --------------------------------------------------
+    # 5️⃣ Final response
+    # --------------------------------------------------
+    return "\n\n".join(outputs)
 
-STRICT RULES:
-- Describe ONLY what is shown
-- No inference
-- No policy meaning
-- No assumptions
-- FIX 28: Convert dates like "11/13/2000" to readable format "13th November 2000"
 
-SQL:
-{sql}
+# --------------------------------------------------
+# Continuation pages (/ask with continuation_token)
+# --------------------------------------------------
+def fetch_result_page(token: str, user: dict) -> Dict[str, Any]:
+    """
+    Next RESULT_ROW_CAP rows of a capped result.
+    Raises ValueError for invalid / foreign / stale tokens.
+    """
+    data = read_token(token, user)
+    sql, offset = data["sql"], data["offset"]
 
-SQL Result:
-{df.to_string(index=False)}
+    df, has_more = _execute_cached(sql, user, offset=offset)
+    df = format_date_columns(df, sql)
 
-Explanation:
-"""
+    next_token = make_token(sql, user, offset + RESULT_ROW_CAP) if has_more else None
 
-        explanation = qwen(explanation_prompt).strip()
-        outputs.append(f"Result {idx}:\n{explanation}")
+    if df.empty:
+        answer = "No more rows."
+    else:
+        answer = f"Rows {offset + 1}–{offset + len(df)}" + ("" if has_more else " (end of result)")
 
-    # --------------------------------------------------
-    # 5️⃣ Final response
-    # --------------------------------------------------
-    return "\n\n".join(outputs)
+    return {
+        "answer": answer,
+        "rows": json.loads(df.to_json(orient="records", date_format="iso")),
+        "continuation_token": next_token
+    }
+
+
+def stream_result_rows(token: str, user: dict) -> Iterator[str]:
+    """
+    NDJSON lines for every remaining row, one Arrow batch at a time
+    (memory bounded by the batch size).
+
+    The token is checked HERE, before any row is produced, so a bad
+    token raises ValueError instead of aborting a 200 response mid-stream.
+    """
+    data = read_token(token, user)
+    return _stream_rows(data["sql"], data["offset"])
+
+
+def _stream_rows(sql: str, offset: int) -> Iterator[str]:
+    for batch in iter_record_batches(sql, offset):
+        df = format_date_columns(batch.to_pandas(), sql)
+        yield df.to_json(orient="records", lines=True, date_format="iso").rstrip("\n") + "\n"
@@ -1,11 +1,21 @@
 import duckdb
 import pandas as pd
+import hashlib
 import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
 
-# -------------------------------
-# DuckDB Connection
-# -------------------------------
-con = duckdb.connect()
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from sql_pipeline.entity_index import employee_index, EMPLOYEE_TABLE
+from sql_pipeline.materialized import employee_materialization
 
 # -------------------------------
 # Data Folder Path
@@ -14,34 +24,201 @@ DATA_DIR = "./data"
 
 SUPPORTED_FILES = (".csv", ".xlsx", ".xls")
 
+# -------------------------------
+# Persistent DuckDB cache
+# -------------------------------
+# Built once per dataset version (native column types; DuckDB keeps
+# min/max zone maps per row group). Unchanged files are never re-parsed.
+#
+# Every build is a new generation file written by ONE writer step:
+# data_cache/datasets-<gen>.duckdb.tmp → os.replace → datasets-<gen>.duckdb,
+# then the CURRENT pointer is swapped with os.replace. Serving
+# connections are always read-only, so any number of processes
+# (uvicorn workers, main.py, the CLI) can attach at the same time.
+# Pointer swap + cleanup run under data_cache/.lock and keep the
+# previous generation for workers still attaching to it.
+DB_DIR = "./data_cache"
+POINTER_PATH = os.path.join(DB_DIR, "CURRENT")
+LOCK_PATH = os.path.join(DB_DIR, ".lock")
+GENERATION_PREFIX = "datasets-"
+MANIFEST_TABLE = "_dataset_manifest"
+
+# API workers set this to attach to the pre-built cache without ever
+# syncing ./data themselves (build it first: python -m sql_pipeline.database)
+READ_ONLY = os.getenv("DATASET_DB_READ_ONLY", "0") == "1"
+
+# -------------------------------
+# DuckDB engine settings
+# -------------------------------
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS", str(os.cpu_count() or 4)))
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT", "2GB")
+QUERY_TIMEOUT_SECONDS = float(os.getenv("DUCKDB_QUERY_TIMEOUT", "30"))
+
 # -------------------------------
 # Global Metadata
 # -------------------------------
 TABLES = []
 TABLE_COLUMNS = {}
 
+# Bumped on every load/reload that changed tables; caches key on it
+_data_version = 0
+_reload_lock = threading.Lock()
+
+
+def get_data_version() -> int:
+    return _data_version
+
 
 # -------------------------------
-# Load All Files into DuckDB
+# DuckDB Connection
 # -------------------------------
-def load_datasets():
+def _engine_config():
+    return {"threads": DUCKDB_THREADS, "memory_limit": DUCKDB_MEMORY_LIMIT}
+
+
+def _attach(path: str):
     """
-    Loads all CSV + Excel files from ./data folder
-    and registers them dynamically into DuckDB.
+    Read-only connection on a built generation file. If another process
+    still holds a write lock on it, serve from an in-memory database
+    instead (the caller imports ./data into it) rather than failing.
+    Returns (connection, in_memory).
     """
+    try:
+        return duckdb.connect(path, read_only=True, config=_engine_config()), False
+    except duckdb.IOException as e:
+        print(f"⚠️ Dataset cache is locked by another process, serving from memory: {e}")
+        return duckdb.connect(config=_engine_config()), True
 
-    if not os.path.exists(DATA_DIR):
-        raise FileNotFoundError(f"❌ Data folder not found: {DATA_DIR}")
 
-    files = [
-        f for f in os.listdir(DATA_DIR)
-        if f.lower().endswith(SUPPORTED_FILES)
-    ]
+# Serving connection: loading / reloading / metadata only (read-only
+# file, or in-memory fallback). Request queries go through
+# stream_query(): its own cursor per request (cursors run concurrently,
+# calls on `con` are serialised) under the query timeout.
+# Swapped, never mutated, on reload.
+con = None
+_in_memory = False
+
+
+@contextmanager
+def _deadline(cursor, timeout: float = None):
+    """
+    Interrupts `cursor` after `timeout` seconds (TimeoutError). Enter it
+    BEFORE execute(): DuckDB runs most of the query inside execute().
+    """
+    timeout = QUERY_TIMEOUT_SECONDS if timeout is None else timeout
+    timer = threading.Timer(timeout, cursor.interrupt)
+    timer.daemon = True
+    timer.start()
+    try:
+        yield
+    except duckdb.InterruptException:
+        raise TimeoutError(f"❌ Query exceeded {timeout:g}s timeout")
+    finally:
+        timer.cancel()
+
+
+@contextmanager
+def stream_query(sql: str, batch_rows: int = 1024, timeout: float = None):
+    """
+    Lazy Arrow record batches on a dedicated per-request cursor (a
+    streaming reader must not share its cursor with other queries).
+    The timeout covers execute() and every batch read; the cursor is
+    closed when the block exits.
+    """
+    cursor = con.cursor()
+    try:
+        with _deadline(cursor, timeout):
+            result = cursor.execute(sql)
+            if hasattr(result, "to_arrow_reader"):
+                yield result.to_arrow_reader(batch_rows)
+            else:
+                yield result.fetch_record_batch(batch_rows)
+    finally:
+        cursor.close()
+
 
-    if not files:
-        raise FileNotFoundError("❌ No dataset files found inside ./data")
+def _file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
 
-    print(f"\n✅ Found {len(files)} dataset file(s): {files}\n")
+
+def _normalize_column(name: str) -> str:
+    return str(name).lower().replace(" ", "_")
+
+
+def _ensure_manifest(db):
+    db.execute(f"""
+        CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+            table_name VARCHAR PRIMARY KEY,
+            file_name VARCHAR,
+            file_hash VARCHAR,
+            file_size BIGINT,
+            file_mtime DOUBLE,
+            row_count BIGINT,
+            imported_at TIMESTAMP
+        )
+    """)
+
+
+def _manifest(db=None):
+    rows = (db or con).execute(
+        f"SELECT table_name, file_name, file_hash, file_size, file_mtime FROM {MANIFEST_TABLE}"
+    ).fetchall()
+    return {r[0]: {"file": r[1], "hash": r[2], "size": r[3], "mtime": r[4]} for r in rows}
+
+
+# -------------------------------
+# Import ONE file (native DuckDB types)
+# -------------------------------
+def _import_file(db, table_name: str, file_path: str) -> int:
+    """
+    Build into a staging table, then swap it in one transaction:
+    readers see either the old table or the new one, never a partial load.
+    """
+    staging = f"{table_name}__staging"
+
+    if file_path.lower().endswith(".csv"):
+        db.execute(
+            f'CREATE OR REPLACE TABLE "{staging}" AS SELECT * FROM read_csv_auto(?)',
+            [file_path]
+        )
+    else:
+        df = pd.read_excel(file_path)
+        db.register("_excel_import", df)
+        db.execute(f'CREATE OR REPLACE TABLE "{staging}" AS SELECT * FROM _excel_import')
+        db.unregister("_excel_import")
+
+    # Normalize columns
+    for col in [c[0] for c in db.execute(f'DESCRIBE "{staging}"').fetchall()]:
+        normalized = _normalize_column(col)
+        if normalized != col:
+            db.execute(f'ALTER TABLE "{staging}" RENAME COLUMN "{col}" TO "{normalized}"')
+
+    db.execute("BEGIN TRANSACTION")
+    try:
+        db.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+        db.execute(f'ALTER TABLE "{staging}" RENAME TO "{table_name}"')
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+    return db.execute(f'SELECT COUNT(*) FROM "{table_name}"').fetchone()[0]
+
+
+def _sync_files(db, files):
+    """
+    Re-import only files whose content hash changed; drop tables
+    whose source file disappeared.
+
+    Returns {"added": [...], "changed": [...], "removed": [...]}.
+    """
+    _ensure_manifest(db)
+    manifest = _manifest(db)
+    changes = {"added": [], "changed": [], "removed": []}
 
     for file in files:
         file_path = os.path.join(DATA_DIR, file)
@@ -49,35 +226,287 @@ def load_datasets():
         # Table name = filename without extension
         table_name = os.path.splitext(file)[0].lower()
 
-        print(f"📌 Loading {file} → Table: {table_name}")
+        stat = os.stat(file_path)
+        known = manifest.get(table_name)
+
+        # Same size + mtime → same content, skip hashing entirely
+        if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime:
+            print(f"⚡ Cached table: {table_name}")
+            continue
+
+        file_hash = _file_hash(file_path)
+        if known and known["hash"] == file_hash:
+            db.execute(
+                f"UPDATE {MANIFEST_TABLE} SET file_size = ?, file_mtime = ? WHERE table_name = ?",
+                [stat.st_size, stat.st_mtime, table_name]
+            )
+            print(f"⚡ Cached table: {table_name} (unchanged content)")
+            continue
+
+        print(f"📌 Importing {file} → Table: {table_name}")
+        rows = _import_file(db, table_name, file_path)
+
+        db.execute(
+            f"INSERT OR REPLACE INTO {MANIFEST_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [table_name, file, file_hash, stat.st_size, stat.st_mtime, rows, datetime.now()]
+        )
+        changes["changed" if known else "added"].append(table_name)
+        print(f"✅ Imported table: {table_name} ({rows} rows)\n")
+
+    current = {os.path.splitext(f)[0].lower() for f in files}
+    for table_name in set(manifest) - current:
+        db.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+        db.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE table_name = ?", [table_name])
+        changes["removed"].append(table_name)
+        print(f"🗑️ Dropped table: {table_name} (source file removed)")
+
+    db.execute("CHECKPOINT")
+    return changes
+
+
+# -------------------------------
+# Generation files (single writer step)
+# -------------------------------
+def _current_cache():
+    """
+    Path of the published generation, or None if nothing is built yet.
+    """
+    try:
+        with open(POINTER_PATH, encoding="utf-8") as f:
+            path = os.path.join(DB_DIR, f.read().strip())
+    except FileNotFoundError:
+        return None
+    return path if os.path.exists(path) else None
+
+
+def _is_stale(db, files) -> bool:
+    """
+    Cheap check (no hashing): any file added / removed / resized / touched?
+    """
+    try:
+        manifest = _manifest(db)
+    except duckdb.Error:
+        return True
+
+    current = {os.path.splitext(f)[0].lower(): f for f in files}
+    if set(manifest) != set(current):
+        return True
+
+    for table_name, file in current.items():
+        stat = os.stat(os.path.join(DATA_DIR, file))
+        known = manifest[table_name]
+        if known["size"] != stat.st_size or known["mtime"] != stat.st_mtime:
+            return True
+    return False
+
+
+def _build_cache(files, base=None):
+    """
+    Sync ./data into a private copy of `base` (unchanged tables are
+    carried over), then publish it atomically. Returns (path, changes).
+    """
+    os.makedirs(DB_DIR, exist_ok=True)
+    name = f"{GENERATION_PREFIX}{time.time_ns()}-{os.getpid()}.duckdb"
+    path = os.path.join(DB_DIR, name)
+    tmp = path + ".tmp"
+
+    try:
+        if base:
+            shutil.copyfile(base, tmp)
+
+        builder = duckdb.connect(tmp, config=_engine_config())
+        try:
+            changes = _sync_files(builder, files)
+        finally:
+            builder.close()
+
+        os.replace(tmp, path)
+    finally:
+        for leftover in (tmp, tmp + ".wal"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    # Publish + cleanup as one step across processes: a worker that just
+    # read CURRENT may still be attaching to the generation it named
+    with _cache_lock():
+        previous = _current_cache()
+
+        pointer_tmp = f"{POINTER_PATH}.{os.getpid()}.tmp"
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(pointer_tmp, POINTER_PATH)
 
-        # -------------------------------
-        # Read File
-        # -------------------------------
-        if file.lower().endswith(".csv"):
-            df = pd.read_csv(file_path)
+        _remove_old_generations(keep={path, previous})
+    return path, changes
 
-        elif file.lower().endswith((".xlsx", ".xls")):
-            df = pd.read_excel(file_path)
 
+@contextmanager
+def _cache_lock():
+    """
+    Exclusive inter-process lock on the cache directory.
+    """
+    with open(LOCK_PATH, "a+") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
         else:
-            continue
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _remove_old_generations(keep):
+    """
+    Deletes every generation except `keep` (the new one and the one
+    CURRENT named before it). Call under _cache_lock().
+    Best effort: files still open elsewhere (Windows) stay until next time.
+    """
+    for file in os.listdir(DB_DIR):
+        old = os.path.join(DB_DIR, file)
+        if file.startswith(GENERATION_PREFIX) and file.endswith(".duckdb") and old not in keep:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
 
-        # Normalize columns
-        df.columns = df.columns.str.lower().str.replace(" ", "_")
+def _serve(files):
+    """
+    Attach to an up-to-date generation (building one if needed).
+    Returns (connection, in_memory, changes).
+    """
+    changes = {"added": [], "changed": [], "removed": []}
+    current = _current_cache()
+
+    if current:
+        db, in_memory = _attach(current)
+        if in_memory or not _is_stale(db, files):
+            if in_memory:
+                changes = _sync_files(db, files)
+            return db, in_memory, changes
+        db.close()
+
+    path, changes = _build_cache(files, base=current)
+    db, in_memory = _attach(path)
+    if in_memory:
+        _sync_files(db, files)
+    return db, in_memory, changes
 
-        # Register table
-        con.register(table_name, df)
 
-        # Save metadata
-        TABLES.append(table_name)
-        TABLE_COLUMNS[table_name] = df.columns.tolist()
+def _refresh_metadata():
+    tables = sorted(_manifest())
 
-        print(f"✅ Registered table: {table_name} ({len(df)} rows)\n")
+    columns = {}
+    for table_name in tables:
+        columns[table_name] = [
+            c[0] for c in con.execute(f'DESCRIBE "{table_name}"').fetchall()
+        ]
+
+    # Mutate in place (other modules hold references to these objects).
+    # Order matters for concurrent readers iterating TABLES and indexing
+    # TABLE_COLUMNS: add columns first, swap the list, then drop stale keys.
+    TABLE_COLUMNS.update(columns)
+    TABLES[:] = tables
+    for stale in set(TABLE_COLUMNS) - set(tables):
+        TABLE_COLUMNS.pop(stale, None)
+
+
+def _dataset_files():
+    if not os.path.exists(DATA_DIR):
+        raise FileNotFoundError(f"❌ Data folder not found: {DATA_DIR}")
+
+    return [
+        f for f in os.listdir(DATA_DIR)
+        if f.lower().endswith(SUPPORTED_FILES)
+    ]
+
+
+# -------------------------------
+# Load All Files into DuckDB
+# -------------------------------
+def load_datasets():
+    """
+    Syncs all CSV + Excel files from ./data folder into the
+    persistent DuckDB cache (read-only workers just attach to it).
+    """
+    global con, _in_memory, _data_version
+
+    current = _current_cache()
+    if READ_ONLY and current:
+        print(f"\n🔒 Using pre-built dataset cache (read-only): {current}\n")
+        con, _in_memory = _attach(current)
+        if _in_memory:
+            _sync_files(con, _dataset_files())
+    else:
+        files = _dataset_files()
+
+        if not files:
+            raise FileNotFoundError("❌ No dataset files found inside ./data")
+
+        print(f"\n✅ Found {len(files)} dataset file(s): {files}\n")
+        con, _in_memory, _ = _serve(files)
+
+    _refresh_metadata()
+    _data_version += 1
+
+    # In-memory employee entity index (ids / names) + precomputed aggregates
+    employee_index.rebuild(con, TABLES)
+    employee_materialization.rebuild(con, TABLES)
 
     print("🎉 All datasets loaded successfully!\n")
 
 
+# -------------------------------
+# Hot reload (after /upload)
+# -------------------------------
+def reload_datasets():
+    """
+    Re-sync ./data without a restart. Only new / changed / removed files
+    are touched, in a NEW generation file; `con` is swapped afterwards,
+    so in-flight queries keep reading the previous generation.
+    """
+    global con, _in_memory, _data_version
+
+    if READ_ONLY:
+        print("⚠️ Dataset cache is read-only in this worker, reload skipped")
+        return {"added": [], "changed": [], "removed": []}
+
+    with _reload_lock:
+        files = _dataset_files()
+
+        if _in_memory:
+            cursor = con.cursor()
+            try:
+                changes = _sync_files(cursor, files)
+            finally:
+                cursor.close()
+        elif _is_stale(con, files):
+            con, _in_memory, changes = _serve(files)
+        else:
+            changes = {"added": [], "changed": [], "removed": []}
+
+        affected = changes["added"] + changes["changed"] + changes["removed"]
+        if not affected:
+            print("⚡ Datasets unchanged, nothing to reload")
+            return changes
+
+        _refresh_metadata()
+        _data_version += 1
+
+        if EMPLOYEE_TABLE in affected:
+            employee_index.rebuild(con, TABLES)
+            employee_materialization.rebuild(con, TABLES)
+
+        print(f"🔄 Datasets reloaded (version {_data_version}): {changes}")
+        return changes
+
+
 # -------------------------------
 # Load at Startup
 # -------------------------------
@@ -0,0 +1,170 @@
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+from rapidfuzz import process, fuzz
+
+from logger import get_logger
+logger = get_logger("ENTITY_INDEX")
+
+EMPLOYEE_TABLE = "employee"
+ID_COLUMN = "employeeid"
+NAME_COLUMN = "employeename"
+
+FUZZY_SCORE_CUTOFF = 88
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(re.sub(r"[^a-z ]", " ", str(name).lower()).split())
+
+
+def _to_python(value):
+    return value.item() if hasattr(value, "item") else value
+
+
+class _Snapshot:
+    """
+    One immutable generation of the index (swapped atomically on rebuild,
+    so in-flight lookups never see half-built maps).
+    """
+
+    __slots__ = ("columns", "by_id", "by_name", "sorted_names")
+
+    def __init__(self, columns=None, by_id=None, by_name=None):
+        self.columns: Dict[str, Any] = columns or {}
+        self.by_id: Dict[int, int] = by_id or {}
+        self.by_name: Dict[str, List[int]] = by_name or {}
+        self.sorted_names: List[str] = sorted(self.by_name)
+
+
+class EmployeeIndex:
+    """
+    In-memory employee entity index (built from DuckDB on data load).
+
+    - by_id: employeeid → row position (O(1))
+    - by_name: normalised name → row positions (O(1))
+    - rapidfuzz candidates for misspelt names
+    - columnar row storage (one array per column)
+    """
+
+    def __init__(self):
+        self._snapshot = _Snapshot()
+        self._listeners: List[Callable[[], None]] = []
+        self.version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._snapshot.by_id)
+
+    # --------------------------------------------------
+    # Build / refresh
+    # --------------------------------------------------
+    def rebuild(self, con, tables: List[str]):
+        """
+        Rebuild from the DuckDB `employee` table (empty if absent).
+        """
+        if EMPLOYEE_TABLE not in tables:
+            self._snapshot = _Snapshot()
+            self.version += 1
+            self._notify()
+            return
+
+        df = con.execute(f"SELECT * FROM {EMPLOYEE_TABLE}").fetchdf()
+
+        columns = {c: df[c].to_numpy() for c in df.columns}
+        by_id: Dict[int, int] = {}
+        by_name: Dict[str, List[int]] = {}
+
+        skipped = 0
+
+        if ID_COLUMN in columns:
+            # Dirty ids (NULL, NaN, "N/A", 101.5) are skipped, not fatal
+            ids = pd.to_numeric(df[ID_COLUMN], errors="coerce")
+            for pos, emp_id in enumerate(ids.tolist()):
+                if pd.isna(emp_id) or emp_id != int(emp_id):
+                    skipped += 1
+                    continue
+                by_id[int(emp_id)] = pos
+
+        if NAME_COLUMN in columns:
+            for pos, name in enumerate(columns[NAME_COLUMN].tolist()):
+                if pd.isna(name):
+                    continue
+                by_name.setdefault(normalize_name(name), []).append(pos)
+
+        if skipped:
+            logger.warning(f"⚠️ Skipped {skipped} {EMPLOYEE_TABLE} row(s) with a missing or non-numeric {ID_COLUMN}")
+
+        self._snapshot = _Snapshot(columns, by_id, by_name)
+        self.version += 1
+
+        logger.info(f"✅ Employee index built: {len(by_id)} ids, {len(by_name)} names")
+        self._notify()
+
+    def on_refresh(self, callback: Callable[[], None]):
+        """
+        Register a cache-invalidation hook (called after every rebuild).
+        """
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            callback()
+
+    # --------------------------------------------------
+    # Lookups
+    # --------------------------------------------------
+    @staticmethod
+    def _row(snap: _Snapshot, pos: int, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        cols = columns or list(snap.columns)
+        return {c: _to_python(snap.columns[c][pos]) for c in cols}
+
+    def get_by_id(self, emp_id, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        snap = self._snapshot
+        try:
+            pos = snap.by_id.get(int(emp_id))
+        except (TypeError, ValueError):
+            return None
+        return None if pos is None else self._row(snap, pos, columns)
+
+    def get_by_name(self, name: str, columns: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        snap = self._snapshot
+        positions = snap.by_name.get(normalize_name(name))
+        if not positions:
+            return None
+        return self._row(snap, positions[0], columns)
+
+    def canonical_name(self, name: str) -> Optional[str]:
+        snap = self._snapshot
+        positions = snap.by_name.get(normalize_name(name))
+        if not positions:
+            return None
+        return str(snap.columns[NAME_COLUMN][positions[0]])
+
+    def fuzzy_candidates(self, name: str, limit: int = 3) -> List[str]:
+        names = self._snapshot.sorted_names
+        if not names:
+            return []
+        matches = process.extract(
+            normalize_name(name),
+            names,
+            scorer=fuzz.WRatio,
+            limit=limit,
+            score_cutoff=FUZZY_SCORE_CUTOFF
+        )
+        return [m[0] for m in matches]
+
+    def find_name_in_text(self, text: str) -> Optional[str]:
+        """
+        Scan word bigrams of the text against the name index
+        (catches lower-case names the capitalised regex misses).
+        """
+        words = normalize_name(text).split()
+        for first, last in zip(words, words[1:]):
+            canonical = self.canonical_name(f"{first} {last}")
+            if canonical:
+                return canonical
+        return None
+
+
+employee_index = EmployeeIndex()
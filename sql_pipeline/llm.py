@@ -1,9 +1,56 @@
+import os
+import time
+import threading
+
 import requests
 
-def qwen(prompt):
-    r = requests.post("http://localhost:11434/api/generate", json={
-        "model": "qwen2.5:7b-instruct",
+from logger import get_logger
+logger = get_logger("SQL_LLM")
+
+# --------------------------------------------------
+# Ollama config
+# --------------------------------------------------
+OLLAMA_URL = "http://localhost:11434/api/generate"
+SQL_MODEL = "qwen2.5:7b-instruct"
+
+# Keep the model (and its KV cache) resident between questions, so a
+# prompt sharing the previous prefix only prefills the new suffix.
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Options must be identical on every call: any change reloads the model
+# and throws the cached prefix away.
+OLLAMA_OPTIONS = {"num_ctx": int(os.getenv("OLLAMA_NUM_CTX", "4096"))}
+
+# One pooled HTTP connection per thread instead of a new socket per
+# call (requests.Session is not thread-safe; API workers share this module)
+_local = threading.local()
+
+
+def get_session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def qwen(prompt, tag: str = "sql"):
+    start = time.perf_counter()
+    r = get_session().post(OLLAMA_URL, json={
+        "model": SQL_MODEL,
         "prompt": prompt,
-        "stream": False
+        "stream": False,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+        "options": OLLAMA_OPTIONS
     })
-    return r.json()["response"]
+    data = r.json()
+
+    # Ollama durations are nanoseconds; prompt_eval_count only covers
+    # tokens that were actually prefilled (cached prefix tokens are skipped)
+    logger.info(
+        f"🧮 qwen[{tag}] prompt_tokens={data.get('prompt_eval_count', 0)} "
+        f"prefill={data.get('prompt_eval_duration', 0) / 1e6:.1f} ms "
+        f"gen_tokens={data.get('eval_count', 0)} "
+        f"gen={data.get('eval_duration', 0) / 1e6:.1f} ms "
+        f"total={(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+    return data["response"]
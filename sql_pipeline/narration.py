@@ -0,0 +1,191 @@
+import os
+import re
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from sql_pipeline.llm import qwen
+from sql_pipeline.formatting import row_strings
+
+from logger import get_logger
+logger = get_logger("NARRATION")
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+# LLM narration is optional and only for genuinely complex results
+LLM_NARRATION_ENABLED = os.getenv("SQL_LLM_NARRATION", "1") == "1"
+NARRATION_LLM_THRESHOLD = 3
+
+# Multi-row lists are truncated in the text answer
+MAX_LISTED_ROWS = 20
+
+COLUMN_LABELS = {
+    "employeeid": "employee ID",
+    "employeename": "name",
+    "dateofjoining": "date of joining",
+    "managercode": "manager code",
+    "yearsatcompany": "years at company",
+    "yearsincurrentrole": "years in current role",
+    "sickleaveslastyear": "sick leaves last year",
+    "count_star()": "count",
+}
+
+IDENTITY_COLUMNS = ("employeename", "employeeid")
+
+
+def column_label(col: str) -> str:
+    return COLUMN_LABELS.get(col.lower(), col.replace("_", " "))
+
+
+def narration_complexity(semantics: Dict[str, bool], df: pd.DataFrame) -> int:
+    """
+    Joins / subqueries / window functions need the LLM far more often
+    than plain lookups, lists and group-bys (which templates cover).
+    """
+    return (
+        2 * semantics.get("has_join", False)
+        + 2 * semantics.get("has_subquery", False)
+        + 2 * semantics.get("has_window", False)
+        + semantics.get("has_case", False)
+        + (len(df.columns) > 8)
+    )
+
+
+def needs_llm_narration(semantics: Dict[str, bool], df: pd.DataFrame) -> bool:
+    return (
+        LLM_NARRATION_ENABLED
+        and not df.empty
+        and narration_complexity(semantics, df) >= NARRATION_LLM_THRESHOLD
+    )
+
+
+# --------------------------------------------------
+# Templates
+# --------------------------------------------------
+def _subject(row: Dict) -> str:
+    name = row.get("employeename")
+    emp_id = row.get("employeeid")
+    if name is not None and emp_id is not None:
+        return f"{name} (ID {emp_id})"
+    if name is not None:
+        return str(name)
+    if emp_id is not None:
+        return f"Employee {emp_id}"
+    return ""
+
+
+def _describe_row(row: Dict) -> str:
+    subject = _subject(row)
+    facts = ", ".join(
+        f"{column_label(col)}: {value}"
+        for col, value in row.items()
+        if col not in IDENTITY_COLUMNS
+    )
+    if subject and facts:
+        return f"{subject} — {facts}"
+    return subject or facts
+
+
+def _render_list(df: pd.DataFrame) -> str:
+    rows = df.head(MAX_LISTED_ROWS).to_dict("records")
+    lines = [f"- {_describe_row(row)}" for row in rows]
+    if len(df) > MAX_LISTED_ROWS:
+        lines.append(f"… and {len(df) - MAX_LISTED_ROWS} more.")
+    return f"{len(df)} records found:\n" + "\n".join(lines)
+
+
+def _render_grouped(df: pd.DataFrame) -> str:
+    keys, value_col = list(df.columns[:-1]), df.columns[-1]
+    rows = df.head(MAX_LISTED_ROWS).to_dict("records")
+    lines = [
+        "- " + ", ".join(f"{column_label(k)} = {row[k]}" for k in keys)
+        + f": {row[value_col]}"
+        for row in rows
+    ]
+    if len(df) > MAX_LISTED_ROWS:
+        lines.append(f"… and {len(df) - MAX_LISTED_ROWS} more groups.")
+    return f"{column_label(value_col)} by {', '.join(column_label(k) for k in keys)}:\n" + "\n".join(lines)
+
+
+def render_result(idx: int, df: pd.DataFrame, semantics: Dict[str, bool]) -> str:
+    """
+    Deterministic narration. Dates are expected to be formatted already.
+    """
+    if df.empty:
+        return f"Result {idx}: No data found."
+
+    grouped = semantics.get("has_group", False) and len(df.columns) > 1
+
+    # ✅ COUNT(*) queries
+    if semantics["has_count"] and not grouped:
+        value = int(df.iloc[0, 0])
+        if semantics["has_where"]:
+            return f"Result {idx}: There are {value} records matching the condition."
+        return f"Result {idx}: There are {value} total records in the table."
+
+    # ✅ Grouped aggregates
+    if grouped:
+        return f"Result {idx}: {_render_grouped(df)}"
+
+    # ✅ Scalar aggregates (MAX / MIN / AVG / SUM)
+    for flag, word in (("has_max", "maximum"), ("has_min", "minimum"),
+                       ("has_avg", "average"), ("has_sum", "total")):
+        if semantics.get(flag) and df.shape == (1, 1):
+            return f"Result {idx}: The {word} value of {df.columns[0]} is {df.iloc[0, 0]}."
+
+    # ✅ Ranking / TOP employee queries
+    if semantics["has_order"] and semantics["has_limit"]:
+        return f"Result {idx}: " + " | ".join(row_strings(df))
+
+    # ✅ Single-row lookup
+    if len(df) == 1:
+        return f"Result {idx}: {_describe_row(df.iloc[0].to_dict())}."
+
+    # ✅ Multi-row list
+    return f"Result {idx}: {_render_list(df)}"
+
+
+# --------------------------------------------------
+# Optional LLM narration (ONE call for all pending results)
+# --------------------------------------------------
+def narrate_batch(pending: List[Tuple[int, str, pd.DataFrame]]) -> Dict[int, str]:
+    """
+    pending: (result idx, sql, df). Returns idx → narration for every
+    result the LLM answered; missing ones keep their template text.
+    """
+    blocks = "\n\n".join(
+        f"Result {idx}:\nSQL:\n{sql}\n\nSQL Result:\n{df.head(MAX_LISTED_ROWS).to_string(index=False)}"
+        for idx, sql, df in pending
+    )
+
+    prompt = f"""
+You are a SQL result narrator.
+
+STRICT RULES:
+- Describe ONLY what is shown
+- No inference
+- No policy meaning
+- No assumptions
+- FIX 28: Convert dates like "11/13/2000" to readable format "13th November 2000"
+- Write one explanation per result, each starting with "Result <n>:"
+
+{blocks}
+
+Explanations:
+"""
+
+    try:
+        response = qwen(prompt, tag="narration").strip()
+    except Exception as e:
+        logger.warning(f"⚠️ LLM narration failed, keeping templates: {e}")
+        return {}
+
+    parts = re.split(r"Result\s+(\d+)\s*:", response)
+    narrations = {}
+    for num, text in zip(parts[1::2], parts[2::2]):
+        if text.strip():
+            narrations[int(num)] = f"Result {num}:\n{text.strip()}"
+
+    logger.info(f"🗣️ LLM narrated {len(narrations)}/{len(pending)} results in one call")
+    return narrations
@@ -1,118 +1,69 @@
-from sql_pipeline.database import TABLES, TABLE_COLUMNS
+from sql_pipeline.database import TABLES, TABLE_COLUMNS, get_data_version
 from sql_pipeline.llm import qwen
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, FrozenSet, Tuple
 import re
+import time
+
+# Question analysis (requested columns, ranking metric, count-ness …)
+from router.query_plan import analyze_question, QueryPlan
+from sql_pipeline.sql_compiler import compile_sql
+from sql_pipeline.sql_templates import template_cache
+
+from logger import get_logger
+logger = get_logger("NL_TO_SQL")
 
 
 # --------------------------------------------------
-# Attribute vocabulary (planner-aligned)
+# Static prompt prefix (cached per dataset version)
 # --------------------------------------------------
-ATTRIBUTE_MAP = {
-    "name": "employeename",
-    "employee name": "employeename",
-    "id": "employeeid",
-    "employee id": "employeeid",
-    "joining date": "dateofjoining",
-    "date of joining": "dateofjoining",
-    "salary": "salary",
-    "manager": "managercode",
-    "manager code": "managercode",
-    "years at company": "yearsatcompany",
-    "years in current role": "yearsinrole"
-}
-
-
-def _extract_requested_columns(question: str, all_columns: set) -> List[str]:
+# Schema + global rules never change between questions, so they form a
+# byte-identical prefix Ollama can reuse from its KV cache. Everything
+# question-specific goes AFTER it.
+_static_prompt: Tuple[Optional[int], str, FrozenSet[str]] = (None, "", frozenset())
+
+
+def _schema_prompt() -> Tuple[str, FrozenSet[str]]:
     """
-    FIX 12 — Deterministic attribute extraction
+    (prompt prefix, all column names) for the current dataset version.
     """
-    q = question.lower()
-    cols = set()
+    global _static_prompt
 
-    for phrase, col in ATTRIBUTE_MAP.items():
-        if phrase in q and col in all_columns:
-            cols.add(col)
+    version = get_data_version()
+    if _static_prompt[0] == version:
+        return _static_prompt[1], _static_prompt[2]
 
-    # Always include identity if employee is involved
-    if any(k in q for k in ["employee", "id", "name"]):
-        if "employeeid" in all_columns:
-            cols.add("employeeid")
-        if "employeename" in all_columns:
-            cols.add("employeename")
+    schema_text = ""
+    all_columns = set()
 
-    return sorted(cols)
+    for table in TABLES:
+        cols = TABLE_COLUMNS[table]
+        schema_text += f"\nTable: {table}\nColumns: {cols}\n"
+        all_columns.update(cols)
 
+    prefix = f"""
+You are a SQL-only generator.
 
-# --------------------------------------------------
-# FIX 17: Ranking Query Detection
-# --------------------------------------------------
-RANKING_KEYWORDS = {
-    "highest", "lowest", "most", "least", "top", "bottom",
-    "maximum", "minimum", "max", "min", "best", "worst",
-    "largest", "smallest", "greatest"
-}
-
-RANKING_METRIC_MAP = {
-    "years at company": "yearsatcompany",
-    "years in current role": "yearsincurrentrole",
-    "years in role": "yearsincurrentrole",
-    "salary": "salary",
-    "sick leaves": "sickleaveslastyear",
-    "sick leave": "sickleaveslastyear",
-    "leave": "sickleaveslastyear",
-    "taken the highest sick leaves": "sickleaveslastyear",
-    "taken sick leaves": "sickleaveslastyear",
-    "has taken the highest sick": "sickleaveslastyear"
-}
-
-
-def _is_ranking_query(question: str) -> bool:
-    """Detect if question asks for ranking/extremum."""
-    q = question.lower()
-    return any(keyword in q for keyword in RANKING_KEYWORDS)
-
-
-def _detect_ranking_metric(question: str) -> Optional[str]:
-    """
-    FIX 27: Extract which column to rank by.
-    Handles complex phrasings like 'taken the highest sick leaves'.
-    """
-    q = question.lower()
-    
-    # Try exact phrase matches first (longest to shortest)
-    sorted_phrases = sorted(RANKING_METRIC_MAP.items(), key=lambda x: len(x[0]), reverse=True)
-    
-    for phrase, col in sorted_phrases:
-        if phrase in q:
-            return col
-    
-    return None
+AVAILABLE SCHEMA:
+{schema_text}
 
+ABSOLUTE RULES:
+- Output ONLY ONE SELECT statement
+- DO NOT generate multiple SELECTs
+- Use ONLY table: employee
+- NO aggregates unless explicitly asked
+- NO backticks
+- If constraint exists → MUST be applied
+"""
 
-# --------------------------------------------------
-# FIX 21: Multi-Condition Logic Detection
-# --------------------------------------------------
-def _has_multiple_entity_conditions(question: str) -> bool:
-    """
-    Detect if question has multiple attributes for SAME entity.
-    Example: "Priya Patel whose id is 82410"
-    """
-    q = question.lower()
-    
-    # Patterns indicating same-entity multiple conditions
-    has_name = bool(re.search(r"\b[A-Z][a-z]+ [A-Z][a-z]+\b", question))
-    has_id = bool(re.search(r"\b(id|employee id)\s*(?:is|=)?\s*\d+", q))
-    
-    # Keywords that indicate conjunction for same entity
-    conjunction_keywords = ["whose", "with id", "id is", "id ="]
-    has_conjunction = any(kw in q for kw in conjunction_keywords)
-    
-    return has_name and has_id and has_conjunction
+    _static_prompt = (version, prefix, frozenset(all_columns))
+    logger.info(f"🧱 Schema prompt cached for dataset version {version} ({len(prefix)} chars)")
+    return prefix, _static_prompt[2]
 
 
 def nl_to_sql(
     question: str,
-    policy_constraints: Optional[Dict[str, Any]] = None
+    policy_constraints: Optional[Dict[str, Any]] = None,
+    plan: Optional[QueryPlan] = None
 ):
     """
     FIX 12 + FIX 24 — Attribute Aggregation → Single SQL
@@ -127,26 +78,18 @@ def nl_to_sql(
     # --------------------------------------------------
     # FIX 24: Detect COUNT-only queries
     # --------------------------------------------------
-    q_lower = question.lower()
-    is_count_query = any(kw in q_lower for kw in [
-        "how many", "count", "total number", "number of"
-    ])
+    plan = plan or analyze_question(question)
+    is_count_query = plan.is_count
 
     # --------------------------------------------------
-    # 1️⃣ Build schema text
+    # 1️⃣ Schema text (cached prompt prefix)
     # --------------------------------------------------
-    schema_text = ""
-    all_columns = set()
-
-    for table in TABLES:
-        cols = TABLE_COLUMNS[table]
-        schema_text += f"\nTable: {table}\nColumns: {cols}\n"
-        all_columns.update(cols)
+    prompt_prefix, all_columns = _schema_prompt()
 
     # --------------------------------------------------
     # 2️⃣ Extract requested columns (NEW) + FIX 35
     # --------------------------------------------------
-    requested_columns = _extract_requested_columns(question, all_columns)
+    requested_columns = [c for c in plan.requested_columns if c in all_columns]
 
     # FIX 35: For COUNT queries, don't enforce specific columns
     if is_count_query:
@@ -180,12 +123,32 @@ MANDATORY POLICY CONSTRAINT (NON-NEGOTIABLE):
 - Value: {value}
 """
 
+    # --------------------------------------------------
+    # ⚡ Deterministic fast path (no LLM for fully-determined shapes)
+    # --------------------------------------------------
+    start = time.perf_counter()
+    compiled = compile_sql(question, plan, all_columns, TABLES, policy_constraints)
+    if compiled:
+        shape, tree = compiled
+        sql = tree.sql(dialect="duckdb")
+        logger.info(
+            f"SQL path=compiler shape={shape} in {(time.perf_counter() - start) * 1000:.2f} ms"
+        )
+        return sql
+
+    # 🧩 Same question shape answered before → bind the stored skeleton
+    if not policy_constraints:
+        sql = template_cache.lookup(question, plan)
+        if sql:
+            logger.info(f"SQL path=template in {(time.perf_counter() - start) * 1000:.2f} ms")
+            return sql
+
     # --------------------------------------------------
     # 4️⃣ Build enforcement rules (FIX 17 + FIX 21 + FIX 30)
     # --------------------------------------------------
     ranking_rule = ""
-    if _is_ranking_query(question):
-        metric = _detect_ranking_metric(question)
+    if plan.is_ranking:
+        metric = plan.ranking_metric
         if metric:
             ranking_rule = f"""
 🚨🚨🚨 CRITICAL - RANKING QUERY DETECTED (MANDATORY) 🚨🚨🚨
@@ -209,7 +172,7 @@ FAILURE TO FOLLOW THIS WILL CAUSE INCORRECT RESULTS!
 """
     
     multi_condition_rule = ""
-    if _has_multiple_entity_conditions(question):
+    if plan.has_multiple_entity_conditions:
         multi_condition_rule = """
 🚨 MULTI-CONDITION SAME ENTITY DETECTED:
 - When SAME employee has multiple attributes (name AND id):
@@ -237,12 +200,9 @@ FAILURE TO FOLLOW THIS WILL CAUSE INCORRECT RESULTS!
     if not is_count_query:
         column_enforcement = f"""- Columns MUST be exactly:
   {column_clause}"""
-    
-    prompt = f"""
-You are a SQL-only generator.
 
-AVAILABLE SCHEMA:
-{schema_text}
+    # Stable prefix first, question-specific rules after it
+    prompt = prompt_prefix + f"""{column_enforcement}
 
 {constraint_block}
 
@@ -252,22 +212,14 @@ AVAILABLE SCHEMA:
 
 {count_rule}
 
-ABSOLUTE RULES:
-- Output ONLY ONE SELECT statement
-- DO NOT generate multiple SELECTs
-{column_enforcement}
-- Use ONLY table: employee
-- NO aggregates unless explicitly asked
-- NO backticks
-- If constraint exists → MUST be applied
-
 QUESTION:
 {question}
 
 SQL:
 """
 
-    sql = qwen(prompt).strip()
+    sql = qwen(prompt, tag="nl_to_sql").strip()
+    logger.info(f"SQL path=llm in {(time.perf_counter() - start) * 1000:.2f} ms")
 
     # --------------------------------------------------
     # 5️⃣ Post-validation (unchanged safety)
@@ -0,0 +1,126 @@
+import os
+import re
+import hmac
+import json
+import base64
+import hashlib
+import secrets
+from typing import Iterator, Tuple
+
+import pyarrow as pa
+import sqlglot
+
+from sql_pipeline.database import stream_query, get_data_version
+
+# --------------------------------------------------
+# Config
+# --------------------------------------------------
+# Rows returned per answer / page; the rest is behind a continuation token
+RESULT_ROW_CAP = int(os.getenv("SQL_RESULT_ROW_CAP", "500"))
+
+# Arrow record batch size pulled from DuckDB
+BATCH_ROWS = 1024
+
+# Share one secret across API workers so any worker can resume a token
+_SECRET = (os.getenv("PAGINATION_SECRET") or secrets.token_hex(32)).encode()
+
+# Marker embedded in answer text; /ask lifts it into continuation_tokens
+CONTINUATION_PATTERN = re.compile(r"\s*\[\[continuation:([A-Za-z0-9_\-=.]+)\]\]")
+
+
+def continuation_marker(token: str) -> str:
+    return f"[[continuation:{token}]]"
+
+
+# --------------------------------------------------
+# Signed, stateless continuation tokens
+# --------------------------------------------------
+def _sign(payload: bytes) -> str:
+    return hmac.new(_SECRET, payload, hashlib.sha256).hexdigest()[:32]
+
+
+def make_token(sql: str, user: dict, offset: int) -> str:
+    """
+    Token = enforced (post-RBAC) SQL + offset + user scope + data version,
+    HMAC-signed so clients can neither edit the SQL nor reuse another
+    user's token.
+    """
+    payload = json.dumps({
+        "sql": sql,
+        "offset": offset,
+        "scope": [str(user.get("role")), str(user.get("emp_id"))],
+        "v": get_data_version()
+    }, separators=(",", ":")).encode()
+    body = base64.urlsafe_b64encode(payload).decode()
+    return f"{body}.{_sign(payload)}"
+
+
+def read_token(token: str, user: dict) -> dict:
+    try:
+        body, signature = token.rsplit(".", 1)
+        payload = base64.urlsafe_b64decode(body.encode())
+    except Exception:
+        raise ValueError("❌ Invalid continuation token.")
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise ValueError("❌ Invalid continuation token.")
+
+    data = json.loads(payload)
+    if data["scope"] != [str(user.get("role")), str(user.get("emp_id"))]:
+        raise ValueError("❌ Continuation token belongs to another user.")
+    if data["v"] != get_data_version():
+        raise ValueError("❌ The dataset changed since this result was produced. Please ask again.")
+    return data
+
+
+# --------------------------------------------------
+# Lazy, bounded fetch
+# --------------------------------------------------
+def _paged_sql(sql: str, offset: int) -> str:
+    """
+    Every page of a result runs the same ordered query, otherwise OFFSET
+    may repeat or skip rows. Unordered SQL gets ORDER BY ALL (every
+    projected column), including on the first page.
+    """
+    try:
+        ordered = sqlglot.parse_one(sql, dialect="duckdb").args.get("order") is not None
+    except sqlglot.errors.ParseError:
+        ordered = False
+
+    if ordered and not offset:
+        return sql
+
+    paged = f"SELECT * FROM ({sql}) AS _page"
+    if not ordered:
+        paged += " ORDER BY ALL"
+    if offset:
+        paged += f" OFFSET {int(offset)}"
+    return paged
+
+
+def fetch_capped(sql: str, offset: int = 0, cap: int = RESULT_ROW_CAP) -> Tuple[pa.Table, bool]:
+    """
+    Pull record batches only until cap + 1 rows are seen, so memory is
+    bounded by the page size, not the table size.
+    Returns (page, has_more). Raises TimeoutError past the query timeout.
+    """
+    with stream_query(_paged_sql(sql, offset), BATCH_ROWS) as reader:
+        batches, rows = [], 0
+        for batch in reader:
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows > cap:
+                break
+        schema = reader.schema
+
+    table = pa.Table.from_batches(batches, schema=schema)
+    return table.slice(0, cap), rows > cap
+
+
+def iter_record_batches(sql: str, offset: int = 0) -> Iterator[pa.RecordBatch]:
+    """
+    Streams the remaining rows batch by batch (for NDJSON responses).
+    """
+    with stream_query(_paged_sql(sql, offset), BATCH_ROWS) as reader:
+        for batch in reader:
+            yield batch
@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import pyarrow as pa
+import sqlglot
+
+from logger import get_logger
+logger = get_logger("RESULT_CACHE")
+
+# Total Arrow bytes kept across all cached results
+MAX_RESULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Single results larger than this are never cached
+MAX_RESULT_BYTES = 8 * 1024 * 1024
+
+CacheKey = Tuple[str, str, str, int]
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Canonical SQL text (whitespace, keyword case, identifier case),
+    so trivially different LLM outputs share one entry.
+    """
+    try:
+        return sqlglot.parse_one(sql, read="duckdb").sql(dialect="duckdb", normalize=True)
+    except Exception:
+        return " ".join(sql.split())
+
+
+def cache_key(sql: str, user: dict, data_version: int) -> CacheKey:
+    """
+    SQL is the post-RBAC text; user scope is still part of the key
+    so a role change can never be served another scope's rows.
+    """
+    return (
+        normalize_sql(sql),
+        str(user.get("role")),
+        str(user.get("emp_id")),
+        data_version
+    )
+
+
+class ResultCache:
+    """
+    Byte-bounded LRU of Arrow tables keyed by (normalised SQL, role,
+    emp_id, data version). Entries from older data versions are never
+    hit again and age out through normal eviction.
+    """
+
+    def __init__(self, max_bytes: int = MAX_RESULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, pa.Table]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: CacheKey) -> Optional[pa.Table]:
+        with self._lock:
+            table = self._entries.get(key)
+            if table is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return table
+
+    def put(self, key: CacheKey, table: pa.Table):
+        size = table.nbytes
+        if size > MAX_RESULT_BYTES:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+
+            self._entries[key] = table
+            self._bytes += size
+
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+result_cache = ResultCache()
@@ -0,0 +1,143 @@
+import re
+import threading
+from typing import Dict, Optional
+
+from rapidfuzz import process
+from sqlglot.dialects.duckdb import DuckDB
+
+from router.keywords import ATTRIBUTE_MAP, RANKING_METRIC_MAP
+from sql_pipeline.database import TABLES, TABLE_COLUMNS
+
+from logger import get_logger
+logger = get_logger("SCHEMA_INDEX")
+
+# Same thresholds the token-level fixers always used
+COLUMN_FUZZY_CUTOFF = 90
+TABLE_FUZZY_CUTOFF = 80
+
+# LLM table-name slips that may be corrected (see fix_table_names)
+TABLE_TYPOS = ("employees", "employee", "staff", "workers")
+
+# Keywords + function names are never identifiers worth fixing
+SQL_WORDS = frozenset(
+    {k.lower() for k in DuckDB.Tokenizer.KEYWORDS if k.replace("_", "").isalpha()}
+    | {f.lower() for f in DuckDB.Parser.FUNCTIONS}
+)
+
+
+def _squash(name: str) -> str:
+    """
+    "Date Of Joining" / "date_of_joining" / "dateofjoining" → "dateofjoining"
+    """
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+
+def _snake(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+class SchemaIndex:
+    """
+    Column / table alias index for ONE schema version.
+
+    - exact names, snake_case and squashed variants
+    - ATTRIBUTE_MAP / RANKING_METRIC_MAP phrases
+    - fuzzy neighbours of phrase targets that are not real columns
+      (precomputed at build time)
+    - memoised fuzzy fallback for genuinely unknown identifiers only
+    """
+
+    def __init__(self, tables, table_columns):
+        self.tables = frozenset(t.lower() for t in tables)
+        self.columns = frozenset(c for cols in table_columns.values() for c in cols)
+
+        self.column_aliases: Dict[str, Optional[str]] = {}
+        self.table_aliases: Dict[str, Optional[str]] = {}
+        self._fuzzy_memo: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+        for col in self.columns:
+            for alias in (col, col.lower(), _snake(col), _squash(col)):
+                self.column_aliases.setdefault(alias, col)
+
+        for phrase, target in {**ATTRIBUTE_MAP, **RANKING_METRIC_MAP}.items():
+            resolved = self.column_aliases.get(_squash(target)) or self._fuzzy_column(target)
+            if resolved is None:
+                continue
+            for alias in (_snake(phrase), _squash(phrase), _squash(target)):
+                self.column_aliases.setdefault(alias, resolved)
+
+        for table in self.tables:
+            self.table_aliases[table] = table
+            self.table_aliases.setdefault(table + "s", table)
+
+        for typo in TABLE_TYPOS:
+            if typo not in self.table_aliases:
+                self.table_aliases[typo] = self._fuzzy(typo, self.tables, TABLE_FUZZY_CUTOFF)
+
+    # --------------------------------------------------
+    # Fuzzy helpers
+    # --------------------------------------------------
+    @staticmethod
+    def _fuzzy(token: str, choices, cutoff: int) -> Optional[str]:
+        if not choices:
+            return None
+        match = process.extractOne(token, choices)
+        if match and match[1] > cutoff:
+            return match[0]
+        return None
+
+    def _fuzzy_column(self, token: str) -> Optional[str]:
+        return self._fuzzy(token.lower(), self.columns, COLUMN_FUZZY_CUTOFF)
+
+    # --------------------------------------------------
+    # Lookups
+    # --------------------------------------------------
+    def resolve_column(self, token: str) -> Optional[str]:
+        """
+        Real column for an identifier, or None if it should be left alone.
+        """
+        t = token.lower()
+        hit = self.column_aliases.get(t)
+        if hit is not None:
+            return hit
+        if t in SQL_WORDS or t in self.tables:
+            return None
+
+        hit = self.column_aliases.get(_squash(t))
+        if hit is not None:
+            return hit
+
+        with self._lock:
+            if t not in self._fuzzy_memo:
+                self._fuzzy_memo[t] = self._fuzzy_column(t)
+            return self._fuzzy_memo[t]
+
+    def resolve_table(self, token: str) -> Optional[str]:
+        return self.table_aliases.get(token.lower())
+
+
+# --------------------------------------------------
+# One index per schema version
+# --------------------------------------------------
+_current: Dict[str, object] = {"fingerprint": None, "index": None}
+_build_lock = threading.Lock()
+
+
+def get_schema_index() -> SchemaIndex:
+    fingerprint = (
+        tuple(TABLES),
+        tuple((t, tuple(cols)) for t, cols in TABLE_COLUMNS.items())
+    )
+    index = _current["index"]
+    if index is not None and _current["fingerprint"] == fingerprint:
+        return index
+
+    with _build_lock:
+        if _current["fingerprint"] != fingerprint:
+            _current["index"] = SchemaIndex(TABLES, TABLE_COLUMNS)
+            _current["fingerprint"] = fingerprint
+            logger.info(
+                f"✅ Schema alias index built: {len(_current['index'].column_aliases)} column aliases"
+            )
+        return _current["index"]
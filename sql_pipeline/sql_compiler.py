@@ -0,0 +1,457 @@
+import re
+import time
+import argparse
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlglot import exp, select
+
+from router.keywords import ATTRIBUTE_MAP, RANKING_METRIC_MAP
+from router.query_plan import analyze_question, QueryPlan
+
+
+# --------------------------------------------------
+# Deterministic SQL compiler (LLM bypass)
+# --------------------------------------------------
+# Emits sqlglot ASTs for question shapes that the QueryPlan already
+# fully determines. Anything else returns None → LLM path.
+
+EMPLOYEE_TABLE = "employee"
+IDENTITY_COLUMNS = ["employeeid", "employeename"]
+
+# Direction words, matched on WHOLE words ("min" ≠ "administration")
+HIGH_RANKING_WORDS = {"highest", "most", "maximum", "max", "top", "best", "largest", "greatest"}
+LOW_RANKING_WORDS = {"lowest", "least", "minimum", "min", "bottom", "worst", "smallest"}
+
+# "what is the maximum salary" → MAX(salary), not a top-1 row
+AGGREGATE_WORDS = {
+    "maximum": "MAX", "max": "MAX", "highest": "MAX",
+    "minimum": "MIN", "min": "MIN", "lowest": "MIN",
+    "average": "AVG", "avg": "AVG", "mean": "AVG",
+}
+
+# Any of these → the question asks for employees (rows), not a value
+PERSON_WORDS = {
+    "who", "whom", "which", "employee", "employees", "staff",
+    "people", "person", "persons", "workers", "name", "names"
+}
+
+ORDINALS = {
+    "second": 2, "third": 3, "fourth": 4, "fifth": 5,
+    "sixth": 6, "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10
+}
+
+MAX_RANKING_LIMIT = 100
+
+OPERATOR_PHRASES = [
+    ("greater than or equal to", ">="),
+    ("less than or equal to", "<="),
+    ("at least", ">="),
+    ("at most", "<="),
+    ("more than", ">"),
+    ("greater than", ">"),
+    ("exceeding", ">"),
+    ("above", ">"),
+    ("over", ">"),
+    ("less than", "<"),
+    ("fewer than", "<"),
+    ("below", "<"),
+    ("under", "<"),
+    ("equal to", "="),
+    ("equals", "="),
+    (">=", ">="),
+    ("<=", "<="),
+    (">", ">"),
+    ("<", "<"),
+    ("=", "="),
+]
+
+_OPS = {
+    ">": exp.GT, ">=": exp.GTE, "<": exp.LT, "<=": exp.LTE, "=": exp.EQ
+}
+
+COUNT_PHRASES = ["total number of", "number of", "how many", "count of", "count"]
+
+# Words that carry no slot of their own. A compiled shape must account
+# for every OTHER word of the question, or the LLM gets it: "in the
+# sales department", "female", "in 2023", "and 102" all stay behind.
+FILLER_WORDS = frozenset({
+    "a", "an", "the", "is", "are", "was", "were", "be", "s",
+    "of", "for", "in", "on", "at", "to", "with", "by", "from", "among", "and",
+    "what", "whats", "who", "whom", "whose", "which", "how",
+    "do", "does", "did", "we", "have", "has", "had", "there",
+    "me", "give", "show", "list", "get", "find", "tell", "display", "please",
+    "all", "our", "their", "his", "her", "its", "value", "details",
+    "employee", "employees", "staff", "worker", "workers", "people",
+    "person", "persons", "record", "records", "company", "id", "emp",
+})
+
+# Policy-constrained questions: the constraint itself is the filter
+POLICY_SLOT_PHRASES = [
+    "as per", "according to", "based on", "more than allowed", "above allowed",
+    "policy", "policies", "rule", "rules", "allowed", "limit", "limits",
+    "permitted", "threshold", "maximum", "exceeded", "exceed", "exceeding",
+    "crossed", "beyond", "days", "taken",
+]
+
+LIST_PREFIXES = ("list", "show", "which", "who", "give me", "get")
+
+_WORD = re.compile(r"[a-z0-9]+(?:\.\d+)?")
+
+
+def _phrase_pattern(phrases: Iterable[str]) -> "re.Pattern":
+    """
+    Whole-word alternation, longest phrase first.
+    """
+    ordered = sorted(set(phrases), key=len, reverse=True)
+    return re.compile(r"(?<![a-z0-9])(" + "|".join(re.escape(p) for p in ordered) + r")(?![a-z0-9])")
+
+
+METRIC_PATTERN = _phrase_pattern(RANKING_METRIC_MAP)
+ATTRIBUTE_PATTERN = _phrase_pattern(ATTRIBUTE_MAP)
+COUNT_PATTERN = _phrase_pattern(COUNT_PHRASES)
+
+FILTER_PATTERN = re.compile(
+    r"(?<![a-z0-9])(" + "|".join(re.escape(p) for p in sorted(set(RANKING_METRIC_MAP) | set(ATTRIBUTE_MAP), key=len, reverse=True)) + r")"
+    r"\s+(?:is\s+|are\s+|of\s+)?"
+    r"(" + "|".join(re.escape(p) for p, _ in OPERATOR_PHRASES) + r")"
+    r"\s*(\d+(?:\.\d+)?)\b"
+)
+
+TOP_N_PATTERN = re.compile(
+    r"\b(?:top|bottom|first|last)\s+(\d+)\b"
+    r"|\b(\d+)\s+(?:employees|people|staff|workers|persons)\b"
+)
+ORDINAL_PATTERN = re.compile(r"\b(" + "|".join(ORDINALS) + r"|\d+(?:st|nd|rd|th))\b")
+
+BARE_COUNT_PATTERN = re.compile(
+    r"^\s*(?:how many|total number of|number of|count(?: of)?)\s+"
+    r"(?:employees|records|staff|workers)"
+    r"(?:\s+(?:are there|are there in (?:the )?company|in (?:the )?company|do we have|we have))?"
+    r"\s*\??\s*$"
+)
+
+
+def _condition(column: str, operator: str, value: Any) -> exp.Expression:
+    if isinstance(value, str) and not re.fullmatch(r"\d+(?:\.\d+)?", value):
+        literal = exp.Literal.string(value)
+    else:
+        literal = exp.Literal.number(value)
+    return _OPS[operator](this=exp.column(column), expression=literal)
+
+
+def _words(q: str) -> Set[str]:
+    return set(_WORD.findall(q))
+
+
+def _leftover(q: str, consumed: Iterable[str]) -> Set[str]:
+    """
+    Words of the question NOT explained by a slot (or filler).
+    """
+    text = q
+    for phrase in sorted({c for c in consumed if c}, key=len, reverse=True):
+        text = re.sub(r"(?<![a-z0-9])" + re.escape(phrase) + r"(?![a-z0-9])", " ", text)
+    return _words(text) - FILLER_WORDS
+
+
+def _numeric_filter(q: str, all_columns: Set[str]) -> Optional[Tuple[Tuple[str, str, str], str]]:
+    """
+    Exactly ONE "<metric> <operator> <number>" filter → (condition, matched text).
+    """
+    matches = list(FILTER_PATTERN.finditer(q))
+    if len(matches) != 1:
+        return None
+
+    phrase, op_phrase, value = matches[0].groups()
+    column = RANKING_METRIC_MAP.get(phrase) or ATTRIBUTE_MAP.get(phrase)
+    if column not in all_columns:
+        return None
+
+    operator = dict(OPERATOR_PHRASES)[op_phrase]
+    return (column, operator, value), matches[0].group(0)
+
+
+def _single_metric(q: str, all_columns: Set[str]) -> Optional[Tuple[str, List[str]]]:
+    """
+    The one ranking metric the question names (every metric phrase must
+    map to the same column) plus every phrase naming it, so overlapping
+    spellings ("has taken the highest sick" / "sick leaves") are consumed.
+    """
+    columns = {RANKING_METRIC_MAP[p] for p in METRIC_PATTERN.findall(q)}
+    if len(columns) != 1:
+        return None
+    column = columns.pop()
+    if column not in all_columns:
+        return None
+    return column, [p for p, c in RANKING_METRIC_MAP.items() if c == column]
+
+
+def _limit_offset(q: str) -> Optional[Tuple[int, int, List[str]]]:
+    """
+    (LIMIT, OFFSET, consumed text): "top 5" → 5, 0; "second highest" → 1, 1.
+    None when the count is ambiguous or out of range.
+    """
+    counts = list(TOP_N_PATTERN.finditer(q))
+    ordinals = ORDINAL_PATTERN.findall(q)
+    if len(counts) + len(ordinals) > 1:
+        return None
+
+    if counts:
+        n = int(counts[0].group(1) or counts[0].group(2))
+        if not 1 <= n <= MAX_RANKING_LIMIT:
+            return None
+        return n, 0, [counts[0].group(0)]
+
+    if ordinals:
+        word = ordinals[0]
+        rank = ORDINALS.get(word) or int(re.match(r"\d+", word).group(0))
+        if not 1 <= rank <= MAX_RANKING_LIMIT:
+            return None
+        return 1, rank - 1, [word]
+
+    return 1, 0, []
+
+
+def _attributes_covered(plan: QueryPlan, all_columns: Set[str]) -> bool:
+    """
+    Every employee attribute mentioned must map to a real column,
+    otherwise the compiled SELECT would silently drop it.
+    """
+    phrases = plan.keywords.get("attribute_phrase")
+    if any(ATTRIBUTE_MAP[p] not in all_columns for p in phrases):
+        return False
+
+    for attr in plan.keywords.get("employee_attribute"):
+        if attr in {"employeeid", "employeename"}:
+            continue
+        if not any(p in attr or attr in p for p in phrases):
+            return False
+    return True
+
+
+# --------------------------------------------------
+# Shapes (each returns None unless it explains the WHOLE question)
+# --------------------------------------------------
+def _compile_policy_constrained(plan, q, policy_constraints, all_columns):
+    column = policy_constraints.get("column")
+    operator = policy_constraints.get("operator")
+    value = policy_constraints.get("value")
+
+    if column not in all_columns or operator not in _OPS or value is None:
+        return None
+    if plan.has_entity:
+        return None
+
+    metric_phrases = [
+        p for p in METRIC_PATTERN.findall(q) + ATTRIBUTE_PATTERN.findall(q)
+        if RANKING_METRIC_MAP.get(p, ATTRIBUTE_MAP.get(p)) == column
+    ]
+    is_count = bool(COUNT_PATTERN.search(q))
+    if _leftover(q, metric_phrases + POLICY_SLOT_PHRASES + COUNT_PHRASES + ["sick", "leaves"]):
+        return None
+
+    where = _condition(column, operator, value)
+
+    if is_count:
+        return "count_policy_threshold", select("COUNT(*)").from_(EMPLOYEE_TABLE).where(where)
+
+    return "list_policy_threshold", (
+        select(*IDENTITY_COLUMNS, column).from_(EMPLOYEE_TABLE).where(where)
+    )
+
+
+def _compile_lookup(plan, q, all_columns):
+    if not plan.has_entity or COUNT_PATTERN.search(q):
+        return None
+    if _words(q) & (HIGH_RANKING_WORDS | LOW_RANKING_WORDS):
+        return None
+    if not _attributes_covered(plan, all_columns):
+        return None
+
+    columns = [c for c in plan.requested_columns if c in all_columns]
+    if not columns:
+        return None
+
+    consumed = [p for p in ATTRIBUTE_PATTERN.findall(q) if ATTRIBUTE_MAP[p] in columns]
+    consumed += [plan.employeeid, (plan.employeename or "").lower()]
+    # "employee id 101 and 102", "… who joined after 2020" → LLM
+    if _leftover(q, consumed):
+        return None
+
+    conditions = []
+    if plan.employeeid:
+        conditions.append(_condition("employeeid", "=", plan.employeeid))
+    if plan.employeename and (plan.has_multiple_entity_conditions or not plan.employeeid):
+        conditions.append(_condition("employeename", "=", plan.employeename))
+
+    query = select(*columns).from_(EMPLOYEE_TABLE)
+    for condition in conditions:
+        query = query.where(condition)
+
+    return "attribute_lookup", query
+
+
+def _compile_aggregate(plan, q, all_columns):
+    if plan.has_entity or _words(q) & PERSON_WORDS:
+        return None
+
+    funcs = {AGGREGATE_WORDS[w] for w in _words(q) & set(AGGREGATE_WORDS)}
+    metric = _single_metric(q, all_columns)
+    if len(funcs) != 1 or metric is None:
+        return None
+
+    column, phrases = metric
+    if _leftover(q, phrases + list(AGGREGATE_WORDS)):
+        return None
+
+    func = funcs.pop()
+    return f"{func.lower()}_aggregate", select(f"{func}({column})").from_(EMPLOYEE_TABLE)
+
+
+def _compile_ranking(plan, q, all_columns):
+    if plan.has_entity or COUNT_PATTERN.search(q):
+        return None
+
+    words = _words(q)
+    high, low = words & HIGH_RANKING_WORDS, words & LOW_RANKING_WORDS
+    if bool(high) == bool(low):
+        return None
+
+    metric = _single_metric(q, all_columns)
+    limits = _limit_offset(q)
+    if metric is None or limits is None:
+        return None
+
+    column, phrases = metric
+    limit, offset, limit_text = limits
+    if _leftover(q, phrases + limit_text + sorted(high | low)):
+        return None
+
+    query = (
+        select(*IDENTITY_COLUMNS, column)
+        .from_(EMPLOYEE_TABLE)
+        .order_by(exp.Ordered(this=exp.column(column), desc=bool(high)))
+        .limit(limit)
+    )
+    if offset:
+        query = query.offset(offset)
+
+    shape = "top1_ranking" if (limit, offset) == (1, 0) else "topn_ranking"
+    return shape, query
+
+
+def _compile_count(plan, q, all_columns):
+    if plan.has_entity or not COUNT_PATTERN.search(q):
+        return None
+
+    if BARE_COUNT_PATTERN.match(q):
+        return "count_all", select("COUNT(*)").from_(EMPLOYEE_TABLE)
+
+    numeric = _numeric_filter(q, all_columns)
+    if not numeric or _leftover(q, [numeric[1]] + COUNT_PHRASES):
+        return None
+    return "count_filter", (
+        select("COUNT(*)").from_(EMPLOYEE_TABLE).where(_condition(*numeric[0]))
+    )
+
+
+def _compile_list_filter(plan, q, all_columns):
+    if plan.has_entity or COUNT_PATTERN.search(q):
+        return None
+    if _words(q) & (HIGH_RANKING_WORDS | LOW_RANKING_WORDS):
+        return None
+    if not q.lstrip().startswith(LIST_PREFIXES):
+        return None
+
+    numeric = _numeric_filter(q, all_columns)
+    if not numeric or _leftover(q, [numeric[1]]):
+        return None
+
+    condition = numeric[0]
+    return "list_filter", (
+        select(*IDENTITY_COLUMNS, condition[0]).from_(EMPLOYEE_TABLE).where(_condition(*condition))
+    )
+
+
+def compile_sql(
+    question: str,
+    plan: QueryPlan,
+    all_columns: Iterable[str],
+    tables: Iterable[str],
+    policy_constraints: Optional[Dict[str, Any]] = None
+) -> Optional[Tuple[str, exp.Expression]]:
+    """
+    Returns (shape, sqlglot AST) for fully-determined questions,
+    or None when the question needs the LLM.
+    """
+    if EMPLOYEE_TABLE not in tables:
+        return None
+
+    all_columns = set(all_columns)
+    q = " ".join(question.lower().split())
+
+    if policy_constraints:
+        return _compile_policy_constrained(plan, q, policy_constraints, all_columns)
+
+    return (
+        _compile_aggregate(plan, q, all_columns)
+        or _compile_ranking(plan, q, all_columns)
+        or _compile_count(plan, q, all_columns)
+        or _compile_lookup(plan, q, all_columns)
+        or _compile_list_filter(plan, q, all_columns)
+    )
+
+
+# --------------------------------------------------
+# Coverage report over question logs
+# --------------------------------------------------
+_LOGGED_QUESTION = re.compile(
+    r"(?:\| ROUTER \| Detecting intent for: (.+)$)|(?:Received Question: '(.+)' \| User)"
+)
+_LOGGED_PATH = re.compile(r"\| NL_TO_SQL \| SQL path=(\w+) .*?in ([\d.]+) ms")
+
+
+def coverage_report(log_path: str):
+    from sql_pipeline.database import TABLES, TABLE_COLUMNS
+
+    all_columns = set()
+    for table in TABLES:
+        all_columns.update(TABLE_COLUMNS[table])
+
+    questions, path_latency = [], {}
+    with open(log_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            q_match = _LOGGED_QUESTION.search(line)
+            if q_match:
+                questions.append((q_match.group(1) or q_match.group(2)).strip())
+            p_match = _LOGGED_PATH.search(line)
+            if p_match:
+                path_latency.setdefault(p_match.group(1), []).append(float(p_match.group(2)))
+
+    questions = list(dict.fromkeys(questions))
+    if not questions:
+        print(f"⚠️ No questions found in {log_path}")
+        return
+
+    shapes: Dict[str, int] = {}
+    compiled = 0
+    start = time.perf_counter()
+    for q in questions:
+        result = compile_sql(q, analyze_question(q), all_columns, TABLES)
+        if result:
+            compiled += 1
+            shapes[result[0]] = shapes.get(result[0], 0) + 1
+    compile_ms = (time.perf_counter() - start) * 1000 / len(questions)
+
+    print(f"📊 Compiler coverage: {compiled}/{len(questions)} questions ({compiled / len(questions):.1%})")
+    for shape, count in sorted(shapes.items(), key=lambda x: -x[1]):
+        print(f"   {shape:<24} {count}")
+    print(f"⏱️ Compiler path: {compile_ms:.3f} ms / question (measured now)")
+    for path, values in path_latency.items():
+        print(f"⏱️ Logged {path} path: mean {sum(values) / len(values):.1f} ms over {len(values)} queries")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic SQL compiler coverage report")
+    parser.add_argument("--log", default="logs/app.log")
+    args = parser.parse_args()
+    coverage_report(args.log)
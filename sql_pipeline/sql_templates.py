@@ -0,0 +1,226 @@
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import sqlglot
+from sqlglot import exp
+
+from router.keywords import ATTRIBUTE_MAP, RANKING_METRIC_MAP
+from router.query_plan import QueryPlan
+from sql_pipeline.database import TABLE_COLUMNS
+
+from logger import get_logger
+logger = get_logger("SQL_TEMPLATES")
+
+MAX_TEMPLATES = 512
+
+IDENTITY_COLUMNS = {"employeeid", "employeename"}
+
+# Column phrases that become {colN} slots (identity phrases stay literal)
+_COLUMN_PHRASES = sorted(
+    {p for p, c in {**RANKING_METRIC_MAP, **ATTRIBUTE_MAP}.items() if c not in IDENTITY_COLUMNS},
+    key=len,
+    reverse=True
+)
+_COLUMN_PATTERN = re.compile(r"\b(" + "|".join(re.escape(p) for p in _COLUMN_PHRASES) + r")\b")
+_NUMBER_PATTERN = re.compile(r"\b\d+(?:\.\d+)?\b")
+
+# slot name → (kind, value); kind ∈ {"number", "string", "column"}
+Params = Dict[str, Tuple[str, str]]
+
+
+# --------------------------------------------------
+# Question canonicalisation
+# --------------------------------------------------
+def canonicalize(question: str, plan: QueryPlan) -> Optional[Tuple[str, Params]]:
+    """
+    "What is the salary of employee id 82410?"
+        → ("what is the {col0} of employee id {emp_id}?", {...})
+
+    Returns None when a detected entity cannot be located in the text.
+    """
+    text = " ".join(question.lower().split())
+    params: Params = {}
+
+    if plan.employeename:
+        name = plan.employeename.lower()
+        if name not in text:
+            return None
+        text = text.replace(name, "{emp_name}")
+        params["emp_name"] = ("string", plan.employeename)
+
+    def _column_slot(match):
+        phrase = match.group(1)
+        if plan.is_ranking:
+            column = RANKING_METRIC_MAP.get(phrase) or ATTRIBUTE_MAP[phrase]
+        else:
+            column = ATTRIBUTE_MAP.get(phrase) or RANKING_METRIC_MAP[phrase]
+        slot = f"col{sum(1 for k in params if k.startswith('col'))}"
+        params[slot] = ("column", column)
+        return "{" + slot + "}"
+
+    text = _COLUMN_PATTERN.sub(_column_slot, text)
+
+    def _number_slot(match):
+        value = match.group(0)
+        if value == plan.employeeid and "emp_id" not in params:
+            params["emp_id"] = ("number", value)
+            return "{emp_id}"
+        slot = f"num{sum(1 for k in params if k.startswith('num'))}"
+        params[slot] = ("number", value)
+        return "{" + slot + "}"
+
+    text = _NUMBER_PATTERN.sub(_number_slot, text)
+
+    return text, params
+
+
+# --------------------------------------------------
+# Skeleton build / instantiate (sqlglot AST)
+# --------------------------------------------------
+def _literal_matches(node: exp.Expression, kind: str, value: str) -> bool:
+    if not isinstance(node, exp.Literal):
+        return False
+    if kind == "string":
+        return node.is_string and node.this.lower() == value.lower()
+    if node.is_string:
+        return False
+    try:
+        return float(node.this) == float(value)
+    except ValueError:
+        return False
+
+
+def build_skeleton(sql: str, params: Params) -> Optional[exp.Expression]:
+    """
+    Replace every bound value with a named placeholder.
+    Refuses (None) unless each slot maps onto the SQL unambiguously.
+    """
+    try:
+        tree = sqlglot.parse_one(sql, read="duckdb")
+    except Exception:
+        return None
+
+    columns = [v for kind, v in params.values() if kind == "column"]
+    if len(columns) != len(set(columns)):
+        return None
+
+    targets: Dict[int, str] = {}
+    for slot, (kind, value) in params.items():
+        if kind == "column":
+            nodes = [n for n in tree.find_all(exp.Column) if n.name.lower() == value]
+            if not nodes:
+                return None
+        else:
+            nodes = [n for n in tree.find_all(exp.Literal) if _literal_matches(n, kind, value)]
+            # LIMIT 1 vs "top 1 employee" etc. → ambiguous, don't guess
+            if len(nodes) != 1:
+                return None
+        for node in nodes:
+            targets[id(node)] = slot
+
+    def _to_placeholder(node):
+        slot = targets.get(id(node))
+        return exp.Placeholder(this=slot) if slot else node
+
+    return tree.transform(_to_placeholder, copy=False)
+
+
+def instantiate(skeleton: exp.Expression, params: Params) -> Optional[str]:
+    missing: List[str] = []
+
+    def _bind(node):
+        if not isinstance(node, exp.Placeholder):
+            return node
+        if node.name not in params:
+            missing.append(node.name)
+            return node
+        kind, value = params[node.name]
+        if kind == "column":
+            return exp.column(value)
+        if kind == "string":
+            return exp.Literal.string(value)
+        return exp.Literal.number(value)
+
+    tree = skeleton.transform(_bind)
+    if missing:
+        return None
+    return tree.sql(dialect="duckdb")
+
+
+# --------------------------------------------------
+# Template cache
+# --------------------------------------------------
+def _schema_fingerprint():
+    return tuple(sorted((table, tuple(cols)) for table, cols in TABLE_COLUMNS.items()))
+
+
+class TemplateCache:
+    """
+    LRU of canonical question → validated SQL skeleton.
+    Dropped wholesale whenever TABLE_COLUMNS changes.
+    """
+
+    def __init__(self, max_templates: int = MAX_TEMPLATES):
+        self.max_templates = max_templates
+        self._templates: "OrderedDict[str, exp.Expression]" = OrderedDict()
+        self._schema = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_schema(self):
+        schema = _schema_fingerprint()
+        if schema != self._schema:
+            if self._templates:
+                logger.info(f"♻️ Schema changed → dropping {len(self._templates)} SQL templates")
+            self._templates.clear()
+            self._schema = schema
+
+    def lookup(self, question: str, plan: QueryPlan) -> Optional[str]:
+        canonical = canonicalize(question, plan)
+        if canonical is None:
+            return None
+        key, params = canonical
+
+        with self._lock:
+            self._check_schema()
+            skeleton = self._templates.get(key)
+            if skeleton is None:
+                self.misses += 1
+                return None
+            self._templates.move_to_end(key)
+            self.hits += 1
+
+        sql = instantiate(skeleton, params)
+        if sql:
+            logger.info(f"🧩 SQL template hit: {key}")
+        return sql
+
+    def remember(self, question: str, plan: QueryPlan, sql: str):
+        """
+        Store the skeleton of SQL that already passed validation + execution.
+        """
+        canonical = canonicalize(question, plan)
+        if canonical is None:
+            return
+        key, params = canonical
+
+        skeleton = build_skeleton(sql, params)
+        if skeleton is None:
+            return
+
+        with self._lock:
+            self._check_schema()
+            self._templates[key] = skeleton
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+template_cache = TemplateCache()
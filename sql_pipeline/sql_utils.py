@@ -1,8 +1,7 @@
 import re
-from rapidfuzz import process
 from sqlglot import parse_one, exp
 
-from sql_pipeline.database import TABLES, TABLE_COLUMNS
+from sql_pipeline.schema_index import get_schema_index, TABLE_TYPOS
 
 
 # -------------------------------
@@ -23,26 +22,22 @@ def clean_sql(sql: str):
 # Example: employees → employee
 # -------------------------------
 def fix_table_names(sql: str):
+    index = get_schema_index()
 
-    for token in re.findall(r"[a-zA-Z_]+", sql):
+    for token in set(re.findall(r"[a-zA-Z_]+", sql)):
 
         # If token is already a valid table, skip
-        if token.lower() in TABLES:
+        if token.lower() in index.tables:
             continue
 
         # Only fix tokens that look like table references
-        if token.lower() in ["employees", "employee", "staff", "workers"]:
+        if token.lower() in TABLE_TYPOS:
 
-            match = process.extractOne(token, TABLES)
+            best = index.resolve_table(token)
 
-            if match is None:
-                continue
-
-            best, score, _ = match
-
-            if score > 80:
+            if best:
                 print(f"🔧 Fixed table name: {token} → {best}")
-                sql = sql.replace(token, best)
+                sql = re.sub(rf"\b{token}\b", best, sql)
 
     return sql
 
@@ -51,28 +46,21 @@ def fix_table_names(sql: str):
 # Fix Wrong Column Names (Multi-table)
 # -------------------------------
 def fix_columns(sql: str):
-    all_columns = set()
-    for cols in TABLE_COLUMNS.values():
-        all_columns.update(cols)
+    """
+    Hash lookups against the schema alias index; fuzzy matching only
+    runs (memoised) for identifiers the index has never seen.
+    """
+    index = get_schema_index()
 
-    if not all_columns:
+    if not index.columns:
         return sql
 
     tokens = set(re.findall(r"\b[a-zA-Z_]+\b", sql))
 
     for token in tokens:
-        token_lower = token.lower()
-
-        if token_lower in all_columns:
-            continue
-
-        match = process.extractOne(token_lower, all_columns)
-        if not match:
-            continue
-
-        best, score, _ = match
+        best = index.resolve_column(token)
 
-        if score > 90:
+        if best and best != token:
             print(f"🔧 Fixed column: {token} → {best}")
             sql = re.sub(rf"\b{token}\b", best, sql)
 
@@ -0,0 +1,46 @@
+import os
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+
+# Modules use repo-relative paths (./data, ./logs, memory/…)
+ROOT = Path(__file__).resolve().parents[1]
+os.chdir(ROOT)
+sys.path.insert(0, str(ROOT))
+
+
+EMPLOYEES = pd.DataFrame({
+    "employeeid": [101, 102, 103, 104],
+    "employeename": ["Priya Sharma", "Rakesh Kumar", "Shweta Rao", "Amit Verma"],
+    "salary": [50000, 72000, 72000, 41000],
+    "sickleaveslastyear": [3, None, 14, 5],
+    "overtime": ["Yes", "No", "Yes", None],
+})
+
+
+@pytest.fixture
+def employee_con():
+    """
+    In-memory DuckDB holding a small `employee` table.
+    """
+    con = duckdb.connect()
+    con.register("_employees", EMPLOYEES)
+    con.execute("CREATE TABLE employee AS SELECT * FROM _employees")
+    con.execute(
+        "ALTER TABLE employee ALTER sickleaveslastyear TYPE INTEGER"
+    )
+    con.unregister("_employees")
+    yield con
+    con.close()
+
+
+@pytest.fixture
+def loaded_employee_index(employee_con):
+    from sql_pipeline.entity_index import employee_index
+
+    employee_index.rebuild(employee_con, ["employee"])
+    yield employee_index
+    employee_index.rebuild(employee_con, [])
@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from conftest import ROOT
+
+CSV = "employeeid,employeename,salary\n101,Priya Sharma,50000\n102,Rakesh Kumar,72000\n"
+
+# Imports sql_pipeline.database (loads ./data at import) and counts rows
+COUNT_SCRIPT = textwrap.dedent("""
+    import sql_pipeline.database as db
+    from sql_pipeline.pagination import fetch_capped
+    print("ROWS", fetch_capped("SELECT COUNT(*) AS n FROM employee")[0].column("n")[0].as_py())
+    print("IN_MEMORY", db._in_memory)
+""")
+
+
+@pytest.fixture
+def workdir(tmp_path):
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "employee.csv").write_text(CSV)
+    return tmp_path
+
+
+def _env(**extra):
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    env.pop("DATASET_DB_READ_ONLY", None)
+    env.update(extra)
+    return env
+
+
+def _run(workdir, script, **env):
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=workdir, env=_env(**env), capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    return dict(
+        line.split(" ", 1) for line in result.stdout.splitlines()
+        if line.startswith(("ROWS ", "IN_MEMORY ", "OLD ", "NEW ", "GENERATIONS "))
+    )
+
+
+def _start_holder(workdir, script):
+    """
+    Process that keeps its connection open until stdin closes.
+    """
+    holder = subprocess.Popen(
+        [sys.executable, "-c", script + "\nprint('READY', flush=True)\nimport sys; sys.stdin.read()"],
+        cwd=workdir, env=_env(), stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE, text=True
+    )
+    for line in holder.stdout:
+        if line.startswith("READY"):
+            return holder
+    raise AssertionError(holder.stderr.read()[-2000:])
+
+
+def test_two_processes_attach_to_the_same_cache(workdir):
+    holder = _start_holder(workdir, "import sql_pipeline.database")
+    try:
+        second = _run(workdir, COUNT_SCRIPT)
+        read_only = _run(workdir, COUNT_SCRIPT, DATASET_DB_READ_ONLY="1")
+    finally:
+        holder.stdin.close()
+        holder.wait(timeout=60)
+
+    assert second == {"ROWS": "2", "IN_MEMORY": "False"}
+    assert read_only == {"ROWS": "2", "IN_MEMORY": "False"}
+
+
+def test_falls_back_to_memory_when_a_writer_holds_the_lock(workdir):
+    _run(workdir, COUNT_SCRIPT)
+    current = (workdir / "data_cache" / "CURRENT").read_text().strip()
+
+    # A legacy read-write connection on the published generation
+    writer = _start_holder(workdir, f"import duckdb; con = duckdb.connect('data_cache/{current}')")
+    try:
+        result = _run(workdir, COUNT_SCRIPT)
+    finally:
+        writer.stdin.close()
+        writer.wait(timeout=60)
+
+    assert result == {"ROWS": "2", "IN_MEMORY": "True"}
+
+
+def test_reload_publishes_a_new_generation(workdir):
+    script = textwrap.dedent("""
+        import os
+        import sql_pipeline.database as db
+        from sql_pipeline.pagination import fetch_capped
+
+        old = db.con.cursor()
+        with open("data/employee.csv", "a") as f:
+            f.write("103,Shweta Rao,61000\\n")
+
+        changes = db.reload_datasets()
+        assert changes["changed"] == ["employee"], changes
+
+        print("OLD", old.execute("SELECT COUNT(*) FROM employee").fetchone()[0])
+        print("NEW", fetch_capped("SELECT COUNT(*) AS n FROM employee")[0].column("n")[0].as_py())
+        print("GENERATIONS", len([f for f in os.listdir("data_cache") if f.endswith(".duckdb")]))
+    """)
+    result = _run(workdir, script)
+
+    # In-flight readers keep the previous generation; new queries see the reload
+    assert result == {"OLD": "2", "NEW": "3", "GENERATIONS": "2"}
+
+
+def test_cleanup_keeps_the_current_and_previous_generation(workdir):
+    script = textwrap.dedent("""
+        import os
+        import sql_pipeline.database as db
+
+        published = [db._current_cache()]
+        for i in range(3):
+            with open("data/employee.csv", "a") as f:
+                f.write(f"{200 + i},New Hire,1000\\n")
+            db.reload_datasets()
+            published.append(db._current_cache())
+
+        kept = sorted(os.path.join(db.DB_DIR, f) for f in os.listdir(db.DB_DIR) if f.endswith(".duckdb"))
+        print("GENERATIONS", kept == sorted(published[-2:]))
+    """)
+    assert _run(workdir, script) == {"GENERATIONS": "True"}
@@ -0,0 +1,50 @@
+from router.entity_resolver import extract_entity
+from router.query_plan import analyze_question
+
+
+def test_known_name_is_canonicalised(loaded_employee_index):
+    assert extract_entity("What is Priya Sharma's salary")["employeename"] == "Priya Sharma"
+
+
+def test_misspelt_name_uses_fuzzy_match(loaded_employee_index):
+    assert extract_entity("What is Priya Sharmaa salary")["employeename"] == "Priya Sharma"
+
+
+def test_unknown_name_is_kept_not_dropped(loaded_employee_index):
+    entity = extract_entity("what is Jon Smyth's salary")
+    assert entity["employeename"] == "Jon Smyth"
+
+
+def test_unknown_name_keeps_question_entity_scoped(loaded_employee_index):
+    # has_entity=False would make route_node append the previous
+    # active employee to the question
+    assert analyze_question("what is Jon Smyth's salary").has_entity
+
+
+def test_lower_case_name_found_in_index(loaded_employee_index):
+    assert extract_entity("salary of rakesh kumar")["employeename"] == "Rakesh Kumar"
+
+
+def test_no_name_means_no_entity(loaded_employee_index):
+    assert not analyze_question("how many employees are there").has_entity
+
+
+def test_dirty_ids_are_skipped_not_fatal():
+    import duckdb
+    from sql_pipeline.entity_index import EmployeeIndex
+
+    con = duckdb.connect()
+    con.execute("CREATE TABLE employee (employeeid VARCHAR, employeename VARCHAR)")
+    con.execute(
+        "INSERT INTO employee VALUES ('101', 'Priya Sharma'), (NULL, 'Rakesh Kumar'), "
+        "('N/A', 'Shweta Rao'), ('101.5', NULL), ('104', 'Amit Verma')"
+    )
+
+    index = EmployeeIndex()
+    index.rebuild(con, ["employee"])
+    con.close()
+
+    assert index.get_by_id(101)["employeename"] == "Priya Sharma"
+    assert index.get_by_id(104)["employeename"] == "Amit Verma"
+    assert sorted(index._snapshot.by_id) == [101, 104]
+    assert "none" not in index._snapshot.by_name
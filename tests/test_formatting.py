@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+import sql_pipeline.database as database
+from sql_pipeline import formatting
+from sql_pipeline.formatting import format_date_columns
+
+
+@pytest.fixture(autouse=True)
+def fresh_formats():
+    formatting._detected_formats.clear()
+    yield
+    formatting._detected_formats.clear()
+
+
+def _dates(*values):
+    return pd.DataFrame({"dateofjoining": list(values)})
+
+
+def test_formats_dates_with_ordinal_suffix():
+    df = format_date_columns(_dates("11/13/2000", "01/02/2021", None), "SELECT * FROM employee")
+    assert df["dateofjoining"].tolist()[:2] == ["13th November 2000", "2nd January 2021"]
+
+
+def test_detected_format_is_per_table():
+    us = format_date_columns(_dates("03/04/2020"), "SELECT dateofjoining FROM employee")
+    iso = format_date_columns(_dates("2020-03-04"), "SELECT dateofjoining FROM contractors")
+
+    assert us["dateofjoining"][0] == iso["dateofjoining"][0] == "4th March 2020"
+
+
+def test_detected_format_is_dropped_on_reload(monkeypatch):
+    sql = "SELECT dateofjoining FROM employee"
+    assert format_date_columns(_dates("03/04/2020"), sql)["dateofjoining"][0] == "4th March 2020"
+
+    # Same table re-uploaded with ISO dates
+    monkeypatch.setattr(database, "_data_version", database.get_data_version() + 1)
+    assert format_date_columns(_dates("2020-04-03"), sql)["dateofjoining"][0] == "3rd April 2020"
+    assert len(formatting._detected_formats) == 1
@@ -0,0 +1,100 @@
+import pytest
+
+import router.classifier as classifier
+from router import intent_model
+from router.intent_model import INTENT_CONFIDENCE_THRESHOLD, load_intent_model, mine_log_examples, train
+
+ROUTER_LOG = """\
+2026-01-05 10:00:00,000 | INFO | ROUTER | Detecting intent for: namaste team
+2026-01-05 10:00:00,100 | INFO | ROUTER | Intent decided: {'greet'} source=llm
+2026-01-05 10:01:00,000 | INFO | ROUTER | Detecting intent for: what is the travel reimbursement rule
+2026-01-05 10:01:00,100 | INFO | ROUTER | Intent decided: {'rag'} source=human
+2026-01-05 10:02:00,000 | INFO | ROUTER | Detecting intent for: who reports to manager code 7
+2026-01-05 10:02:00,100 | INFO | ROUTER | Intent decided: {'sql', 'rag'} source=llm
+2026-01-05 10:03:00,000 | INFO | ROUTER | Detecting intent for: how many employees are there
+2026-01-05 10:03:00,100 | INFO | ROUTER | Intent decided: {'sql'} source=rules
+2026-01-05 10:04:00,000 | INFO | ROUTER | Detecting intent for: hello again
+2026-01-05 10:04:00,100 | INFO | ROUTER | Intent decided: {'greet'} source=model
+2026-01-05 10:05:00,000 | INFO | ROUTER | Detecting intent for: tell me something
+2026-01-05 10:05:00,100 | INFO | ROUTER | Intent decided: {'sql'} source=fallback
+2026-01-05 10:06:00,000 | INFO | ROUTER | Detecting intent for: an old question
+2026-01-05 10:06:00,100 | INFO | ROUTER | Intent decided: {'rag'}
+"""
+
+
+@pytest.fixture
+def trained(tmp_path, monkeypatch):
+    log = tmp_path / "app.log"
+    log.write_text(ROUTER_LOG)
+    path = tmp_path / "intent_clf.pkl"
+
+    train(str(log), str(path))
+    model = load_intent_model(str(path))
+    monkeypatch.setattr(intent_model, "intent_model", model)
+    return model
+
+
+class _FakeLLM:
+    def __init__(self, label):
+        self.label, self.calls = label, 0
+
+    def __call__(self, *args, **kwargs):
+        self.calls += 1
+        label = self.label
+
+        class Response:
+            def json(self):
+                return {"response": label}
+
+        return Response()
+
+
+def test_mines_only_llm_and_human_decisions(tmp_path):
+    log = tmp_path / "app.log"
+    log.write_text(ROUTER_LOG)
+    assert mine_log_examples(str(log)) == [
+        ("namaste team", "greet"),
+        ("what is the travel reimbursement rule", "rag"),
+        ("who reports to manager code 7", "both"),
+    ]
+
+
+def test_missing_model_falls_back_to_llm(tmp_path):
+    assert load_intent_model(str(tmp_path / "missing.pkl")) is None
+
+
+def test_trained_model_predicts_known_labels(trained):
+    label, confidence = intent_model.predict_intent("good morning")
+    assert label in intent_model.LABELS
+    assert 0.0 <= confidence <= 1.0
+    assert set(trained.classes_) == set(intent_model.LABELS)
+
+
+@pytest.mark.parametrize("confidence, uses_llm", [
+    (INTENT_CONFIDENCE_THRESHOLD, False),
+    (INTENT_CONFIDENCE_THRESHOLD + 0.2, False),
+    (INTENT_CONFIDENCE_THRESHOLD - 0.01, True),
+])
+def test_llm_only_below_confidence_threshold(monkeypatch, confidence, uses_llm):
+    llm = _FakeLLM("sql")
+    monkeypatch.setattr(classifier.requests, "post", llm)
+    monkeypatch.setattr(classifier, "predict_intent", lambda q: ("greet", confidence))
+
+    intents, source = classifier.classify_intent("namaste team")
+
+    assert intents == ({"sql"} if uses_llm else {"greet"})
+    assert source == ("llm" if uses_llm else "model")
+    assert llm.calls == int(uses_llm)
+
+
+def test_trained_model_drives_the_router(trained, monkeypatch):
+    llm = _FakeLLM("sql")
+    monkeypatch.setattr(classifier.requests, "post", llm)
+    monkeypatch.setattr(classifier, "predict_intent", intent_model.predict_intent)
+
+    label, confidence = intent_model.predict_intent("namaste team")
+    expected = {"rag", "sql"} if label == "both" else {label}
+    uses_llm = confidence < INTENT_CONFIDENCE_THRESHOLD
+
+    assert classifier.llm_intent_classifier("namaste team") == ({"sql"} if uses_llm else expected)
+    assert llm.calls == int(uses_llm)
@@ -0,0 +1,18 @@
+import threading
+
+from sql_pipeline.llm import get_session
+
+
+def test_one_http_session_per_thread():
+    main = get_session()
+    assert get_session() is main
+
+    sessions = []
+    workers = [threading.Thread(target=lambda: sessions.append(get_session())) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert len({id(s) for s in sessions}) == 4
+    assert main not in sessions
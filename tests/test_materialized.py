@@ -0,0 +1,50 @@
+import pytest
+
+from sql_pipeline.materialized import EmployeeMaterialization, _arrow
+
+
+@pytest.fixture
+def view(employee_con):
+    view = EmployeeMaterialization()
+    view.rebuild(employee_con, ["employee"])
+    return view
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT COUNT(*) FROM employee",
+    "SELECT COUNT(*) AS n FROM employee WHERE sickleaveslastyear > 4",
+    "SELECT COUNT(*) FROM employee WHERE salary = 72000",
+    "SELECT COUNT(*) FROM employee WHERE overtime = 'Yes'",
+    # INTEGER column with NULLs: 14, not 14.0
+    "SELECT MAX(sickleaveslastyear) FROM employee",
+    "SELECT MIN(sickleaveslastyear) FROM employee",
+    "SELECT SUM(sickleaveslastyear) FROM employee",
+    "SELECT AVG(sickleaveslastyear) FROM employee",
+    "SELECT SUM(salary) AS total FROM employee",
+    "SELECT overtime, COUNT(*) FROM employee GROUP BY overtime",
+    "SELECT employeename, sickleaveslastyear FROM employee ORDER BY sickleaveslastyear DESC LIMIT 2",
+    "SELECT * FROM employee ORDER BY salary ASC LIMIT 1",
+    "SELECT employeename FROM employee ORDER BY salary DESC LIMIT 2",
+])
+def test_matches_duckdb(view, employee_con, sql):
+    expected = _arrow(employee_con, sql)
+    got = view.answer(sql)
+
+    assert got is not None
+    assert got.schema == expected.schema
+    # Group order (and order among rows tied INSIDE the limit) is unspecified
+    keys = [(c, "ascending") for c in expected.column_names]
+    assert got.sort_by(keys).to_pylist() == expected.sort_by(keys).to_pylist()
+
+
+@pytest.mark.parametrize("sql", [
+    # 72000 is shared by two employees: which one DuckDB keeps is undefined
+    "SELECT employeename FROM employee ORDER BY salary DESC LIMIT 1",
+    "SELECT employeename FROM employee ORDER BY salary ASC LIMIT 3",
+    # More rows than non-NULL values
+    "SELECT employeename FROM employee ORDER BY sickleaveslastyear LIMIT 4",
+    # Not a materialised shape
+    "SELECT COUNT(*) FROM employee WHERE employeeid = 101 AND salary > 1",
+])
+def test_falls_back_to_sql(view, sql):
+    assert view.answer(sql) is None
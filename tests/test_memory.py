@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+import memory.long_term as long_term
+import memory.semantic as semantic
+from memory.long_term import flush_writes, init_db, save, search
+from memory.semantic import SemanticMemoryIndex
+
+
+@pytest.fixture
+def ltm(tmp_path, monkeypatch):
+    """
+    Long-term memory on a throwaway SQLite file.
+    """
+    monkeypatch.setattr(long_term, "DB_PATH", str(tmp_path / "chat_memory.db"))
+    init_db()
+    yield long_term
+    flush_writes()
+
+
+def _entry(i, question, answer):
+    return {"id": f"e{i}", "question": question, "answer": answer}
+
+
+@pytest.mark.parametrize("fts", [True, False])
+def test_search_is_scoped_to_the_session(ltm, monkeypatch, fts):
+    save(_entry(1, "what is my salary", "50000"), session_id="alice")
+    save(_entry(2, "what is my salary", "72000"), session_id="bob")
+    flush_writes()
+    monkeypatch.setattr(ltm, "FTS_ENABLED", fts)
+
+    assert search("what is my salary", "alice") == [("what is my salary", "50000")]
+    assert search("what is my salary", "bob") == [("what is my salary", "72000")]
+    assert search("what is my salary", "mallory") == []
+
+
+def test_search_ranks_matches_with_bm25(ltm):
+    save(_entry(1, "sick leave policy for contractors and interns", "a"), session_id="s")
+    save(_entry(2, "sick leave policy", "b"), session_id="s")
+    save(_entry(3, "maternity leave", "c"), session_id="s")
+    flush_writes()
+
+    assert [a for _, a in search("sick leave policy", "s")] == ["b", "a"]
+
+
+def test_semantic_partitions_are_isolated(ltm, monkeypatch):
+    vector = np.array([1.0, 0.0, 0.0], dtype="float32")
+    monkeypatch.setattr(semantic, "embed", lambda texts: np.vstack([vector] * len(list(texts))))
+
+    save(_entry(1, "how many sick leaves do I have", "3"), session_id="alice", embedding=vector)
+    flush_writes()
+
+    index = SemanticMemoryIndex()
+    assert index.nearest("alice", "sick leave count")[:2] == ("how many sick leaves do I have", "3")
+    assert index.nearest("bob", "sick leave count") is None
+
+
+def test_manager_does_not_answer_from_another_session(ltm, monkeypatch):
+    from memory.manager import MemoryManager
+
+    monkeypatch.setattr("memory.manager.embed", lambda texts: (_ for _ in ()).throw(RuntimeError("offline")))
+    monkeypatch.setattr("memory.manager.semantic_index", SemanticMemoryIndex())
+
+    alice = MemoryManager(session_id="alice")
+    alice.add_chat("what is my salary", "50000")
+    alice.flush()
+    flush_writes()
+
+    assert "50000" in MemoryManager(session_id="alice").retrieve("what is my salary")
+    assert MemoryManager(session_id="bob").retrieve("what is my salary") is None
+
+
+def test_empty_partition_is_cached_until_the_next_save(ltm, monkeypatch):
+    vector = np.array([1.0, 0.0, 0.0], dtype="float32")
+    monkeypatch.setattr(semantic, "embed", lambda texts: np.vstack([vector] * len(list(texts))))
+
+    loads = []
+    monkeypatch.setattr(semantic, "load_embeddings", lambda sid: loads.append(sid) or long_term.load_embeddings(sid))
+
+    index = SemanticMemoryIndex()
+    assert index.nearest("bob", "sick leave count") is None
+    assert index.nearest("bob", "sick leave count") is None
+    assert loads == ["bob"]
+
+    save(_entry(1, "how many sick leaves do I have", "3"), session_id="bob", embedding=vector)
+    flush_writes()
+    index.add("bob", vector[None, :], [("how many sick leaves do I have", "3")])
+
+    assert index.nearest("bob", "sick leave count")[:2] == ("how many sick leaves do I have", "3")
+
+
+def test_semantic_match_requires_the_same_identifiers(ltm, monkeypatch):
+    vector = np.array([1.0, 0.0, 0.0], dtype="float32")
+    monkeypatch.setattr(semantic, "embed", lambda texts: np.vstack([vector] * len(list(texts))))
+
+    save(_entry(1, "salary of employee 101", "50000"), session_id="alice", embedding=vector)
+    flush_writes()
+
+    index = SemanticMemoryIndex()
+    assert index.nearest("alice", "what is the salary of employee 102") is None
+    assert index.nearest("alice", "what is the salary of employee 101")[:2] == ("salary of employee 101", "50000")
+
+
+def test_employee_names_are_identifiers(loaded_employee_index):
+    assert semantic.identifiers("what is Priya Sharma's salary") == {"priya sharma"}
+    assert semantic.identifiers("salary of rakesh kumar in 2023") == {"rakesh kumar", "2023"}
@@ -0,0 +1,112 @@
+import base64
+import json
+import time
+
+import pytest
+
+import sql_pipeline.database as database
+from sql_pipeline.agent import fetch_result_page, stream_result_rows
+from sql_pipeline.pagination import _paged_sql, fetch_capped, iter_record_batches, make_token, read_token
+
+USER = {"role": "admin", "emp_id": 101}
+SQL = "SELECT emp_id, name FROM users ORDER BY emp_id"
+
+
+def _tamper_sql(token: str, sql: str) -> str:
+    body, signature = token.rsplit(".", 1)
+    data = json.loads(base64.urlsafe_b64decode(body))
+    data["sql"] = sql
+    payload = json.dumps(data, separators=(",", ":")).encode()
+    return f"{base64.urlsafe_b64encode(payload).decode()}.{signature}"
+
+
+def test_token_round_trip():
+    data = read_token(make_token(SQL, USER, offset=500), USER)
+    assert (data["sql"], data["offset"]) == (SQL, 500)
+
+
+@pytest.mark.parametrize("mangle", [
+    lambda t: t[:-1] + ("0" if t[-1] != "0" else "1"),
+    lambda t: _tamper_sql(t, "SELECT * FROM users"),
+    lambda t: "not-a-token",
+])
+def test_tampered_token_is_rejected(mangle):
+    with pytest.raises(ValueError, match="Invalid continuation token"):
+        read_token(mangle(make_token(SQL, USER, offset=0)), USER)
+
+
+def test_token_is_bound_to_the_user():
+    token = make_token(SQL, USER, offset=0)
+    with pytest.raises(ValueError, match="another user"):
+        read_token(token, {"role": "employee", "emp_id": 102})
+
+
+def test_token_expires_with_the_data_version(monkeypatch):
+    token = make_token(SQL, USER, offset=0)
+    monkeypatch.setattr(database, "_data_version", database.get_data_version() + 1)
+    with pytest.raises(ValueError, match="dataset changed"):
+        read_token(token, USER)
+
+
+def test_stream_rejects_tampered_token_before_streaming():
+    token = _tamper_sql(make_token(SQL, USER, offset=0), "SELECT password FROM users")
+
+    # Raised by the call itself, not on first iteration of the stream
+    with pytest.raises(ValueError, match="Invalid continuation token"):
+        stream_result_rows(token, USER)
+
+
+def test_stream_and_page_return_remaining_rows():
+    token = make_token(SQL, USER, offset=1)
+
+    lines = list(stream_result_rows(token, USER))
+    streamed = [json.loads(line) for chunk in lines for line in chunk.splitlines()]
+    page = fetch_result_page(token, USER)
+
+    assert [row["emp_id"] for row in streamed] == [102, 103]
+    assert page["rows"] == streamed
+    assert page["continuation_token"] is None
+
+
+SLOW_SQL = "SELECT i FROM range(400000000) t(i) ORDER BY hash(i)"
+
+
+@pytest.mark.parametrize("run", [
+    lambda: fetch_capped(SLOW_SQL),
+    lambda: list(iter_record_batches(SLOW_SQL)),
+])
+def test_timeout_interrupts_query_execution(monkeypatch, run):
+    monkeypatch.setattr(database, "QUERY_TIMEOUT_SECONDS", 0.2)
+
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        run()
+    assert time.perf_counter() - start < 5
+
+
+def test_unordered_pages_share_one_deterministic_order():
+    sql = "SELECT emp_id, name FROM users"
+    assert _paged_sql(sql, 0).endswith("ORDER BY ALL")
+    assert _paged_sql(sql, 2).endswith("ORDER BY ALL OFFSET 2")
+    assert _paged_sql(SQL, 0) == SQL
+
+    pages = [fetch_capped(sql, offset, cap=1)[0] for offset in range(3)]
+    assert [page.column("emp_id")[0].as_py() for page in pages] == [101, 102, 103]
+
+
+def test_narrated_result_keeps_its_continuation_marker(monkeypatch):
+    import pandas as pd
+    from sql_pipeline import agent
+    from sql_pipeline.pagination import CONTINUATION_PATTERN
+
+    monkeypatch.setattr(agent, "nl_to_sql", lambda **kwargs: SQL)
+    monkeypatch.setattr(agent, "_execute_cached", lambda sql, user: (pd.DataFrame({"emp_id": [101]}), True))
+    monkeypatch.setattr(agent, "needs_llm_narration", lambda semantics, df: True)
+    monkeypatch.setattr(agent, "narrate_batch", lambda pending: {1: "Narrated summary."})
+    monkeypatch.setattr(agent.template_cache, "remember", lambda *args: None)
+
+    answer = agent.analytical_agent("list every user", USER)
+
+    assert answer.startswith("Narrated summary.")
+    token = CONTINUATION_PATTERN.search(answer).group(1)
+    assert read_token(token, USER)["offset"] > 0
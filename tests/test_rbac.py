@@ -0,0 +1,93 @@
+import pytest
+
+from sql_pipeline.sql_ast import process_sql
+
+EMPLOYEE = {"role": "employee", "emp_id": 101}
+
+
+@pytest.fixture(autouse=True)
+def employee_schema(monkeypatch):
+    from sql_pipeline import sql_ast
+
+    monkeypatch.setattr(sql_ast, "TABLES", ["employee"])
+    monkeypatch.setattr(sql_ast, "TABLE_COLUMNS", {"employee": sql_ast.BENCHMARK_COLUMNS})
+    sql_ast._process_cached.cache_clear()
+    yield
+    sql_ast._process_cached.cache_clear()
+
+
+@pytest.mark.parametrize("sql, expected", [
+    (
+        "SELECT employeename, salary FROM employee WHERE overtime = 'Yes' OR salary > 0",
+        "SELECT employeename, salary FROM employee WHERE (overtime = 'Yes' OR salary > 0) AND employeeid = 101",
+    ),
+    (
+        # An OR-ed "scope" does not restrict anything
+        "SELECT employeename, salary FROM employee WHERE employeename = 'Amit Verma' OR 1 = 1",
+        "SELECT employeename, salary FROM employee WHERE (employeename = 'Amit Verma' OR 1 = 1) AND employeeid = 101",
+    ),
+    (
+        "SELECT e.employeename FROM employee AS e WHERE e.overtime = 'No'",
+        "SELECT e.employeename FROM employee AS e WHERE e.overtime = 'No' AND e.employeeid = 101",
+    ),
+    (
+        "SELECT employeename, salary FROM employee "
+        "WHERE salary > (SELECT salary FROM employee WHERE employeeid = 7)",
+        "SELECT employeename, salary FROM employee "
+        "WHERE salary > (SELECT salary FROM employee WHERE employeeid = 7) AND employeeid = 101",
+    ),
+    (
+        # Every SELECT that reads employee is scoped, CTE bodies included
+        "WITH staff AS (SELECT employeeid, employeename, salary FROM employee) "
+        "SELECT employeename, salary FROM staff",
+        "WITH staff AS (SELECT employeeid, employeename, salary FROM employee WHERE employeeid = 101) "
+        "SELECT employeename, salary FROM staff",
+    ),
+    (
+        "SELECT employeename FROM (SELECT employeeid, employeename FROM employee) AS t "
+        "WHERE employeeid = 104",
+        "SELECT employeename FROM (SELECT employeeid, employeename FROM employee WHERE employeeid = 101) AS t "
+        "WHERE employeeid = 104",
+    ),
+])
+def test_scope_is_anded_into_every_employee_select(sql, expected):
+    assert process_sql(sql, EMPLOYEE).sql == expected
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT employeename, salary FROM employee WHERE employeeid = 104",
+    "SELECT employeename FROM employee WHERE overtime = 'Yes' AND (employeename = 'Amit Verma')",
+    "SELECT COUNT(*) FROM employee WHERE overtime = 'Yes'",
+    "SELECT employeename FROM employee ORDER BY salary DESC LIMIT 1",
+])
+def test_scoped_and_global_queries_are_untouched(sql):
+    result = process_sql(sql, EMPLOYEE)
+    assert result.sql == result.validated_sql
+
+
+@pytest.mark.parametrize("emp_id", ["101 OR 1=1", "101) OR (1=1", None])
+def test_untrusted_emp_id_is_rejected(emp_id):
+    with pytest.raises(ValueError, match="Invalid user context"):
+        process_sql(
+            "SELECT employeename, salary FROM employee WHERE overtime = 'Yes'",
+            {"role": "employee", "emp_id": emp_id}
+        )
+
+
+def test_mutations_are_blocked_for_every_role():
+    with pytest.raises(ValueError):
+        process_sql("DELETE FROM employee WHERE employeeid = 101", {"role": "admin", "emp_id": 101})
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT employeename, salary FROM employee WHERE employeeid = 101 "
+    "UNION ALL SELECT employeename, salary FROM employee",
+    "SELECT employeename, salary FROM employee UNION SELECT 'total', COUNT(*) FROM employee",
+    "SELECT employeeid FROM employee EXCEPT SELECT employeeid FROM employee WHERE salary < 0",
+])
+def test_set_operations_are_rejected_for_employees(sql):
+    with pytest.raises(ValueError, match="UNION / INTERSECT / EXCEPT"):
+        process_sql(sql, EMPLOYEE)
+
+    admin = process_sql(sql, {"role": "admin", "emp_id": 101})
+    assert admin.sql == admin.validated_sql
@@ -0,0 +1,36 @@
+import faiss
+import numpy as np
+
+from rag_pipeline.config import MIN_COSINE_SIMILARITY, SIMILARITY_THRESHOLD
+
+
+def _unit(*values):
+    vector = np.array([values], dtype="float32")
+    faiss.normalize_L2(vector)
+    return vector
+
+
+def _at_cosine(cos):
+    # Unit vector with the given cosine similarity to the x axis
+    return _unit(cos, np.sqrt(1 - cos ** 2), 0.0)
+
+
+def test_radius_matches_the_minimum_cosine_similarity():
+    assert np.isclose(SIMILARITY_THRESHOLD, 2 - 2 * MIN_COSINE_SIMILARITY)
+
+
+def test_irrelevant_chunks_are_outside_the_radius():
+    index = faiss.IndexFlatL2(3)
+    index.add(np.vstack([
+        _at_cosine(0.80),    # relevant
+        _at_cosine(0.45),    # related
+        _at_cosine(0.05),    # unrelated
+        _at_cosine(-0.20),   # opposite (inside the old 2.5 radius)
+    ]))
+    query = _unit(1.0, 0.0, 0.0)
+
+    lims, _, indices = index.range_search(query, SIMILARITY_THRESHOLD)
+    assert sorted(indices[lims[0]:lims[1]].tolist()) == [0, 1]
+
+    lims, _, indices = index.range_search(query, 2.5)
+    assert len(indices[lims[0]:lims[1]]) == 4
@@ -0,0 +1,96 @@
+import pytest
+
+from router.query_plan import analyze_question
+from sql_pipeline.sql_compiler import compile_sql
+
+
+COLUMNS = {
+    "employeeid", "employeename", "salary", "dateofjoining", "managercode",
+    "yearsatcompany", "yearsincurrentrole", "sickleaveslastyear",
+    "overtime", "department", "gender",
+}
+
+
+@pytest.fixture
+def compile_question(loaded_employee_index):
+    analyze_question.cache_clear()
+
+    def _compile(question, policy_constraints=None):
+        compiled = compile_sql(
+            question, analyze_question(question), COLUMNS, ["employee"], policy_constraints
+        )
+        return compiled and (compiled[0], compiled[1].sql(dialect="duckdb"))
+
+    yield _compile
+    analyze_question.cache_clear()
+
+
+# --------------------------------------------------
+# Fully covered shapes still compile
+# --------------------------------------------------
+@pytest.mark.parametrize("question, expected", [
+    ("Who has the highest salary?", (
+        "top1_ranking",
+        "SELECT employeeid, employeename, salary FROM employee ORDER BY salary DESC LIMIT 1")),
+    ("Who has taken the highest sick leaves?", (
+        "top1_ranking",
+        "SELECT employeeid, employeename, sickleaveslastyear FROM employee "
+        "ORDER BY sickleaveslastyear DESC LIMIT 1")),
+    ("How many employees are there?", ("count_all", "SELECT COUNT(*) FROM employee")),
+    ("How many employees have salary over 50000?", (
+        "count_filter", "SELECT COUNT(*) FROM employee WHERE salary > 50000")),
+    ("List employees with salary over 50000", (
+        "list_filter",
+        "SELECT employeeid, employeename, salary FROM employee WHERE salary > 50000")),
+    ("What is the salary of employee id 101?", (
+        "attribute_lookup",
+        "SELECT employeeid, employeename, salary FROM employee WHERE employeeid = 101")),
+    ("What is the salary of Priya Sharma?", (
+        "attribute_lookup",
+        "SELECT salary FROM employee WHERE employeename = 'Priya Sharma'")),
+])
+def test_covered_shapes_compile(compile_question, question, expected):
+    assert compile_question(question) == expected
+
+
+def test_policy_constrained_count(compile_question):
+    assert compile_question(
+        "How many employees exceeded the sick leave policy?",
+        {"column": "sickleaveslastyear", "operator": ">", "value": 12},
+    ) == ("count_policy_threshold", "SELECT COUNT(*) FROM employee WHERE sickleaveslastyear > 12")
+
+
+# --------------------------------------------------
+# Top / bottom N, ordinals, aggregates
+# --------------------------------------------------
+@pytest.mark.parametrize("question, expected", [
+    ("top 5 employees by salary", (
+        "topn_ranking",
+        "SELECT employeeid, employeename, salary FROM employee ORDER BY salary DESC LIMIT 5")),
+    ("who are the 3 employees with the lowest salary", (
+        "topn_ranking",
+        "SELECT employeeid, employeename, salary FROM employee ORDER BY salary ASC LIMIT 3")),
+    ("who has the second highest salary", (
+        "topn_ranking",
+        "SELECT employeeid, employeename, salary FROM employee ORDER BY salary DESC LIMIT 1 OFFSET 1")),
+    ("what is the maximum salary", ("max_aggregate", "SELECT MAX(salary) FROM employee")),
+])
+def test_ranking_limits_and_aggregates(compile_question, question, expected):
+    assert compile_question(question) == expected
+
+
+# --------------------------------------------------
+# Anything the slots do not explain goes to the LLM
+# --------------------------------------------------
+@pytest.mark.parametrize("question", [
+    "who has the highest salary in the sales department",
+    "which female employee has the highest salary",
+    "who has the highest salary among employees with overtime",
+    "list employees in administration with salary over 50000",
+    "how many employees have salary over 50000 in the sales department",
+    "what is the salary of employee id 101 and 102",
+    "show employees with sick leaves above 10 who joined after 2020",
+    "who has the most sick leaves in 2023",
+])
+def test_uncovered_questions_fall_back(compile_question, question):
+    assert compile_question(question) is None
@@ -0,0 +1,86 @@
+import pytest
+
+from router.query_plan import analyze_question
+from sql_pipeline import sql_templates
+from sql_pipeline.sql_templates import TemplateCache, build_skeleton, canonicalize, instantiate
+
+
+@pytest.fixture
+def plan_for(loaded_employee_index):
+    analyze_question.cache_clear()
+    yield analyze_question
+    analyze_question.cache_clear()
+
+
+def _learn(cache, plan_for, question, sql):
+    cache.remember(question, plan_for(question), sql)
+
+
+def test_canonical_question_has_named_slots(plan_for):
+    question = "What is the salary of employee id 101?"
+    assert canonicalize(question, plan_for(question)) == (
+        "what is the {col0} of employee id {emp_id}?",
+        {"col0": ("column", "salary"), "emp_id": ("number", "101")},
+    )
+
+
+def test_skeleton_binds_new_id_and_column(plan_for):
+    cache = TemplateCache()
+    _learn(cache, plan_for, "What is the salary of employee id 101?",
+           "SELECT employeeid, employeename, salary FROM employee WHERE employeeid = 101")
+
+    question = "What is the manager code of employee id 104?"
+    assert cache.lookup(question, plan_for(question)) == (
+        "SELECT employeeid, employeename, managercode FROM employee WHERE employeeid = 104"
+    )
+
+
+def test_skeleton_binds_employee_name(plan_for):
+    cache = TemplateCache()
+    _learn(cache, plan_for, "What is the salary of Priya Sharma?",
+           "SELECT employeename, salary FROM employee WHERE employeename = 'Priya Sharma'")
+
+    question = "What is the salary of Amit Verma?"
+    assert cache.lookup(question, plan_for(question)) == (
+        "SELECT employeename, salary FROM employee WHERE employeename = 'Amit Verma'"
+    )
+
+
+def test_bound_strings_are_quoted_not_spliced():
+    skeleton = build_skeleton(
+        "SELECT salary FROM employee WHERE employeename = 'Priya Sharma'",
+        {"emp_name": ("string", "Priya Sharma")}
+    )
+    sql = instantiate(skeleton, {"emp_name": ("string", "x' OR '1'='1")})
+    assert sql == "SELECT salary FROM employee WHERE employeename = 'x'' OR ''1''=''1'"
+
+
+@pytest.mark.parametrize("sql, params", [
+    # The bound number appears twice (LIMIT 1 vs "employee id 1") → ambiguous
+    ("SELECT salary FROM employee WHERE employeeid = 1 LIMIT 1", {"emp_id": ("number", "1")}),
+    # The bound number never reached the SQL
+    ("SELECT salary FROM employee", {"emp_id": ("number", "101")}),
+    # Two slots naming the same column
+    ("SELECT salary FROM employee", {"col0": ("column", "salary"), "col1": ("column", "salary")}),
+])
+def test_ambiguous_skeletons_are_refused(sql, params):
+    assert build_skeleton(sql, params) is None
+
+
+def test_missing_slot_refuses_to_instantiate():
+    skeleton = build_skeleton(
+        "SELECT salary FROM employee WHERE employeeid = 101",
+        {"emp_id": ("number", "101")}
+    )
+    assert instantiate(skeleton, {}) is None
+
+
+def test_schema_change_drops_templates(plan_for, monkeypatch):
+    cache = TemplateCache()
+    question = "What is the salary of employee id 101?"
+    _learn(cache, plan_for, question,
+           "SELECT employeeid, employeename, salary FROM employee WHERE employeeid = 101")
+    assert cache.lookup(question, plan_for(question)) is not None
+
+    monkeypatch.setattr(sql_templates, "TABLE_COLUMNS", {"employee": ["employeeid", "salary"]})
+    assert cache.lookup(question, plan_for(question)) is None
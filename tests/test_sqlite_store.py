@@ -0,0 +1,54 @@
+import pytest
+
+import memory.sqlite_store as sqlite_store
+from memory.sqlite_store import BackgroundWriter, connect
+
+INSERT = "INSERT INTO t (id, value) VALUES (?, ?)"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "store.db")
+    con = connect(path)
+    con.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, value TEXT NOT NULL)")
+    con.close()
+    return path
+
+
+def _ids(path):
+    con = connect(path)
+    try:
+        return [row[0] for row in con.execute("SELECT id FROM t ORDER BY id")]
+    finally:
+        con.close()
+
+
+def test_flush_waits_for_queued_writes(db_path):
+    writer = BackgroundWriter(db_path, batch_size=8)
+    committed = []
+    for i in range(100):
+        writer.submit(INSERT, [(i, "x")], lambda i=i: committed.append(i))
+
+    writer.flush()
+
+    assert _ids(db_path) == list(range(100))
+    assert sorted(committed) == list(range(100))
+    assert writer.metrics()["queue_depth"] == 0
+
+
+def test_failing_job_does_not_lose_the_rest_of_the_batch(db_path, monkeypatch):
+    # Long enough that all three jobs land in one batch
+    monkeypatch.setattr(sqlite_store, "WRITE_FLUSH_INTERVAL", 0.5)
+    writer = BackgroundWriter(db_path)
+    committed = []
+
+    writer.submit(INSERT, [(1, "a")], lambda: committed.append("first"))
+    # Second row violates NOT NULL: the whole job (row 2 included) is dropped
+    writer.submit(INSERT, [(2, "b"), (3, None)], lambda: committed.append("bad"))
+    writer.submit(INSERT, [(4, "d")], lambda: committed.append("last"))
+    writer.flush()
+
+    metrics = writer.metrics()
+    assert _ids(db_path) == [1, 4]
+    assert committed == ["first", "last"]
+    assert (metrics["batches"], metrics["failed_jobs"], metrics["rows_written"]) == (1, 1, 2)
@@ -5,25 +5,31 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from router.hybrid_executor import run_rag, run_sql
-from sql_pipeline.database import con
+from sql_pipeline.entity_index import employee_index
+from rag_pipeline.policy_facts import get_policy_fact, format_policy_fact
 import re
 
 def get_leave_balance(employee_id: int, leave_type: str = "sick leave"):
     """
     Calculates the remaining leave balance for an employee.
     
-    1. Gets policy limit via RAG.
-    2. Gets used leaves via SQL.
+    1. Gets policy limit from the policy-facts table (RAG only as fallback).
+    2. Gets used leaves from the employee index.
     3. Returns the difference.
     """
     
-    # 1. Get Policy Limit via RAG
-    rag_query = f"What is the maximum allowed {leave_type} days per year according to the HR policy?"
-    rag_answer = run_rag(rag_query)
-    
-    # Extract numeric value (reusing logic from hybrid_executor or similar)
-    from router.hybrid_executor import extract_numeric_policy_value
-    policy_limit = extract_numeric_policy_value(rag_answer)
+    # 1. Get Policy Limit (precomputed at ingest time)
+    fact = get_policy_fact(leave_type.lower())
+    if fact is not None:
+        rag_answer = format_policy_fact(fact)
+        policy_limit = fact["value"]
+    else:
+        rag_query = f"What is the maximum allowed {leave_type} days per year according to the HR policy?"
+        rag_answer = run_rag(rag_query)
+        
+        # Extract numeric value (reusing logic from hybrid_executor or similar)
+        from router.hybrid_executor import extract_numeric_policy_value
+        policy_limit = extract_numeric_policy_value(rag_answer)
     
     if policy_limit is None:
         return f"❌ Could not determine the policy limit from documents. RAG Answer: {rag_answer}"
@@ -39,15 +45,14 @@ def get_leave_balance(employee_id: int, leave_type: str = "sick leave"):
     
     target_col = column_map.get(leave_type.lower(), "sickleaveslastyear")
     
-    sql = f"SELECT employeename, {target_col} FROM employee WHERE employeeid = {employee_id}"
-    
     try:
-        df = con.execute(sql).fetchdf()
-        if df.empty:
+        # O(1) in-memory fetch instead of an ad-hoc SQL lookup
+        row = employee_index.get_by_id(employee_id, ["employeename", target_col])
+        if row is None:
             return f"❌ Employee with ID {employee_id} not found."
         
-        emp_name = df.iloc[0]['employeename']
-        used = int(df.iloc[0][target_col])
+        emp_name = row['employeename']
+        used = int(row[target_col])
         balance = policy_limit - used
         
         return {
@@ -6,6 +6,7 @@ sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 import streamlit as st
 import requests
 import pandas as pd
+import uuid
 from login import login_screen
 
 API_URL = "http://127.0.0.1:8000/ask"
@@ -148,6 +149,10 @@ if role == "admin":
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Per-browser-session memory scope on the backend
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = str(uuid.uuid4())
+
 for msg in st.session_state.messages:
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
@@ -172,7 +177,8 @@ if query:
 
             response = requests.post(API_URL, json={
                 "question": query,
-                "user": user
+                "user": user,
+                "session_id": st.session_state["session_id"]
             })
 
             if response.status_code != 200: